@@ -0,0 +1,67 @@
+"""
+Tiempo de arranque en frío: importar el núcleo y calcular un hogar.
+
+Cada medición corre en un intérprete nuevo (sin módulos ya cargados) y se
+informa la mediana de varias repeticiones. Como referencia se mide también
+importar la app Streamlit, que carga streamlit y pandas.
+
+Uso:
+    python bench/arranque.py [--repeticiones 7]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PESADOS = ["numpy", "pandas", "requests", "streamlit"]
+
+CASOS = {
+    "núcleo (crianza.costo_crianza)": """
+import crianza
+total, detalle = crianza.costo_crianza([0, 5, 12], 150000.0, 3000.0, 400000.0)
+""",
+    "motor vectorizado (crianza.costo_crianza_lote)": """
+import crianza
+totales, detalle = crianza.costo_crianza_lote([[0, 5, 12]], 150000.0, 3000.0, 400000.0)
+""",
+    "app Streamlit (import calculadora_crianza_app)": """
+import calculadora_crianza_app
+import crianza
+total, detalle = crianza.costo_crianza([0, 5, 12], 150000.0, 3000.0, 400000.0)
+""",
+}
+
+MEDIR = """
+import sys, time, json
+t0 = time.perf_counter()
+{codigo}
+seg = time.perf_counter() - t0
+print(json.dumps({{"seg": seg, "cargados": [m for m in {pesados!r} if m in sys.modules]}}))
+"""
+
+
+def medir(codigo):
+    salida = subprocess.run(
+        [sys.executable, "-c", MEDIR.format(codigo=codigo, pesados=PESADOS)],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    for nombre, codigo in CASOS.items():
+        medidas = [medir(codigo) for _ in range(args.repeticiones)]
+        ms = statistics.median(m["seg"] for m in medidas) * 1000
+        cargados = ", ".join(medidas[0]["cargados"]) or "ninguno"
+        print(f"{nombre:<50} {ms:9.1f} ms   dependencias pesadas: {cargados}")
+
+
+if __name__ == "__main__":
+    main()
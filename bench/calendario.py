@@ -0,0 +1,97 @@
+"""
+Simulación del calendario de consultas: cuántas veces se consulta cada
+fuente en un período largo y cuánto se tarda en ver un dato nuevo, con el
+calendario de publicación (crianza.fuentes.CALENDARIO) y con un intervalo
+fijo como el anterior (6 horas).
+
+Las publicaciones son sintéticas: INDEC publica el mes M un día hábil al
+azar entre el 11 y el 15 de M+1; UPACP cambia la escala cada dos a cuatro
+meses, entre el 1 y el 3 del mes; la hora es al azar entre las 10 y las 18.
+No hay red: cada consulta devuelve lo publicado hasta ese momento.
+
+Uso:
+    python bench/calendario.py [--meses 24] [--semilla 1]
+"""
+import argparse
+import random
+import statistics
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import pandas as pd  # noqa: E402
+
+from crianza.fuentes import INTERVALO_REFRESCO, ZONA, proxima_consulta  # noqa: E402
+
+
+def publicaciones(meses, semilla):
+    """
+    {fuente: [(epoch de publicación, valor), ...]} ordenadas por fecha.
+    """
+    azar = random.Random(semilla)
+    inicio = datetime(2024, 1, 1, tzinfo=ZONA)
+    indec = []
+    for i in range(meses + 1):
+        periodo = pd.Timestamp(2023, 12, 1) + pd.DateOffset(months=i)
+        dia = datetime(periodo.year, periodo.month, 1, 10, tzinfo=ZONA) + timedelta(days=31)
+        dia = dia.replace(day=azar.randint(11, 15)) + timedelta(minutes=azar.randint(0, 8*60))
+        while dia.weekday() >= 5:
+            dia += timedelta(days=1)
+        indec.append((dia.timestamp(), periodo))
+
+    upacp, mes = [], 0
+    while mes <= meses:
+        dia = datetime(2024 + mes // 12, mes % 12 + 1, azar.randint(1, 3), 10, tzinfo=ZONA)
+        dia += timedelta(minutes=azar.randint(0, 8*60))
+        upacp.append((dia.timestamp(), (float(mes), float(mes))))
+        mes += azar.randint(2, 4)
+
+    previo = (inicio - timedelta(days=40)).timestamp()
+    return {
+        "cba": [(previo, (pd.Timestamp(2023, 11, 1), 1.0))] + [(t, (p, 1.0)) for t, p in indec],
+        "crianza": [(previo, {"Fecha": pd.Timestamp(2023, 11, 1)})] + [(t, {"Fecha": p}) for t, p in indec],
+        "upacp": [(previo, (-1.0, -1.0))] + upacp,
+    }, inicio.timestamp()
+
+
+def simular(nombre, publicadas, inicio, fin, calendario):
+    """
+    (consultas, demoras en horas entre cada publicación y su detección).
+    """
+    t, consultas, vistas, demoras = inicio, 0, 0, []
+    while t < fin:
+        consultas += 1
+        ultimas = [i for i, (p, _) in enumerate(publicadas) if p <= t]
+        indice = ultimas[-1]
+        for i in range(vistas + 1, indice + 1):
+            demoras.append((t - publicadas[i][0]) / 3600)
+        vistas = max(vistas, indice)
+        valor = publicadas[indice][1]
+        t = proxima_consulta(nombre, valor, t) if calendario else t + INTERVALO_REFRESCO
+    return consultas, demoras
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--meses", type=int, default=24)
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    todas, inicio = publicaciones(args.meses, args.semilla)
+    fin = (datetime.fromtimestamp(inicio, ZONA) + pd.DateOffset(months=args.meses)).timestamp()
+
+    print(f"{args.meses} meses simulados\n")
+    print(f"{'fuente':<10} {'modo':<12} {'consultas':>9} {'por mes':>8} {'demora media':>13} {'demora máx':>11}")
+    for nombre, publicadas in todas.items():
+        for calendario in (False, True):
+            consultas, demoras = simular(nombre, publicadas, inicio, fin, calendario)
+            modo = "calendario" if calendario else "fijo 6 h"
+            print(f"{nombre:<10} {modo:<12} {consultas:9d} {consultas / args.meses:8.1f} "
+                  f"{statistics.mean(demoras):11.1f} h {max(demoras):9.1f} h")
+
+
+if __name__ == "__main__":
+    main()
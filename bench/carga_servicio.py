@@ -0,0 +1,215 @@
+"""
+Prueba de carga del servicio HTTP (crianza.servicio) contra dobles locales
+de INDEC y UPACP.
+
+Levanta los dobles, arranca el servicio en otro proceso apuntado a ellos y
+le envía pedidos concurrentes desde conexiones keep-alive. Informa
+latencia p50 / p99, pedidos y hogares por segundo y el tamaño medio de los
+lotes calculados (los micro-lotes de /costo; en /lote, cada pedido); también
+controla que los totales coincidan con costo_crianza.
+
+Uso:
+    python bench/carga_servicio.py [--pedidos 20000] [--concurrencia 64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from dobles import ServidorDobles  # noqa: E402
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def hogar_aleatorio(rng):
+    return [float(rng.randint(0, 17)) for _ in range(rng.randint(1, 4))]
+
+
+class Conexion:
+    """
+    Cliente HTTP/1.1 keep-alive mínimo para JSON.
+    """
+
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self.reader = self.writer = None
+
+    async def abrir(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.puerto)
+        return self
+
+    async def pedir(self, metodo, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+        self.writer.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n".encode("latin-1")
+            + datos
+        )
+        await self.writer.drain()
+
+        estado = int((await self.reader.readline()).split()[1])
+        largo = 0
+        while True:
+            linea = await self.reader.readline()
+            if linea in (b"\r\n", b""):
+                break
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            if clave.lower() == "content-length":
+                largo = int(valor)
+        return estado, json.loads(await self.reader.readexactly(largo))
+
+    def cerrar(self):
+        self.writer.close()
+
+
+async def escenario(host, puerto, ruta, armar, pedidos, concurrencia, semilla=0):
+    """
+    `pedidos` pedidos repartidos en `concurrencia` conexiones. Devuelve
+    latencias (s), duración total, hogares enviados y una muestra de
+    (pedido, respuesta) para controlar.
+    """
+    rng = random.Random(semilla)
+    cuerpos = [armar(rng) for _ in range(pedidos)]
+    latencias = []
+    muestra = []
+    siguiente = iter(range(pedidos))
+
+    async def trabajador():
+        con = await Conexion(host, puerto).abrir()
+        try:
+            for i in siguiente:
+                t0 = time.perf_counter()
+                estado, respuesta = await con.pedir("POST", ruta, cuerpos[i])
+                latencias.append(time.perf_counter() - t0)
+                if estado != 200:
+                    raise RuntimeError(f"{ruta}: HTTP {estado} {respuesta}")
+                if len(muestra) < 200:
+                    muestra.append((cuerpos[i], respuesta))
+        finally:
+            con.cerrar()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - t0
+    hogares = sum(len(c.get("hogares", [None])) for c in cuerpos)
+    return np.array(latencias), duracion, hogares, muestra
+
+
+def controlar(muestra):
+    """
+    Compara totales y detalle con costo_crianza para los datos informados.
+    """
+    from crianza import costo_crianza
+
+    for cuerpo, respuesta in muestra:
+        d = respuesta["datos"]
+        hogares = cuerpo.get("hogares") or [cuerpo["edades"]]
+        resultados = respuesta.get("resultados") or [respuesta]
+        for edades, r in zip(hogares, resultados):
+            total, detalle = costo_crianza(edades, d["cba_gba"], d["valor_hora"], d["salario_mensual"])
+            assert r["total"] == total, (edades, r["total"], total)
+            assert [x["Costo ajustado"] for x in r["detalle"]] == [x["Costo ajustado"] for x in detalle]
+
+
+async def estado_servicio(host, puerto, espera=60):
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            con = await Conexion(host, puerto).abrir()
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            await asyncio.sleep(0.1)
+            continue
+        try:
+            return (await con.pedir("GET", "/salud"))[1]
+        finally:
+            con.cerrar()
+
+
+def arrancar_servicio(dobles, puerto, extra=()):
+    entorno = dict(os.environ, CRIANZA_ORIGEN=dobles.base,
+                   CRIANZA_CACHE_DIR=tempfile.mkdtemp(prefix="crianza-carga-"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "crianza.servicio", "--puerto", str(puerto), *extra],
+        cwd=RAIZ, env=entorno, stderr=subprocess.DEVNULL,
+    )
+
+
+def informar(nombre, latencias, duracion, pedidos, hogares, lotes):
+    ms = latencias * 1000
+    print(
+        f"{nombre:<32} {pedidos:>7} pedidos  {pedidos / duracion:9.0f} ped/s  "
+        f"{hogares / duracion:10.0f} hog/s  p50 {np.percentile(ms, 50):7.2f} ms  "
+        f"p99 {np.percentile(ms, 99):7.2f} ms  {lotes:7.1f} hog/lote"
+    )
+
+
+async def correr(args, dobles, nombre, extra):
+    host, puerto = "127.0.0.1", puerto_libre()
+    proceso = arrancar_servicio(dobles, puerto, extra)
+    try:
+        await estado_servicio(host, puerto)
+
+        escenarios = [
+            ("/costo", lambda rng: {"edades": hogar_aleatorio(rng)}, args.pedidos, args.concurrencia),
+            ("/lote", lambda rng: {"hogares": [hogar_aleatorio(rng) for _ in range(args.hogares_lote)]},
+             max(args.pedidos // 40, 1), max(args.concurrencia // 8, 1)),
+        ]
+        for ruta, armar, pedidos, concurrencia in escenarios:
+            antes = await estado_servicio(host, puerto)
+            latencias, duracion, hogares, muestra = await escenario(
+                host, puerto, ruta, armar, pedidos, concurrencia
+            )
+            despues = await estado_servicio(host, puerto)
+            controlar(muestra)
+            if ruta == "/lote":
+                por_lote = args.hogares_lote  # no pasa por los micro-lotes
+            else:
+                lotes = max(despues["lotes"] - antes["lotes"], 1)
+                por_lote = (despues["hogares"] - antes["hogares"]) / lotes
+            informar(f"{nombre} {ruta} (c={concurrencia})", latencias, duracion,
+                     pedidos, hogares, por_lote)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de crianza.")
+    parser.add_argument("--pedidos", type=int, default=20000, help="pedidos a /costo")
+    parser.add_argument("--concurrencia", type=int, default=64, help="conexiones simultáneas")
+    parser.add_argument("--hogares-lote", type=int, default=100, help="hogares por pedido a /lote")
+    parser.add_argument("--sin-comparar", action="store_true",
+                        help="no medir también el servicio sin micro-lotes")
+    args = parser.parse_args(argv)
+
+    dobles = ServidorDobles().iniciar()
+    try:
+        asyncio.run(correr(args, dobles, "micro-lotes", []))
+        if not args.sin_comparar:
+            asyncio.run(correr(args, dobles, "sin micro-lotes", ["--espera-lote", "0", "--max-lote", "1"]))
+    finally:
+        dobles.detener()
+    print(f"pedidos a los dobles: {dobles.pedidos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Servidor local que reemplaza a INDEC y UPACP: sirve los archivos de
+bench/fixtures.py (o los que se le pasen) en las mismas rutas que los
+sitios reales, con ETag y respuestas 304, y cuenta los pedidos.
+
+Los loaders se apuntan acá con el origen "doble" (crianza.origen):
+
+    python bench/dobles.py --puerto 8760
+    CRIANZA_ORIGEN=http://127.0.0.1:8760 streamlit run calculadora_crianza_app.py
+"""
+import argparse
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import fixtures
+
+
+def archivos_sinteticos(meses_crianza=36, meses_cba=120):
+    """
+    {ruta: contenido} con los tres archivos sintéticos.
+    """
+    return {
+        "/ftp/cuadros/sociedad/serie_canasta_crianza.xlsx": fixtures.canasta_crianza_xlsx(meses_crianza),
+        "/ftp/cuadros/sociedad/serie_cba_cbt.xls": fixtures.cba_xls(meses_cba),
+        "/": fixtures.escala_upacp_html(),
+    }
+
+
+class ServidorDobles:
+    """
+    ThreadingHTTPServer en un hilo de fondo. `pedidos` cuenta los GET por
+    ruta y `base` es el valor para configurar_origen / CRIANZA_ORIGEN.
+    `demora` (segundos) retrasa cada respuesta, como un sitio lento.
+    """
+
+    def __init__(self, archivos=None, host="127.0.0.1", puerto=0, demora=0.0):
+        self.archivos = archivos or archivos_sinteticos()
+        self.pedidos = {}
+        self.demora = demora
+        self._lock = threading.Lock()
+        dobles = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                ruta = urlsplit(self.path).path
+                contenido = dobles.archivos.get(ruta)
+                with dobles._lock:
+                    dobles.pedidos[ruta] = dobles.pedidos.get(ruta, 0) + 1
+                time.sleep(dobles.demora)
+                if contenido is None:
+                    self.send_error(404)
+                    return
+
+                etag = '"%s"' % hashlib.sha256(contenido).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", "Wed, 01 Oct 2025 10:00:00 GMT")
+                self.send_header("Content-Length", str(len(contenido)))
+                self.end_headers()
+                self.wfile.write(contenido)
+
+        self.servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        self.servidor.daemon_threads = True
+
+    @property
+    def base(self):
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dobles locales de INDEC y UPACP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8760)
+    args = parser.parse_args(argv)
+
+    dobles = ServidorDobles(host=args.host, puerto=args.puerto)
+    print(f"CRIANZA_ORIGEN={dobles.base}")
+    dobles.servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
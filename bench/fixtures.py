@@ -0,0 +1,168 @@
+"""
+Archivos sintéticos con el mismo formato que las fuentes reales: libro de
+la canasta de crianza INDEC (.xlsx), serie de la CBA (.xls BIFF8, como el
+de INDEC, para que el parseo pase por xlrd) y página de escalas UPACP.
+La cantidad de meses es configurable para probar series largas.
+"""
+import io
+import struct
+from datetime import datetime
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+GRUPOS = ["Menor de 1 año", "1 a 3 años", "4 a 5 años", "6 a 12 años"]
+CATEGORIAS = ["PRIMERA", "SEGUNDA", "TERCERA", "CUARTA", "QUINTA"]
+
+
+def _guardar(libro):
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+
+def canasta_crianza_xlsx(meses=36, desde=2023):
+    """
+    serie_canasta_crianza.xlsx: títulos, cuatro filas de encabezado con
+    celdas combinadas y una fila por mes (el año sólo en enero).
+    """
+    import openpyxl
+
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(["Canasta de crianza"])
+    hoja.append([None])
+
+    encabezado = [["Año", "Mes"], [None, None], [None, None], [None, None]]
+    for g in GRUPOS:
+        encabezado[0] += ["Costo mensual", None, None]
+        encabezado[1] += [g, None, None]
+        encabezado[2] += ["Componentes", None, "Total"]
+        encabezado[3] += ["Bienes y servicios", "Cuidado", None]
+    for fila in encabezado:
+        hoja.append(fila)
+
+    for i in range(meses):
+        mes = i % 12
+        fila = [desde + i // 12 if mes == 0 else None, MESES[mes]]
+        for k in range(len(GRUPOS)):
+            bys = 100000 + 1000 * i + k * 7000.5
+            tc = 150000 + 900 * i + k * 3000.25
+            fila += [bys, tc, bys + tc]
+        hoja.append(fila)
+    hoja.append(["Fuente: INDEC"])
+    return _guardar(libro)
+
+
+def _registro(tipo, datos=b""):
+    return struct.pack("<HH", tipo, len(datos)) + datos
+
+
+def _texto_biff(texto, largo="<H"):
+    """
+    Cadena BIFF8: largo, opciones (0 = latin-1 comprimido, 1 = UTF-16) y caracteres.
+    """
+    try:
+        return struct.pack(largo + "B", len(texto), 0) + texto.encode("latin-1")
+    except UnicodeEncodeError:
+        return struct.pack(largo + "B", len(texto), 1) + texto.encode("utf-16-le")
+
+
+def _libro_biff8(filas):
+    """
+    Flujo Workbook BIFF8 con una hoja: números, textos (tabla SST) y fechas
+    (números con el formato de fecha estándar 14, como los guarda Excel).
+    """
+    textos, celdas = {}, []
+    for r, fila in enumerate(filas):
+        for c, v in enumerate(fila):
+            if v is None:
+                continue
+            if isinstance(v, str):
+                indice = textos.setdefault(v, len(textos))
+                celdas.append(_registro(0x00FD, struct.pack("<HHHI", r, c, 15, indice)))
+            elif isinstance(v, datetime):
+                serial = (v - datetime(1899, 12, 30)).total_seconds() / 86400
+                celdas.append(_registro(0x0203, struct.pack("<HHHd", r, c, 16, serial)))
+            else:
+                celdas.append(_registro(0x0203, struct.pack("<HHHd", r, c, 15, float(v))))
+
+    sst = struct.pack("<II", len(textos), len(textos)) + b"".join(map(_texto_biff, textos))
+    assert len(sst) <= 8224, "la tabla de textos no entra en un solo registro SST"
+
+    # XF 0-14 de estilo y 15-16 de celda (general y fecha), como Excel
+    xf_estilo = struct.pack("<HHHBBBBIIH", 0, 0, 0xFFF5, 0x20, 0, 0, 0, 0, 0, 0x20C0)
+    xf_celda = [struct.pack("<HHHBBBBIIH", 0, fmt, 0x0001, 0x20, 0, 0, 0, 0, 0, 0x20C0) for fmt in (0, 14)]
+    fuente = struct.pack("<HHHHHBBBB", 200, 0, 0x7FFF, 400, 0, 0, 0, 0, 0) + _texto_biff("Arial", "<B")
+    bof = struct.pack("<HHHHII", 0x0600, 0x0005, 0x0DBB, 0x07CC, 0, 0x06)
+    hoja = (_registro(0x0809, struct.pack("<HHHHII", 0x0600, 0x0010, 0x0DBB, 0x07CC, 0, 0x06))
+            + _registro(0x0200, struct.pack("<IIHHH", 0, len(filas), 0, max(map(len, filas)), 0))
+            + b"".join(celdas) + _registro(0x000A))
+
+    def globales(desplazamiento):
+        return (_registro(0x0809, bof) + _registro(0x0042, struct.pack("<H", 1200))
+                + _registro(0x0022, struct.pack("<H", 0)) + _registro(0x0031, fuente) * 5
+                + b"".join(_registro(0x00E0, x) for x in [xf_estilo] * 15 + xf_celda)
+                + _registro(0x0085, struct.pack("<IBB", desplazamiento, 0, 0) + _texto_biff("Hoja1", "<B"))
+                + _registro(0x00FC, sst) + _registro(0x000A))
+
+    # la hoja empieza donde terminan los globales, que tienen largo fijo
+    return globales(len(globales(0))) + hoja
+
+
+def _documento_ole2(flujo, nombre="Workbook"):
+    """
+    Documento compuesto OLE2 (versión 3, sectores de 512 bytes) con un solo
+    flujo: el contenedor de los .xls.
+    """
+    fin, libre, sector_fat = 0xFFFFFFFE, 0xFFFFFFFF, 0xFFFFFFFD
+    flujo = flujo.ljust(4096, b"\0")  # menos de 4096 bytes iría al mini flujo
+    flujo += b"\0" * (-len(flujo) % 512)
+    n_datos = len(flujo) // 512
+    n_fat = 1
+    while n_datos + 1 + n_fat > 128 * n_fat:
+        n_fat += 1
+
+    # sectores: datos del flujo, directorio y FAT
+    fat = list(range(1, n_datos)) + [fin, fin] + [sector_fat] * n_fat
+    fat += [libre] * (128 * n_fat - len(fat))
+
+    def entrada(nombre, tipo, hijo, inicio, tamanio):
+        n = nombre.encode("utf-16-le") + b"\0\0" if nombre else b""
+        return (n.ljust(64, b"\0") + struct.pack("<HBBIII", len(n), tipo, 1, libre, libre, hijo)
+                + b"\0" * 36 + struct.pack("<III", inicio, tamanio, 0))
+
+    directorio = (entrada("Root Entry", 5, 1, fin, 0) + entrada(nombre, 2, libre, 0, len(flujo))
+                  + entrada("", 0, libre, 0, 0) * 2)
+    sectores_fat = list(range(n_datos + 1, n_datos + 1 + n_fat))
+    cabecera = (bytes.fromhex("D0CF11E0A1B11AE1") + b"\0" * 16
+                + struct.pack("<HHHHH6x", 0x3E, 3, 0xFFFE, 9, 6)
+                + struct.pack("<9I", 0, n_fat, n_datos, 0, 4096, fin, 0, fin, 0)
+                + struct.pack("<109I", *sectores_fat + [libre] * (109 - n_fat)))
+    return cabecera + flujo + directorio + struct.pack(f"<{len(fat)}I", *fat)
+
+
+def cba_xls(meses=120, desde=2016):
+    """
+    serie_cba_cbt.xls: libro BIFF8 con cinco filas de títulos, encabezado y
+    una fila por mes con la fecha en la primera columna.
+    """
+    filas = [["Canasta básica alimentaria y canasta básica total"]] * 5
+    filas.append(["Fecha", "CBA GBA", "CBT GBA"])
+    for i in range(meses):
+        fecha = datetime(desde + i // 12, i % 12 + 1, 1)
+        filas.append([fecha, 5000 + 1234.5 * i, 12000 + 2000.0 * i])
+    return _documento_ole2(_libro_biff8(filas))
+
+
+def escala_upacp_html(relleno=5000):
+    """
+    Página de escalas salariales UPACP con las cinco categorías, con y sin
+    retiro, seguida de `relleno` caracteres que el lector no necesita leer.
+    """
+    partes = ["<html><body><div class='menu'>Inicio</div><h2>Escalas salariales</h2>"]
+    for i, c in enumerate(CATEGORIAS):
+        partes.append(f"<h3>{c} CATEGORIA – TAREAS</h3>")
+        partes.append(f"<p><b>CON RETIRO</b> Hora: ${3 + i}.{100 + i * 37},50 Mensual: ${400 + i}.123,45</p>")
+        partes.append(f"<p><b>SIN RETIRO</b> Hora: ${3 + i}.{400 + i * 37},75 Mensual: ${450 + i}.678,90</p>")
+    partes.append("<footer>" + "x" * relleno + "</footer></body></html>")
+    return "".join(partes).encode("utf-8")
@@ -0,0 +1,132 @@
+"""
+Memoria por sesión de la app: lo que queda en st.session_state después de
+calcular un hogar, con el esquema anterior (un dict por sesión con la
+canasta INDEC, el detalle, la comparación en un DataFrame y la
+trazabilidad) y con el actual (id de la versión de datos y un
+ResultadoHogar; los datos de la versión se guardan una vez por proceso).
+
+Arma los datos con el Refrescador contra los dobles locales de INDEC y
+UPACP, crea muchas sesiones con hogares al azar y mide con tracemalloc la
+memoria que retienen.
+
+Uso:
+    python bench/memoria_sesion.py [--sesiones 2000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ), str(RAIZ / "bench")]
+os.environ.setdefault("CRIANZA_CACHE_DIR", tempfile.mkdtemp(prefix="crianza-memoria-"))
+
+import pandas as pd  # noqa: E402
+
+from dobles import ServidorDobles  # noqa: E402
+
+
+def sesion_anterior(datos, edades):
+    """
+    st.session_state.result como lo guardaba la app antes de este cambio.
+    """
+    from crianza import (URL_INDEC_CBA, URL_INDEC_CRIANZA, comparacion_indec,
+                         costos_individuales_por_grupo, get_remote_version, origen_datos)
+
+    fecha_cba, cba_gba = datos["valores"]["cba"]
+    valor_hora, salario_mensual = datos["valores"]["upacp"]
+    total, detalle = datos["tabla"].consultar(edades)
+    indec = datos["valores"]["crianza"]
+    costos_pba = costos_individuales_por_grupo(cba_gba, valor_hora, salario_mensual)
+    filas = comparacion_indec(edades, indec, costos_pba)
+    return {
+        "calc_done": True,
+        "result": {
+            "fecha_cba": fecha_cba,
+            "cba_gba": cba_gba,
+            "valor_hora": valor_hora,
+            "salario_mensual": salario_mensual,
+            "total": total,
+            "detalle": detalle,
+            "indec": indec,
+            "base": pd.DataFrame(filas) if filas else pd.DataFrame(),
+            "ts_descarga": datos["ts"],
+            "v_crianza": get_remote_version(URL_INDEC_CRIANZA),
+            "v_cba": get_remote_version(URL_INDEC_CBA),
+            "tiempos": datos["tiempos"],
+            "origen": origen_datos().descripcion(),
+            "vencidas": datos["vencidas"],
+        },
+    }
+
+
+def sesion_actual(datos, edades):
+    """
+    Lo que guarda la app ahora en st.session_state.
+    """
+    from calculadora_crianza_app import version_sesion
+
+    return {
+        "calc_done": True,
+        "version": version_sesion(datos),
+        "hogar": datos["tabla"].resultado(edades),
+    }
+
+
+def medir(crear, datos, hogares):
+    """
+    (bytes retenidos por todas las sesiones, pico de memoria durante el cálculo).
+    """
+    gc.collect()
+    tracemalloc.start()
+    sesiones = [crear(datos, edades) for edades in hogares]
+    gc.collect()
+    retenidos, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sesiones
+    return retenidos, pico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sesiones", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    dobles = ServidorDobles().iniciar()
+    try:
+        from crianza import Refrescador, configurar_origen
+
+        configurar_origen(dobles.base)
+        datos = Refrescador().datos()
+
+        azar = random.Random(1)
+        hogares = [[float(azar.randint(0, 17)) for _ in range(azar.randint(1, 4))]
+                   for _ in range(args.sesiones)]
+
+        # una pasada de cada esquema antes de medir (imports y cachés del proceso)
+        sesion_anterior(datos, hogares[0])
+        sesion_actual(datos, hogares[0])
+
+        print(f"{args.sesiones} sesiones, una versión de datos\n")
+        print(f"{'esquema':<10} {'por sesión':>12} {'total':>10} {'pico':>10}")
+        for nombre, crear in (("anterior", sesion_anterior), ("actual", sesion_actual)):
+            retenidos, pico = medir(crear, datos, hogares)
+            print(f"{nombre:<10} {retenidos / args.sesiones:10,.0f} B "
+                  f"{retenidos / 2**20:7.2f} MB {pico / 2**20:7.2f} MB")
+
+        # datos de la versión: una sola vez por proceso
+        from calculadora_crianza_app import version_sesion, versiones
+
+        versiones().clear()
+        retenidos, _ = medir(lambda d, _: version_sesion(d), datos, [None])
+        print(f"\ndatos de la versión (una vez por proceso): {retenidos:,.0f} B")
+    finally:
+        dobles.detener()
+
+
+if __name__ == "__main__":
+    main()
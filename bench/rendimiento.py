@@ -0,0 +1,434 @@
+"""
+Suite de rendimiento por etapa: descarga, parseo, cálculo y armado de las
+tablas de resultados.
+
+Usa las copias grabadas de las fuentes (bench/grabaciones/, un espejo de
+crianza.origen que se crea con --grabar) o, si no están, los archivos
+sintéticos de bench/fixtures.py, servidos por los dobles locales de INDEC y
+UPACP. Los sintéticos tienen el mismo formato que los reales (la CBA es un
+.xls BIFF8), así que el parseo pasa por las mismas ramas: openpyxl para la
+canasta de crianza y xlrd para la CBA. Además mide series
+sintéticas de varias décadas de meses y lotes de hasta millones de hogares.
+
+Por cada etapa informa la mediana del tiempo y el pico de memoria
+(tracemalloc) y los compara con la línea de base guardada: si alguna etapa
+empeora más que la tolerancia, termina con código 1.
+
+Uso:
+    python bench/rendimiento.py                  # medir y comparar
+    python bench/rendimiento.py --guardar        # medir y guardar como línea de base
+    python bench/rendimiento.py --grabar         # sincronizar el espejo con las fuentes reales
+    python bench/rendimiento.py --filtro parseo  # sólo las etapas que contienen "parseo"
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+GRABACIONES = Path(__file__).resolve().parent / "grabaciones"
+LINEA_BASE = Path(__file__).resolve().parent / "linea_base.json"
+
+# caché propia: la suite no toca la del usuario
+os.environ["CRIANZA_CACHE_DIR"] = tempfile.mkdtemp(prefix="crianza-rendimiento-")
+sys.path.insert(0, str(RAIZ))
+
+import fixtures  # noqa: E402
+from dobles import ServidorDobles, archivos_sinteticos  # noqa: E402
+MESES_LARGA = 50 * 12   # serie sintética de 50 años
+TOLERANCIA = 1.5        # empeoramiento admitido (x veces la línea de base)
+PISO_SEG = 0.002        # diferencias menores a esto son ruido
+PISO_MB = 1.0
+
+ETAPAS = []
+
+
+def etapa(nombre, repeticiones=5):
+    """
+    Registra una etapa. La función recibe el contexto y devuelve lo que hay
+    que medir (una función sin argumentos); la preparación no se mide.
+    """
+    def registrar(preparar):
+        ETAPAS.append((nombre, preparar, repeticiones))
+        return preparar
+    return registrar
+
+
+def medir(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seg": statistics.median(tiempos), "pico_mb": pico / 2**20}
+
+
+# ------------------------------------------------------------
+# 1. DESCARGA
+# ------------------------------------------------------------
+def _descarga_fria(clave):
+    def preparar(ctx):
+        from crianza import CacheHTTP
+
+        url = ctx["urls"][clave]
+        raiz = Path(tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"]))
+        contador = iter(range(10**6))
+        return lambda: CacheHTTP(raiz / str(next(contador))).obtener(url)
+    return preparar
+
+
+etapa("descarga/crianza (fría)")(_descarga_fria("crianza"))
+etapa("descarga/cba (fría)")(_descarga_fria("cba"))
+etapa("descarga/upacp (fría)")(_descarga_fria("upacp"))
+
+
+@etapa("descarga/revalidación 304 (3 fuentes)")
+def _(ctx):
+    from crianza import CacheHTTP
+
+    cache = CacheHTTP(tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"]))
+    for url in ctx["urls"].values():
+        cache.obtener(url)
+    return lambda: [cache.obtener(url) for url in ctx["urls"].values()]
+
+
+@etapa("descarga/espejo (fría, 3 fuentes)")
+def _(ctx):
+    from crianza import CacheHTTP, configurar_origen, sincronizar
+
+    espejo = tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"])
+    sincronizar(espejo, list(ctx["urls"].values()))
+    raiz = Path(tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"]))
+    contador = iter(range(10**6))
+
+    def leer():
+        anterior = configurar_origen(espejo)
+        try:
+            cache = CacheHTTP(raiz / str(next(contador)))
+            return [cache.obtener(url) for url in ctx["urls"].values()]
+        finally:
+            configurar_origen(anterior)
+    return leer
+
+
+# ------------------------------------------------------------
+# 2. PARSEO
+# ------------------------------------------------------------
+@etapa("parseo/crianza")
+def _(ctx):
+    from crianza.indec import _serie_canasta_crianza
+    return lambda: _serie_canasta_crianza(ctx["archivos"]["crianza"])
+
+
+@etapa("parseo/cba")
+def _(ctx):
+    from crianza.indec import _serie_cba_gba
+    return lambda: _serie_cba_gba(ctx["archivos"]["cba"])
+
+
+@etapa("parseo/upacp")
+def _(ctx):
+    from crianza import leer_escala_upacp
+    return lambda: leer_escala_upacp(ctx["archivos"]["upacp"])
+
+
+@etapa(f"parseo/crianza sintética {MESES_LARGA // 12} años", repeticiones=3)
+def _(ctx):
+    from crianza.indec import _serie_canasta_crianza
+    contenido = fixtures.canasta_crianza_xlsx(MESES_LARGA, desde=1976)
+    return lambda: _serie_canasta_crianza(contenido)
+
+
+@etapa(f"parseo/cba sintética {MESES_LARGA // 12} años", repeticiones=3)
+def _(ctx):
+    from crianza.indec import _serie_cba_gba
+    contenido = fixtures.cba_xls(MESES_LARGA, desde=1976)
+    return lambda: _serie_cba_gba(contenido)
+
+
+@etapa(f"parseo/crianza {MESES_LARGA // 12} años + 1 mes (incremental)", repeticiones=3)
+def _(ctx):
+    from crianza.indec import _convertir_canasta_crianza, _filas_canasta_crianza
+    from crianza.snapshots import SeriesIncrementales
+
+    store = SeriesIncrementales(tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"]), conservar=10**6)
+    previa = fixtures.canasta_crianza_xlsx(MESES_LARGA, desde=1976)
+    nueva = fixtures.canasta_crianza_xlsx(MESES_LARGA + 1, desde=1976)
+    store.obtener("crianza", "previa", lambda: _filas_canasta_crianza(previa), _convertir_canasta_crianza)
+    contador = iter(range(10**6))
+
+    def correr():
+        # cada corrida parte de la versión previa y agrega el mes nuevo
+        store._ruta_vigente("crianza").write_text(json.dumps({"version": "previa"}), encoding="utf-8")
+        return store.obtener(
+            "crianza", f"nueva-{next(contador)}",
+            lambda: _filas_canasta_crianza(nueva), _convertir_canasta_crianza,
+        )
+    return correr
+
+
+# ------------------------------------------------------------
+# 3. LOADERS (caché caliente: revalidación 304 + snapshot)
+# ------------------------------------------------------------
+def _loader(modulo, nombre, cache):
+    def preparar(ctx):
+        mod = importlib.import_module(f"crianza.{modulo}")
+        fn = getattr(mod, nombre)
+        fn()
+
+        def correr():
+            getattr(mod, cache).cache_clear()  # sin esto sólo se mediría el lru_cache
+            return fn()
+        return correr
+    return preparar
+
+
+etapa("loader/obtener_canasta_crianza_indec")(
+    _loader("indec", "obtener_canasta_crianza_indec", "_parsear_canasta_crianza")
+)
+etapa("loader/obtener_cba_gba_indec")(_loader("indec", "obtener_cba_gba_indec", "_parsear_cba_gba"))
+etapa("loader/obtener_upacp")(_loader("upacp", "obtener_upacp", "escala_upacp"))
+
+
+@etapa(f"historico/SerieHistorica {MESES_LARGA // 12} años")
+def _(ctx):
+    from crianza import SerieHistorica
+    from crianza.indec import _serie_canasta_crianza, _serie_cba_gba
+
+    cba = _serie_cba_gba(fixtures.cba_xls(MESES_LARGA, desde=1976))
+    crianza = _serie_canasta_crianza(fixtures.canasta_crianza_xlsx(MESES_LARGA, desde=1976))
+    return lambda: SerieHistorica(cba, crianza, *ctx["upacp"])
+
+
+# ------------------------------------------------------------
+# 4. CÁLCULO
+# ------------------------------------------------------------
+@etapa("calculo/costo_crianza x10.000 hogares")
+def _(ctx):
+    from crianza import costo_crianza
+
+    hogares = [[e for e in fila if e == e] for fila in ctx["hogares"][:10_000].tolist()]
+    return lambda: [costo_crianza(h, ctx["cba_gba"], *ctx["upacp"]) for h in hogares]
+
+
+@etapa("calculo/costo_crianza_lote (caseload)", repeticiones=3)
+def _(ctx):
+    from crianza import costo_crianza_lote
+    return lambda: costo_crianza_lote(ctx["hogares"], ctx["cba_gba"], *ctx["upacp"])
+
+
+@etapa("calculo/TablaComposiciones (armado)")
+def _(ctx):
+    from crianza import TablaComposiciones
+    return lambda: TablaComposiciones(ctx["cba_gba"], *ctx["upacp"])
+
+
+@etapa("calculo/TablaComposiciones.totales (caseload)", repeticiones=3)
+def _(ctx):
+    from crianza import TablaComposiciones
+
+    tabla = TablaComposiciones(ctx["cba_gba"], *ctx["upacp"])
+    return lambda: tabla.totales(ctx["hogares"])
+
+
+@etapa("calculo/Barrido 100.000 escenarios a Parquet", repeticiones=3)
+def _(ctx):
+    from crianza.escenarios import Barrido
+
+    hora, mensual = ctx["upacp"]
+    barrido = Barrido(
+        {"icg": np.linspace(2.5, 4, 50), "ae": np.linspace(1.4, 2, 20),
+         "hora_upacp": np.linspace(0.8, 1.2, 10) * hora, "factores": [[1, 0.7, 0.5], [1, 0.8, 0.6, 0.4]],
+         "escala_bienes.6-11": [0.5, 0.577, 0.65, 0.7, 0.75]},
+        {"cba_gba": ctx["cba_gba"], "hora_upacp": hora, "mensual_upacp": mensual},
+    )
+    ruta = os.path.join(tempfile.mkdtemp(dir=os.environ["CRIANZA_CACHE_DIR"]), "escenarios.parquet")
+    return lambda: barrido.a_parquet(ruta)
+
+
+@etapa("calculo/Atrasos 5.000 casos x 6 años", repeticiones=3)
+def _(ctx):
+    from crianza import SerieHistorica
+    from crianza.atrasos import LineasDeTiempo, meses_entre, valores_por_mes
+    from crianza.indec import _serie_canasta_crianza, _serie_cba_gba
+
+    serie = SerieHistorica(_serie_cba_gba(fixtures.cba_xls(120, desde=2016)),
+                           _serie_canasta_crianza(fixtures.canasta_crianza_xlsx(120, desde=2016)),
+                           *ctx["upacp"])
+    valores = valores_por_mes(meses_entre("2016-01", "2025-12"), serie, *ctx["upacp"])
+    rng = np.random.default_rng(0)
+    nacimientos = np.datetime64("2000-01-01") + rng.integers(0, 25 * 365, (5000, 4))
+    inicios = np.datetime64("2016-01") + rng.integers(0, 48, 5000)
+    casos = [
+        {"nacimientos": n[:rng.integers(1, 5)].astype(str), "desde": d, "hasta": d + 71}
+        for n, d in zip(nacimientos, inicios)
+    ]
+    return lambda: LineasDeTiempo(casos, valores)
+
+
+# ------------------------------------------------------------
+# 5. TABLAS DE RESULTADOS
+# ------------------------------------------------------------
+@etapa("render/tabla_detalle (10 niños)")
+def _(ctx):
+    from calculadora_crianza_app import tabla_detalle
+    from crianza import costo_crianza
+
+    _, detalle = costo_crianza([0, 1, 2, 4, 5, 6, 9, 12, 15, 17], ctx["cba_gba"], *ctx["upacp"])
+    return lambda: tabla_detalle(detalle)
+
+
+@etapa("render/tabla_comparacion (5 tramos)")
+def _(ctx):
+    import pandas as pd
+
+    from calculadora_crianza_app import tabla_comparacion
+    from crianza import comparacion_indec, costos_individuales_por_grupo, obtener_canasta_crianza_indec
+
+    costos_pba = costos_individuales_por_grupo(ctx["cba_gba"], *ctx["upacp"])
+    base = pd.DataFrame(comparacion_indec([0, 2, 4, 8, 14], obtener_canasta_crianza_indec(), costos_pba))
+    return lambda: tabla_comparacion(base, "INDEC_Total", "PBA_Total")
+
+
+# ------------------------------------------------------------
+# 6. EJECUCIÓN Y COMPARACIÓN
+# ------------------------------------------------------------
+def urls_fuentes():
+    from crianza import URL_INDEC_CBA, URL_INDEC_CRIANZA, URL_UPACP
+
+    return {"crianza": URL_INDEC_CRIANZA, "cba": URL_INDEC_CBA, "upacp": URL_UPACP}
+
+
+def grabar():
+    """
+    Sincroniza bench/grabaciones/ (un espejo) con las fuentes reales.
+    """
+    from crianza import configurar_origen, sincronizar
+
+    configurar_origen("vivo")
+    for url, meta in sincronizar(GRABACIONES).items():
+        print(f"{url} -> {GRABACIONES / meta['archivo']}")
+
+
+def archivos_fuente():
+    """
+    (origen, {ruta: contenido}): las grabaciones si están completas, si no
+    los archivos sintéticos. Las rutas son las de los sitios reales.
+    """
+    from crianza import Origen
+
+    espejo = Origen("espejo", str(GRABACIONES))
+    urls = urls_fuentes().values()
+    if all(url in espejo.manifiesto() for url in urls):
+        return "grabados", {urlsplit(url).path: Path(espejo.ruta(url)).read_bytes() for url in urls}
+    return "sintéticos", archivos_sinteticos()
+
+
+def hogares_sinteticos(n, semilla=0):
+    """
+    Matriz n x 4 de edades (0 a 17, NaN de relleno) con 1 a 4 niños/as.
+    """
+    rng = np.random.default_rng(semilla)
+    edades = rng.integers(0, 18, size=(n, 4)).astype("float64")
+    edades[np.arange(4) >= rng.integers(1, 5, size=n)[:, None]] = np.nan
+    return edades
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Imprime la tabla de resultados y devuelve las etapas que empeoraron.
+    """
+    empeoradas = []
+    print(f"{'etapa':<48} {'tiempo':>11} {'vs base':>8} {'pico':>10} {'vs base':>8}")
+    for nombre, r in resultados.items():
+        b = base.get(nombre)
+        linea = f"{nombre:<48} {r['seg'] * 1000:8.2f} ms"
+        if b is None:
+            print(linea + f" {'—':>8} {r['pico_mb']:7.2f} MB {'—':>8}")
+            continue
+        dt = r["seg"] / b["seg"] if b["seg"] else 1.0
+        dm = r["pico_mb"] / b["pico_mb"] if b["pico_mb"] else 1.0
+        peor_t = dt > tolerancia and r["seg"] - b["seg"] > PISO_SEG
+        peor_m = dm > tolerancia and r["pico_mb"] - b["pico_mb"] > PISO_MB
+        print(linea + f" {dt:7.2f}x{'!' if peor_t else ' '}{r['pico_mb']:7.2f} MB {dm:7.2f}x{'!' if peor_m else ''}")
+        if peor_t or peor_m:
+            empeoradas.append(nombre)
+    return empeoradas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento por etapa.")
+    parser.add_argument("--guardar", action="store_true", help="guardar los resultados como línea de base")
+    parser.add_argument("--grabar", action="store_true", help="descargar copias de las fuentes reales")
+    parser.add_argument("--filtro", default="", help="sólo etapas cuyo nombre contenga este texto")
+    parser.add_argument("--hogares", type=int, default=1_000_000, help="tamaño del caseload sintético")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--base", type=Path, default=LINEA_BASE)
+    args = parser.parse_args(argv)
+
+    if args.grabar:
+        grabar()
+        return
+
+    origen, archivos = archivos_fuente()
+    dobles = ServidorDobles(archivos).iniciar()
+
+    from crianza import configurar_origen, obtener_cba_gba_indec, obtener_upacp
+
+    configurar_origen(dobles.base)
+    urls = urls_fuentes()
+    ctx = {
+        "archivos": {nombre: archivos[urlsplit(url).path] for nombre, url in urls.items()},
+        "urls": urls,
+        "cba_gba": obtener_cba_gba_indec()[1],
+        "upacp": obtener_upacp(),
+        "hogares": hogares_sinteticos(args.hogares),
+    }
+    meta = {"origen": origen, "hogares": args.hogares,
+            "python": platform.python_version(), "maquina": platform.machine()}
+    print(f"archivos {origen}, caseload de {args.hogares} hogares\n")
+
+    resultados = {}
+    try:
+        for nombre, preparar, repeticiones in ETAPAS:
+            if args.filtro in nombre:
+                resultados[nombre] = medir(preparar(ctx), repeticiones)
+    finally:
+        dobles.detener()
+
+    guardada = json.loads(args.base.read_text(encoding="utf-8")) if args.base.exists() else None
+    if guardada and guardada["meta"] != meta:
+        print(f"aviso: la línea de base se tomó con {guardada['meta']}\n")
+    empeoradas = comparar(resultados, guardada["etapas"] if guardada else {}, args.tolerancia)
+
+    if args.guardar:
+        etapas = dict(guardada["etapas"]) if guardada and args.filtro else {}
+        etapas.update(resultados)
+        args.base.write_text(
+            json.dumps({"meta": meta, "etapas": etapas}, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"\nlínea de base guardada en {args.base}")
+    elif empeoradas:
+        print(f"\n{len(empeoradas)} etapa(s) empeoraron más de {args.tolerancia}x: {', '.join(empeoradas)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Prueba del vuelo único: muchas sesiones simultáneas (hilos en varios
+procesos que comparten la caché) piden las tres fuentes a la vez contra
+los dobles locales de INDEC y UPACP. La mitad de las sesiones pide UPACP
+con obtener_upacp y la otra mitad con obtener_escala_upacp.
+
+Corre dos rondas, cada una con procesos nuevos:
+
+    fría     caché vacía: una sola descarga por archivo
+    vencida  caché llena, como al vencer el intervalo de refresco: una sola
+             revalidación (304) por archivo
+
+y, para comparar, las mismas rondas llamando a los loaders sin coordinar.
+Termina con código 1 si con vuelo único algún archivo se pidió más de una
+vez en una ronda o si las sesiones no recibieron todas el mismo valor.
+
+Uso:
+    python bench/vuelo_unico.py [--procesos 4] [--sesiones 16] [--demora 0.3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from dobles import ServidorDobles  # noqa: E402
+
+
+def sesiones(n, inicio, coordinar):
+    """
+    (proceso hijo) `n` hilos que arrancan juntos en `inicio` y llaman a los
+    tres loaders. Imprime los valores obtenidos y los roles del vuelo.
+    """
+    from crianza import FUENTES, obtener_escala_upacp, valores_upacp
+    from crianza.metricas import registro
+
+    escala = obtener_escala_upacp
+    if not coordinar:
+        # saltea el vuelo único: cronometrar(vuelos.unico(fn))
+        fuentes = {nombre: fn.__wrapped__.__wrapped__ for nombre, fn in FUENTES.items() if nombre != "upacp"}
+        escala = escala.__wrapped__.__wrapped__
+    else:
+        fuentes = dict(FUENTES)
+    # la mitad de las sesiones pide la escala completa (obtener_escala_upacp)
+    # y la otra mitad obtener_upacp: las dos piden la misma página
+    con_escala = dict(fuentes, upacp=lambda: valores_upacp(escala()))
+    if not coordinar:
+        fuentes = con_escala
+
+    valores, errores = [], []
+
+    def sesion(fuentes):
+        try:
+            valores.append(repr({nombre: fn() for nombre, fn in fuentes.items()}))
+        except Exception as e:
+            errores.append(f"{type(e).__name__}: {e}")
+
+    hilos = [threading.Thread(target=sesion, args=(con_escala if i % 2 else fuentes,)) for i in range(n)]
+    time.sleep(max(inicio - time.time(), 0))
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    roles = {}
+    for linea in registro.prometheus().splitlines():
+        if linea.startswith("crianza_vuelo_total{"):
+            rol = linea.split('rol="')[1].split('"')[0]
+            roles[rol] = roles.get(rol, 0) + int(linea.rsplit(" ", 1)[1])
+    print(json.dumps({"valores": sorted(set(valores)), "errores": errores, "roles": roles}))
+
+
+def ronda(dobles, cache, args, coordinar):
+    antes = dict(dobles.pedidos)
+    inicio = time.time() + 3  # los procesos terminan de importar antes de arrancar
+    entorno = dict(os.environ, CRIANZA_ORIGEN=dobles.base, CRIANZA_CACHE_DIR=cache)
+    procesos = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--hijo", str(args.sesiones), str(inicio),
+             "1" if coordinar else "0"],
+            cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(args.procesos)
+    ]
+    salidas = [json.loads(p.communicate()[0]) for p in procesos]
+    duracion = time.time() - inicio
+
+    pedidos = {ruta: n - antes.get(ruta, 0) for ruta, n in dobles.pedidos.items()}
+    valores = {v for s in salidas for v in s["valores"]}
+    errores = [e for s in salidas for e in s["errores"]]
+    roles = {}
+    for s in salidas:
+        for rol, n in s["roles"].items():
+            roles[rol] = roles.get(rol, 0) + n
+    return pedidos, valores, errores, roles, duracion
+
+
+def main(argv=None):
+    if argv is None and sys.argv[1:2] == ["--hijo"]:
+        n, inicio, coordinar = sys.argv[2:5]
+        sesiones(int(n), float(inicio), coordinar == "1")
+        return
+
+    parser = argparse.ArgumentParser(description="Prueba del vuelo único de los loaders.")
+    parser.add_argument("--procesos", type=int, default=4, help="procesos (como réplicas de la app)")
+    parser.add_argument("--sesiones", type=int, default=16, help="sesiones simultáneas por proceso")
+    parser.add_argument("--demora", type=float, default=0.3, help="segundos por respuesta del doble")
+    args = parser.parse_args(argv)
+
+    dobles = ServidorDobles(demora=args.demora).iniciar()
+    total = args.procesos * args.sesiones
+    print(f"{args.procesos} procesos x {args.sesiones} sesiones = {total} sesiones simultáneas, "
+          f"doble con {args.demora:.2f} s por respuesta\n")
+    print(f"{'modo':<22} {'ronda':<8} {'pedidos por archivo':<22} {'segundos':>8}  roles")
+
+    ok = True
+    try:
+        for coordinar in (False, True):
+            modo = "vuelo único" if coordinar else "sin coordinar"
+            cache = tempfile.mkdtemp(prefix="crianza-vuelo-")
+            for nombre in ("fría", "vencida"):
+                pedidos, valores, errores, roles, duracion = ronda(dobles, cache, args, coordinar)
+                por_archivo = "/".join(str(n) for n in pedidos.values())
+                print(f"{modo:<22} {nombre:<8} {por_archivo:<22} {duracion:8.2f}  {roles or '-'}")
+                if errores:
+                    print(f"  errores: {errores[:3]}")
+                if coordinar:
+                    ok &= not errores and len(valores) == 1 and max(pedidos.values()) == 1
+    finally:
+        dobles.detener()
+
+    print("\nOK: un pedido por archivo y ronda" if ok else "\nFALLA: hubo pedidos repetidos, errores o valores distintos")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
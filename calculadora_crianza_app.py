@@ -1,24 +1,23 @@
-import requests
+import numpy as np
 import pandas as pd
-from io import BytesIO
-import re
-from bs4 import BeautifulSoup
 import streamlit as st
-from datetime import datetime
-from zoneinfo import ZoneInfo
-
-
-
-import requests
-import pandas as pd
-from io import BytesIO
-import re
-from bs4 import BeautifulSoup
-import streamlit as st
-from datetime import datetime
-from zoneinfo import ZoneInfo
 from email.utils import parsedate_to_datetime
 
+from crianza import (
+    GRUPOS_PBA,
+    TRAMOS_COMPARACION,
+    URL_INDEC_CBA,
+    URL_INDEC_CRIANZA,
+    Refrescador,
+    ResultadoHogar,
+    costos_individuales_por_grupo,
+    detalle_hogar,
+    fila_comparacion,
+    get_remote_version,
+    origen_datos,
+)
+from crianza.metricas import METRICAS_ARCHIVO, METRICAS_PUERTO, registro
+
 def fmt_http_datetime(s):
     if not s:
         return "—"
@@ -38,364 +37,284 @@ def formato_ar(numero):
     return f"{numero:,.0f}".replace(",", "@").replace(".", ",").replace("@", ".")
 
 
-def get_remote_version(url: str, timeout: int = 30) -> dict:
+def formato_ar_columna(valores, prefijo=""):
     """
-    Obtiene señales de versión del archivo remoto (si el servidor las expone).
+    formato_ar de una columna entera a la vez (mismo redondeo), con
+    `prefijo` adelante; los faltantes (NaN) quedan vacíos.
     """
-    try:
-        r = requests.head(url, timeout=timeout, allow_redirects=True)
-        return {
-            "status": r.status_code,
-            "etag": r.headers.get("ETag"),
-            "last_modified": r.headers.get("Last-Modified"),
-            "content_length": r.headers.get("Content-Length"),
-        }
-    except Exception as e:
-        return {
-            "status": None,
-            "etag": None,
-            "last_modified": None,
-            "content_length": None,
-            "error": str(e),
-        }
-
-
-
-# ------------------------------------------------------------
-# 1. DATOS INDEC – CBA GBA
-# ------------------------------------------------------------
-@st.cache_data(ttl=6*60*60)  # 6 horas
-def obtener_cba_gba_indec():
-    url = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_cba_cbt.xls"
-    resp = requests.get(url)
-    resp.raise_for_status()
-
-    df = pd.read_excel(BytesIO(resp.content), sheet_name=0, skiprows=5)
-    df.columns = [str(c).strip() for c in df.columns]
-
-    df = df.rename(columns={df.columns[0]: "Fecha", df.columns[1]: "CBA_GBA"})
-    df = df.dropna(subset=["Fecha", "CBA_GBA"])
-    df["Fecha"] = pd.to_datetime(df["Fecha"])
-    df = df.sort_values("Fecha")
-
-    ultimo = df.iloc[-1]
-    return ultimo["Fecha"], float(ultimo["CBA_GBA"])
-
-
-# ------------------------------------------------------------
-# 1.1 DATOS INDEC – CANASTA DE CRIANZA (ByS / TC / Total)
-# ------------------------------------------------------------
-
-@st.cache_data(ttl=6*60*60)  # 6 horas
-def obtener_canasta_crianza_indec():
-    url = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_canasta_crianza.xlsx"
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-
-    # Leer con encabezados multinivel reales del archivo
-    df = pd.read_excel(BytesIO(resp.content), sheet_name=0, header=[2, 3, 4, 5])
-
-    # --- Aplanar nombres de columnas
-    def col_to_str(col):
-        if isinstance(col, tuple):
-            partes = []
-            for x in col:
-                s = str(x).strip()
-                if s.lower() in ("nan", "none"):
-                    continue
-                if s.lower().startswith("unnamed"):
-                    continue
-                if s == "":
-                    continue
-                partes.append(s)
-            return " | ".join(partes)
-        return str(col).strip()
-
-    df.columns = [col_to_str(c) for c in df.columns]
-
-    # --- Tomar Año y Mes como primeras 2 columnas
-    col_anio = df.columns[0]
-    col_mes = df.columns[1]
-    df = df.rename(columns={col_anio: "Año", col_mes: "Mes"})
-
-    # --- Helper para encontrar columnas por grupo y tipo exacto
-    def find_col(grupo_texto, tipo):
-        for c in df.columns:
-            s = c.lower().strip()
-
-            if grupo_texto.lower() not in s:
-                continue
-
-            # ByS: debe terminar exactamente en "bienes y servicios"
-            if tipo == "ByS" and s.endswith("bienes y servicios"):
-                return c
-
-            # TC: debe terminar exactamente en "cuidado"
-            if tipo == "TC" and s.endswith("cuidado"):
-                return c
-
-            # Total: debe terminar exactamente en "total"
-            if tipo == "Total" and s.endswith("total"):
-                return c
-
-        raise KeyError(f"No se encontró columna para grupo='{grupo_texto}' y tipo='{tipo}'")
-
-    # ------------------------------------------------------------
-    # BUSCAR COLUMNAS ByS / TC / Total por grupo etario
-    # ------------------------------------------------------------
-    grupos = {
-        "menor1": "menor de 1 año",
-        "1-3": "1 a 3 años",
-        "4-5": "4 a 5 años",
-        "6-12": "6 a 12 años",
-    }
-
-    cols = {}
-    for g, grupo_txt in grupos.items():
-        cols[g] = {
-            "ByS": find_col(grupo_txt, "ByS"),
-            "TC": find_col(grupo_txt, "TC"),
-            "Total": find_col(grupo_txt, "Total"),
-        }
-
-    # Quedarnos con lo esencial (Año, Mes + columnas encontradas)
-    keep = ["Año", "Mes"]
-    for g in grupos.keys():
-        keep += [cols[g]["ByS"], cols[g]["TC"], cols[g]["Total"]]
-
-    df = df[keep].copy()
-
-    # Renombrar a nombres "normales"
-    ren = {"Año": "Año", "Mes": "Mes"}
-    for g in grupos.keys():
-        ren[cols[g]["ByS"]] = f"{g}_ByS"
-        ren[cols[g]["TC"]] = f"{g}_TC"
-        ren[cols[g]["Total"]] = f"{g}_Total"
-
-    df = df.rename(columns=ren)
-
-    # ------------------------------------------------------------
-    # CONSTRUCCIÓN CORRECTA DE LA FECHA (AÑO SOLO EN ENERO → FFILL)
-    # ------------------------------------------------------------
-    meses = {
-        "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
-        "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
-        "septiembre": 9, "setiembre": 9, "octubre": 10,
-        "noviembre": 11, "diciembre": 12
-    }
+    num = np.asarray(valores, dtype="float64")
+    faltan = ~np.isfinite(num)
+    enteros = np.rint(np.where(faltan, 0.0, num)).astype("int64")
+
+    # grupos de tres cifras, del más bajo al más alto
+    resto = np.abs(enteros)
+    grupos = [resto % 1000]
+    while (resto := resto // 1000).any():
+        grupos.append(resto % 1000)
+
+    texto = np.full(len(num), "", dtype="U1")
+    empezado = np.zeros(len(num), dtype=bool)
+    for k in range(len(grupos) - 1, -1, -1):
+        cifras = grupos[k].astype("U3")
+        texto = np.where(
+            empezado,
+            np.char.add(np.char.add(texto, "."), np.char.zfill(cifras, 3)),
+            np.where((grupos[k] > 0) | (k == 0), cifras, texto),
+        )
+        empezado |= (grupos[k] > 0) | (k == 0)
 
-    df["Año"] = pd.to_numeric(df["Año"], errors="coerce")
-    df["Año"] = df["Año"].ffill()
+    texto = np.char.add(prefijo, np.where(enteros < 0, np.char.add("-", texto), texto))
+    return np.where(faltan, "", texto).astype(object)
 
-    df["Mes_num"] = (
-        df["Mes"]
-        .astype(str)
-        .str.strip()
-        .str.lower()
-        .map(meses)
-    )
-    df["Mes_num"] = pd.to_numeric(df["Mes_num"], errors="coerce")
-
-    df["Fecha"] = pd.to_datetime(
-        dict(year=df["Año"], month=df["Mes_num"], day=1),
-        errors="coerce"
-    )
 
-    # Numéricos (todas las columnas de canasta)
-    cols_numericas = []
-    for g in grupos.keys():
-        cols_numericas += [f"{g}_ByS", f"{g}_TC", f"{g}_Total"]
+def formato_pct_columna(valores):
+    """
+    Porcentajes de una columna entera a la vez: '12,3%'; NaN queda vacío.
+    """
+    num = np.asarray(valores, dtype="float64")
+    texto = np.char.add(np.char.replace(np.char.mod("%.1f", num), ".", ","), "%")
+    return np.where(np.isnan(num), "", texto).astype(object)
 
-    for c in cols_numericas:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    # Limpiar y ordenar
-    df = df.dropna(subset=["Fecha"] + cols_numericas)
-    df = df.sort_values("Fecha")
+COLUMNAS_DINERO = ["ByS", "TC", "Total individual", "Costo ajustado"]
+NOMBRES_FUENTES = {
+    "cba": "la CBA de INDEC",
+    "upacp": "la escala salarial de UPACP",
+    "crianza": "la canasta de crianza de INDEC",
+}
 
-    if df.empty:
-        raise ValueError(
-            "INDEC: la tabla quedó vacía tras limpieza (cambió el formato o encabezados)."
-        )
 
-    ultimo = df.iloc[-1]
-
-    return {
-        "Fecha": ultimo["Fecha"],
-        "menor1": {
-            "ByS": float(ultimo["menor1_ByS"]),
-            "TC": float(ultimo["menor1_TC"]),
-            "Total": float(ultimo["menor1_Total"]),
-        },
-        "1-3": {
-            "ByS": float(ultimo["1-3_ByS"]),
-            "TC": float(ultimo["1-3_TC"]),
-            "Total": float(ultimo["1-3_Total"]),
-        },
-        "4-5": {
-            "ByS": float(ultimo["4-5_ByS"]),
-            "TC": float(ultimo["4-5_TC"]),
-            "Total": float(ultimo["4-5_Total"]),
-        },
-        "6-12": {
-            "ByS": float(ultimo["6-12_ByS"]),
-            "TC": float(ultimo["6-12_TC"]),
-            "Total": float(ultimo["6-12_Total"]),
-        },
-    }
+def tabla_detalle(detalle):
+    """
+    Detalle por niño/a (de costo_crianza) con la fila "Total hogar" y los
+    montos ya formateados para mostrar.
+    """
+    montos = np.array(
+        [[d["Bienes"], d["Tiempo"], d["Total individual"], d["Costo ajustado"]] for d in detalle],
+        dtype="float64",
+    ).reshape(-1, 4)
+    montos = np.vstack([montos, montos.sum(axis=0)])
+    factores = np.array([d["Factor escala"] for d in detalle], dtype="float64")
+
+    return pd.DataFrame({
+        "Edad": [int(d["Edad"]) for d in detalle] + [""],
+        "Grupo": [d["Grupo"] for d in detalle] + ["Total hogar"],
+        "ByS": formato_ar_columna(montos[:, 0]),
+        "TC": formato_ar_columna(montos[:, 1]),
+        "Total individual": formato_ar_columna(montos[:, 2]),
+        "Factor escala": list(np.char.replace(np.char.mod("%.1f", factores), ".", ",")) + [""],
+        "Costo ajustado": formato_ar_columna(montos[:, 3]),
+    })
+
+
+def tabla_comparacion(df, col_indec, col_pba):
+    """
+    Tabla INDEC vs PBA de una columna de la comparación (filas de
+    comparacion_indec), con diferencias en $ y % ya formateadas.
+    """
+    indec = df[col_indec].to_numpy(dtype="float64", na_value=np.nan)
+    pba = df[col_pba].to_numpy(dtype="float64", na_value=np.nan)
+    diferencia = pba - indec  # NaN donde no hay tramo INDEC
+    with np.errstate(divide="ignore", invalid="ignore"):
+        porcentaje = diferencia / indec * 100
+
+    return pd.DataFrame({
+        "Grupo": df["Grupo"].to_numpy(),
+        "INDEC ($/mes)": formato_ar_columna(indec, "$"),
+        "PBA ($/mes)": formato_ar_columna(pba, "$"),
+        "Diferencia ($)": formato_ar_columna(diferencia, "$"),
+        "Diferencia (%)": formato_pct_columna(porcentaje),
+    }, index=df.index)
+
+
+# Tablas ya formateadas, compartidas entre sesiones (no se modifican): se
+# arman una vez por versión de datos, hogar y vista
+ESTILO_TOTAL = "font-weight: bold; background-color: #e0e0e0"
+VISTAS_COMPARACION = {
+    "Total": "Canasta Total (ByS + TC)",
+    "ByS": "Canasta de Bienes y Servicios (ByS)",
+    "TC": "Canasta de Tiempo de Cuidado (TC)",
+}
 
-# ------------------------------------------
-# 2. DATOS UPACP – 4° CATEGORÍA CON RETIRO
-# ------------------------------------------
 
-def parse_monto(s):
-    return float(s.replace(".", "").replace(",", "."))
+def resaltar_total(df):
+    """
+    Estilos de toda la tabla de detalle de una vez: la fila "Total hogar"
+    resaltada.
+    """
+    estilos = pd.DataFrame("", index=df.index, columns=df.columns)
+    estilos.loc[df["Grupo"] == "Total hogar"] = ESTILO_TOTAL
+    return estilos
 
 
-@st.cache_data(ttl=6*60*60)  # 6 horas
-def obtener_upacp():
-    url = "https://upacp.org.ar/?page_id=26745"
-    resp = requests.get(url)
-    resp.raise_for_status()
+@st.cache_resource(max_entries=4096, show_spinner=False,
+                   hash_funcs={ResultadoHogar: lambda h: (h.edades, h.grupos)})
+def detalle_formateado(version, hogar, _r):
+    """
+    (tabla de detalle formateada, estilos) de un hogar con la versión de
+    datos `version` (`_r`, sus datos).
+    """
+    df_mostrar = tabla_detalle(detalle_hogar(hogar, *_r["costos_grupo"]))
+    return df_mostrar, resaltar_total(df_mostrar)
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    text = soup.get_text(" ", strip=True)
 
-    idx = text.find("CUARTA CATEGORIA")
-    bloque = text[idx: idx + 1200]
+def tramos_presentes(hogar):
+    """
+    Posiciones en TRAMOS_COMPARACION de los tramos presentes en el hogar.
+    """
+    presentes = {GRUPOS_PBA[c] for c in hogar.grupos}
+    return tuple(i for i, tramo in enumerate(TRAMOS_COMPARACION) if tramo[2] in presentes)
 
-    m = re.search(r"Hora:\s*\$?([\d\.,]+)\s*Mensual:\s*\$?([\d\.,]+)", bloque)
-    valor_hora = parse_monto(m.group(1))
-    mensual = parse_monto(m.group(2))
 
-    return valor_hora, mensual
+@st.cache_resource(max_entries=4096, show_spinner=False)
+def comparacion_formateada(version, tramos, vista, _r):
+    """
+    Tabla INDEC vs PBA formateada de una vista ("Total", "ByS" o "TC") para
+    los tramos presentes, con la versión de datos `version`.
+    """
+    filas = [fila_comparacion(*TRAMOS_COMPARACION[i], _r["indec"], _r["costos_pba"]) for i in tramos]
+    return tabla_comparacion(pd.DataFrame(filas), f"INDEC_{vista}", f"PBA_{vista}")
 
 
-# --------------------------------
-# 3. METODOLOGÍA DE CRIANZA - PBA
-# --------------------------------
-escala_bienes = {
-    "menor1": 0.298,
-    "1-3": 0.298,
-    "4-5": 0.298,
-    "6-11": 0.577,
-    "12-17": 0.647,
-}
+@st.fragment
+def seccion_detalle(version, hogar, r):
+    with registro.tramo("render_detalle"):
+        df_mostrar, estilos = detalle_formateado(version, hogar, r)
 
-horas_cuidado = {
-    "menor1": 129,
-    "1-3": 66,
-    "4-5": 52,
-    "6-11": 57,
-    "12-17": 24,
-}
+        st.subheader("Detalle por niño/a")
+        st.dataframe(
+            df_mostrar.style
+            .set_properties(**{"text-align": "right"}, subset=COLUMNAS_DINERO + ["Factor escala"])
+            .apply(lambda _: estilos, axis=None),
+            use_container_width=True
+        )
 
 
-def grupo_edad(e):
-    if e < 1:
-        return "menor1"
-    if 1 <= e <= 3:
-        return "1-3"
-    if 4 <= e <= 5:
-        return "4-5"
-    if 6 <= e <= 11:
-        return "6-11"
-    if 12 <= e <= 17:
-        return "12-17"
-    return None
+@st.fragment
+def seccion_comparacion(version, tramos, r):
+    """
+    Tablas de comparación con INDEC. Es un fragmento: el checkbox de
+    desagregación vuelve a ejecutar sólo esta parte.
+    """
+    def tabla_corta(vista):
+        with registro.tramo("render_comparacion"):
+            st.markdown(f"**{VISTAS_COMPARACION[vista]}**")
+            st.dataframe(comparacion_formateada(version, tramos, vista, r), use_container_width=True)
 
+    tabla_corta("Total")
 
-def costo_crianza(edades, cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
-    gasto_ref = cba_gba * icg * ae
-    valor_hora_24_mas = round(mensual_upacp / (6 * 30.5))
+    ver_desagregado = st.checkbox("Ver desagregación (ByS y TC)", value=False)
+    if ver_desagregado:
+        tabla_corta("ByS")
+        tabla_corta("TC")
 
-    costos = []
-    for edad in edades:
-        g = grupo_edad(edad)
-        if g is None:
-            continue
 
-        bienes = escala_bienes[g] * gasto_ref
+@st.cache_resource
+def refrescador():
+    """
+    Un refrescador por proceso, compartido por todas las sesiones.
+    """
+    return Refrescador().iniciar()
 
-        if g == "menor1":
-            valor_hora = valor_hora_24_mas
-        else:
-            valor_hora = hora_upacp
 
-        tiempo = horas_cuidado[g] * valor_hora
-        total_ind = bienes + tiempo
-        costos.append((edad, g, bienes, tiempo, total_ind))
+def datos_vigentes():
+    """
+    Último juego de datos válido del refrescador. Si no hay ninguno (las
+    fuentes fallan y no hay valores guardados), muestra el error y corta
+    el rerun.
+    """
+    try:
+        return refrescador().datos()
+    except Exception as e:
+        st.error(f"No se pudieron obtener los datos de las fuentes: {e}")
+        st.stop()
 
-    # Ordenar por costo individual
-    costos.sort(key=lambda x: x[4], reverse=True)
 
-    factores = [1.0, 0.7] + [0.5] * 10
+MAX_VERSIONES = 8  # versiones de datos que se conservan para las sesiones abiertas
 
-    total = 0
-    detalles = []
-    for i, (edad, g, bienes, tiempo, total_ind) in enumerate(costos):
-        factor = factores[i]
-        ajustado = round(total_ind * factor)
-        total += ajustado
 
-        detalles.append({
-            "Edad": edad,
-            "Grupo": g,
-            "Bienes": round(bienes),
-            "Tiempo": round(tiempo),
-            "Total individual": round(total_ind),
-            "Factor escala": factor,
-            "Costo ajustado": ajustado
-        })
+@st.cache_resource
+def versiones():
+    """
+    Datos que se muestran junto a un resultado, una sola copia por versión
+    de las fuentes y por proceso, compartida por todas las sesiones: cada
+    sesión guarda sólo el id de la versión y un ResultadoHogar.
+    """
+    return {}
 
-    return total, detalles
 
-def costos_individuales_por_grupo(cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+def version_sesion(datos):
     """
-    Devuelve costo individual (sin escala) por grupo etario de TU metodología:
-    bienes + tiempo, para un (1) niño/a en ese grupo.
+    Id de la versión de `datos` (del Refrescador); la registra la primera
+    vez que una sesión calcula con ella.
     """
-    gasto_ref = cba_gba * icg * ae
-    valor_hora_24_mas = round(mensual_upacp / (6 * 30.5))
+    guardadas = versiones()
+    version = datos["version"]
+    if version not in guardadas:
+        fecha_cba, cba_gba = datos["valores"]["cba"]
+        valor_hora, salario_mensual = datos["valores"]["upacp"]
+        tabla = datos["tabla"]
+        guardadas[version] = {
+            "fecha_cba": fecha_cba,
+            "cba_gba": cba_gba,
+            "valor_hora": valor_hora,
+            "salario_mensual": salario_mensual,
+            "indec": datos["valores"]["crianza"],
+            "costos_pba": costos_individuales_por_grupo(cba_gba, valor_hora, salario_mensual),
+            "costos_grupo": (tabla.bienes, tabla.tiempo, tabla.total_ind),
+
+            # trazabilidad de actualización
+            "ts_descarga": datos["ts"],
+            "v_crianza": get_remote_version(URL_INDEC_CRIANZA),
+            "v_cba": get_remote_version(URL_INDEC_CBA),
+            "tiempos": datos["tiempos"],
+            "origen": origen_datos().descripcion(),
+            "vencidas": datos["vencidas"],
+        }
+        while len(guardadas) > MAX_VERSIONES:
+            guardadas.pop(next(iter(guardadas)), None)
+    return version
 
-    costos = {}
-    for g in escala_bienes.keys():
-        bienes = escala_bienes[g] * gasto_ref
 
-        if g == "menor1":
-            valor_hora = valor_hora_24_mas
-        else:
-            valor_hora = hora_upacp
-
-        tiempo = horas_cuidado[g] * valor_hora
-        total_ind = round(bienes + tiempo)
+@st.cache_resource
+def servidor_metricas():
+    """
+    Con CRIANZA_METRICAS_PUERTO, expone GET /metrics (una vez por proceso).
+    """
+    if METRICAS_PUERTO:
+        return registro.servir(int(METRICAS_PUERTO))
 
-        costos[g] = {
-            "Bienes": round(bienes),
-            "Tiempo": round(tiempo),
-            "Total": total_ind
-        }
 
-    return costos
+def main():
+    servidor_metricas()
+    try:
+        with registro.perfil("rerun"), registro.tramo("rerun"):
+            pantalla()
+    finally:
+        if METRICAS_ARCHIVO:
+            registro.escribir(METRICAS_ARCHIVO)
 
 
+def pantalla():
+    if "calc_done" not in st.session_state:
+        st.session_state.calc_done = False
 
-if "calc_done" not in st.session_state:
-    st.session_state.calc_done = False
+    # arranca el refresco de fuentes en segundo plano (una vez por proceso)
+    refrescador()
 
 
 
-# -----------------------
-# 4. INTERFAZ STREAMLIT
-# -----------------------
+    # -----------------------
+    # 4. INTERFAZ STREAMLIT
+    # -----------------------
 
-st.markdown("""
+    st.markdown("""
 <h1 style='text-align: center;'>Calculadora del costo de la crianza</h1>
 <h3 style='text-align: center;'>Provincia de Buenos Aires</h3>
 """, unsafe_allow_html=True)
 
 
-texto_introduccion = """
+    texto_introduccion = """
 <div style='text-align: justify'>
 Esta herramienta estima el costo mensual de la crianza de niñas, niños y adolescentes (NNyA) en la provincia de Buenos Aires.
 La metodología utilizada valora tanto los <b>bienes y servicios</b> (ByS) necesarios para su desarrollo como el <b>tiempo de cuidado</b>,
@@ -409,132 +328,71 @@ Esta herramienta integra datos de:
 </div>
 """
 
-st.markdown(texto_introduccion, unsafe_allow_html=True)
-
-
-st.markdown("<h2 style='text-align: center;'>Ingresá las edades de los niños/as</h2>", unsafe_allow_html=True)
-
-n = st.number_input("Cantidad de hijos/as", min_value=0, max_value=10, value=1, step=1)
-
-edades = []
-for i in range(n):
-    e = st.number_input(f"Edad del hijo/a {i+1}", min_value=0.0, max_value=17.0, step=1.0)
-    edades.append(e)
-
-clicked = st.button("Calcular")
-
-URL_INDEC_CRIANZA = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_canasta_crianza.xlsx"
-URL_INDEC_CBA = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_cba_cbt.xls"
-
-if clicked:
-    if n == 0:
-        st.warning("Ingresá al menos un niño/a.")
-    else:
-        # -----------------------------
-        # CALCULAR 1 VEZ Y GUARDAR
-        # -----------------------------
-        fecha_cba, cba_gba = obtener_cba_gba_indec()
-        valor_hora, salario_mensual = obtener_upacp()
-        total, detalle = costo_crianza(edades, cba_gba, valor_hora, salario_mensual)
-
-        # comparación INDEC: calcular 1 vez y guardar también
-        indec = obtener_canasta_crianza_indec()
-
-        # ---- NUEVO: trazabilidad de actualización (timestamp + versión remota)
-        ts_descarga = datetime.now(ZoneInfo("America/Argentina/Buenos_Aires"))
-        v_crianza = get_remote_version(URL_INDEC_CRIANZA)
-        v_cba = get_remote_version(URL_INDEC_CBA)
-
-        
-        costos_pba = costos_individuales_por_grupo(cba_gba, valor_hora, salario_mensual)
-
-        # detectar tramos (1 vez)
-        has_menor1 = any(e < 1 for e in edades)
-        has_1_3    = any(1 <= e <= 3 for e in edades)
-        has_4_5    = any(4 <= e <= 5 for e in edades)
-        has_6_11   = any(6 <= e <= 11 for e in edades)
-        has_12_17  = any(12 <= e <= 17 for e in edades)
-
-        filas = []
-
-        def agregar_fila(label, g_indec, g_pba, comparable=True):
-            if comparable:
-                indec_bys = float(indec[g_indec]["ByS"])
-                indec_tc  = float(indec[g_indec]["TC"])
-                indec_tot = float(indec[g_indec]["Total"])
-            else:
-                indec_bys = indec_tc = indec_tot = None
-
-            pba_bys = float(costos_pba[g_pba]["Bienes"])
-            pba_tc  = float(costos_pba[g_pba]["Tiempo"])
-            pba_tot = float(costos_pba[g_pba]["Total"])
-
-            filas.append({
-                "Grupo": label,
-                "INDEC_ByS": indec_bys,   "PBA_ByS": pba_bys,
-                "INDEC_TC": indec_tc,     "PBA_TC": pba_tc,
-                "INDEC_Total": indec_tot, "PBA_Total": pba_tot,
-            })
-
-        if has_menor1:
-            agregar_fila("INDEC - < 1", "menor1", "menor1", True)
-        if has_1_3:
-            agregar_fila("INDEC - 1 a 3", "1-3", "1-3", True)
-        if has_4_5:
-            agregar_fila("INDEC - 4 a 5", "4-5", "4-5", True)
-        if has_6_11:
-            agregar_fila("INDEC - 6 a 12 (vs PBA 6 a 11)", "6-12", "6-11", True)
-        if has_12_17:
-            agregar_fila("PBA - 12 a 17 (sin equivalente INDEC)", None, "12-17", False)
-
-        base = pd.DataFrame(filas) if filas else pd.DataFrame()
-
-        st.session_state.calc_done = True
-        st.session_state.result = {
-            "fecha_cba": fecha_cba,
-            "cba_gba": cba_gba,
-            "valor_hora": valor_hora,
-            "salario_mensual": salario_mensual,
-            "total": total,
-            "detalle": detalle,
-            "indec": indec,
-            "base": base,
-
-            # ---- NUEVO: trazabilidad de actualización
-            "ts_descarga": ts_descarga,
-            "v_crianza": v_crianza,
-            "v_cba": v_cba,
-        }
-
-# -------------------
-# MOSTRAR RESULTADOS
-# -------------------
-if st.session_state.calc_done:
-    r = st.session_state.result
-
-    ts = r.get("ts_descarga")
-    v_crianza = r.get("v_crianza", {}) or {}
-    v_cba = r.get("v_cba", {}) or {}
+    st.markdown(texto_introduccion, unsafe_allow_html=True)
 
-    def fmt_none(x):
-        return x if x else "—"
 
+    st.markdown("<h2 style='text-align: center;'>Ingresá las edades de los niños/as</h2>", unsafe_allow_html=True)
 
-    fecha_cba = r["fecha_cba"]
-    cba_gba = r["cba_gba"]
-    valor_hora = r["valor_hora"]
-    salario_mensual = r["salario_mensual"]
-    total = r["total"]
-    detalle = r["detalle"]
-    indec = r["indec"]
-    base = r["base"]
+    n = st.number_input("Cantidad de hijos/as", min_value=0, max_value=10, value=1, step=1)
 
-       
-    st.markdown("<h2 style='text-align: center;'>Datos utilizados</h2>", unsafe_allow_html=True)
+    edades = []
+    for i in range(n):
+        e = st.number_input(f"Edad del hijo/a {i+1}", min_value=0.0, max_value=17.0, step=1.0)
+        edades.append(e)
 
-    valor_hora_24_mas = round(salario_mensual / (6 * 30.5))
+    clicked = st.button("Calcular")
 
-    st.markdown("""
+    if clicked:
+        if n == 0:
+            st.warning("Ingresá al menos un niño/a.")
+        else:
+            # -----------------------------
+            # CALCULAR 1 VEZ Y GUARDAR
+            # -----------------------------
+            # último juego de datos válido (se refresca en segundo plano)
+            datos = datos_vigentes()
+
+            # la sesión guarda sólo el id de la versión de datos y el
+            # resultado compacto del hogar
+            st.session_state.calc_done = True
+            st.session_state.version = version_sesion(datos)
+            st.session_state.hogar = datos["tabla"].resultado(edades)
+
+    # -------------------
+    # MOSTRAR RESULTADOS
+    # -------------------
+    if st.session_state.calc_done:
+        hogar = st.session_state.hogar
+        r = versiones().get(st.session_state.version)
+        if r is None:
+            # versión ya descartada: se recalcula con los datos vigentes
+            datos = datos_vigentes()
+            st.session_state.version = version_sesion(datos)
+            st.session_state.hogar = hogar = datos["tabla"].resultado(hogar.edades)
+            r = versiones()[st.session_state.version]
+
+        ts = r.get("ts_descarga")
+        v_crianza = r.get("v_crianza", {}) or {}
+        v_cba = r.get("v_cba", {}) or {}
+
+        def fmt_none(x):
+            return x if x else "—"
+
+
+        fecha_cba = r["fecha_cba"]
+        cba_gba = r["cba_gba"]
+        valor_hora = r["valor_hora"]
+        salario_mensual = r["salario_mensual"]
+        total = hogar.total
+        indec = r["indec"]
+        tramos = tramos_presentes(hogar)
+
+
+        st.markdown("<h2 style='text-align: center;'>Datos utilizados</h2>", unsafe_allow_html=True)
+
+        valor_hora_24_mas = round(salario_mensual / (6 * 30.5))
+
+        st.markdown("""
     <style>
     .box {
         padding: 15px;
@@ -549,7 +407,7 @@ if st.session_state.calc_done:
     </style>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"""
+        st.markdown(f"""
     <div class="box">
     <h4 style="text-align:center;">INDEC</h4>
 
@@ -567,23 +425,33 @@ if st.session_state.calc_done:
     <b>Actualizado en la app:</b> {ts.strftime('%Y-%m-%d %H:%M:%S') if ts else "—"}<br>
     <b>INDEC CBA – Última modificación:</b> {fmt_http_datetime(v_cba.get("last_modified"))}<br>
     <b>INDEC Crianza – Última modificación:</b> {fmt_http_datetime(v_crianza.get("last_modified"))}<br>
+    <b>Tiempos de descarga:</b> {r.get("tiempos") or "—"}<br>
+    <b>Origen de los datos:</b> {r.get("origen") or "—"}<br>
     </small>
     </div>
     """, unsafe_allow_html=True)
 
-    try:
-        ultimo_indec = pd.to_datetime(indec["Fecha"])
-        hoy = pd.Timestamp.today().normalize()
-        if (hoy - ultimo_indec).days > 60:
+        try:
+            ultimo_indec = pd.to_datetime(indec["Fecha"])
+            hoy = pd.Timestamp.today().normalize()
+            if (hoy - ultimo_indec).days > 60:
+                st.warning(
+                    f"Atención: la canasta de crianza INDEC disponible en el archivo descargado es {ultimo_indec.strftime('%Y-%m')}."
+                )
+        except Exception:
+            pass
+
+        # fuentes caídas: se está usando su último valor válido
+        for fuente, v in (r.get("vencidas") or {}).items():
             st.warning(
-                f"Atención: la canasta de crianza INDEC disponible en el archivo descargado es {ultimo_indec.strftime('%Y-%m')}."
+                f"Atención: no se pudo actualizar {NOMBRES_FUENTES.get(fuente, fuente)} "
+                f"({v['error']}). Se usa el último valor válido, obtenido el "
+                f"{v['ts'].strftime('%Y-%m-%d %H:%M')}."
             )
-    except Exception:
-        pass
 
 
 
-    st.markdown(f"""
+        st.markdown(f"""
     <div class="box">
       <h4 style="text-align:center;">UPACP</h4>
       <b>Escala salarial de la 4° categoría con retiro*</b><br>
@@ -595,46 +463,12 @@ if st.session_state.calc_done:
     </div>
     """, unsafe_allow_html=True)
 
-    st.success(f"**Costo total mensual del hogar: ${formato_ar(total)}**")
-
-    df_detalle = pd.DataFrame(detalle)
-    df_detalle["Edad"] = df_detalle["Edad"].astype(int)
-    df_detalle["Factor escala"] = df_detalle["Factor escala"].round(1)
-
-    fila_total = {
-        "Edad": "",
-        "Grupo": "Total hogar",
-        "Bienes": df_detalle["Bienes"].sum(),
-        "Tiempo": df_detalle["Tiempo"].sum(),
-        "Total individual": df_detalle["Total individual"].sum(),
-        "Factor escala": "",
-        "Costo ajustado": df_detalle["Costo ajustado"].sum()
-    }
-
-    df_detalle = pd.concat([df_detalle, pd.DataFrame([fila_total])], ignore_index=True)
-    df_mostrar = df_detalle.copy().rename(columns={"Bienes": "ByS", "Tiempo": "TC"})
-    columnas_dinero = ["ByS", "TC", "Total individual", "Costo ajustado"]
-
-    for col in columnas_dinero:
-        df_mostrar[col] = df_mostrar[col].apply(lambda x: formato_ar(x) if isinstance(x, (int, float)) else x)
-
-    df_mostrar["Factor escala"] = df_mostrar["Factor escala"].apply(
-        lambda x: f"{x:.1f}".replace(".", ",") if isinstance(x, (int, float)) else ""
-    )
-
-    def resaltar_total(row):
-        return ["font-weight: bold; background-color: #e0e0e0"] * len(row) if row["Grupo"] == "Total hogar" else [""] * len(row)
+        st.success(f"**Costo total mensual del hogar: ${formato_ar(total)}**")
 
-    st.subheader("Detalle por niño/a")
-    st.dataframe(
-        df_mostrar.style
-        .set_properties(**{"text-align": "right"}, subset=columnas_dinero + ["Factor escala"])
-        .apply(resaltar_total, axis=1),
-        use_container_width=True
-    )
+        seccion_detalle(st.session_state.version, hogar, r)
 
-    st.markdown(
-        """
+        st.markdown(
+            """
         <p style="text-align: justify; font-size: 0.8rem; color: rgba(49, 51, 63, 0.6);">
         El modelo estima el costo mensual diferenciado por edad y aplica factores de economía de escala.
         El NNyA con mayor costo recibe un factor igual a 1, mientras que los restantes reciben factores de 0,7 y 0,5.
@@ -642,30 +476,30 @@ if st.session_state.calc_done:
         una estimación proporcional de los costos asociados al resto de los integrantes.
     </p>
     """,
-    unsafe_allow_html=True
-)
+        unsafe_allow_html=True
+    )
 
 
-    
-    st.subheader("Comparación con INDEC")
 
-    if base.empty:
-        st.info("No hay tramos para mostrar según las edades ingresadas.")
-    else:
+        st.subheader("Comparación con INDEC")
 
-        st.markdown(
-            """
+        if not tramos:
+            st.info("No hay tramos para mostrar según las edades ingresadas.")
+        else:
+
+            st.markdown(
+                """
             <p style="text-align: justify; font-size: 0.8rem; color: rgba(49, 51, 63, 0.6);">
             El INDEC difunde mensualmente la valorización de la canasta de crianza para la primera infancia, la niñez y la adolescencia, elaborada a partir de los lineamientos metodológicos desarrollados por la Dirección Nacional de Economía, Igualdad y Género del Ministerio de Economía y UNICEF (2023).
             Con el fin de contextualizar los resultados y aportar una perspectiva más amplia, se incluyen a continuación las estimaciones de los cotos a partir de esta metodología.
             Ambos enfoques permiten contrastar supuestos y criterios, enriqueciendo el análisis y favoreciendo comparaciones.
         </p>
         """,
-        unsafe_allow_html=True
-        )
-                    
-        st.markdown(
-            """
+            unsafe_allow_html=True
+            )
+
+            st.markdown(
+                """
             <small>
             <p style='text-align: justify;'>
                 <b>Nota:</b>
@@ -673,69 +507,44 @@ if st.session_state.calc_done:
                 Para 6–12 (INDEC) se contrasta con 6–11 (PBA).
             </p>
             """,
-            unsafe_allow_html=True
-        )
-
-
-      
-        def tabla_corta(df, col_indec, col_pba, titulo):
-            t = df[["Grupo", col_indec, col_pba]].copy()
-            t.columns = ["Grupo", "INDEC ($/mes)", "PBA ($/mes)"]
-            t["Diferencia ($)"] = t["PBA ($/mes)"] - t["INDEC ($/mes)"]
-            t["Diferencia (%)"] = (t["Diferencia ($)"] / t["INDEC ($/mes)"]) * 100
-
-            mask_no_indec = t["INDEC ($/mes)"].isna()
-            t.loc[mask_no_indec, ["Diferencia ($)", "Diferencia (%)"]] = None
-
-            show = t.copy()
-            for c in ["INDEC ($/mes)", "PBA ($/mes)", "Diferencia ($)"]:
-                show[c] = show[c].apply(lambda x: f"${formato_ar(x)}" if pd.notna(x) else "")
-
-            show["Diferencia (%)"] = show["Diferencia (%)"].apply(
-                lambda x: f"{x:.1f}%".replace(".", ",") if pd.notna(x) else ""
+                unsafe_allow_html=True
             )
 
-            st.markdown(f"**{titulo}**")
-            st.dataframe(show, use_container_width=True)
 
-        tabla_corta(base, "INDEC_Total", "PBA_Total", "Canasta Total (ByS + TC)")
 
-        ver_desagregado = st.checkbox("Ver desagregación (ByS y TC)", value=False)
-        if ver_desagregado:
-            tabla_corta(base, "INDEC_ByS", "PBA_ByS", "Canasta de Bienes y Servicios (ByS)")
-            tabla_corta(base, "INDEC_TC", "PBA_TC", "Canasta de Tiempo de Cuidado (TC)")
+            seccion_comparacion(st.session_state.version, tramos, r)
 
-        st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
+            st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
 
-        #-----------------------------------------------
-        # MATERIALES DE REFERENCIA (DESPUÉS DEL CÁLCULO)
-        # ----------------------------------------------
-        st.write("### Materiales de referencia")
+            #-----------------------------------------------
+            # MATERIALES DE REFERENCIA (DESPUÉS DEL CÁLCULO)
+            # ----------------------------------------------
+            st.write("### Materiales de referencia")
 
-        st.markdown(
-            "<p style='text-align: justify;'><b>Metodología PBA</p>",
-            unsafe_allow_html=True
-        )
+            st.markdown(
+                "<p style='text-align: justify;'><b>Metodología PBA</p>",
+                unsafe_allow_html=True
+            )
 
-        st.markdown(
-            "- [Estimación del costo de la crianza en la provincia de Buenos Aires. Informe metodológico](https://drive.google.com/file/d/1DO4iKByfFdBD-c1EWJ7vfkamEJwbGOeg/view?usp=drive_link)"
-        )
+            st.markdown(
+                "- [Estimación del costo de la crianza en la provincia de Buenos Aires. Informe metodológico](https://drive.google.com/file/d/1DO4iKByfFdBD-c1EWJ7vfkamEJwbGOeg/view?usp=drive_link)"
+            )
 
-        st.markdown(
-            "<p style='text-align: justify;'><b>Metodología INDEC</p>",
-            unsafe_allow_html=True
-        )
+            st.markdown(
+                "<p style='text-align: justify;'><b>Metodología INDEC</p>",
+                unsafe_allow_html=True
+            )
 
-        st.markdown(
-            "- [Costo de consumos y cuidados de la primera infancia, la niñez y la adolescencia. Una aproximación metodológica](https://www.argentina.gob.ar/sites/default/files/2023/06/metodologia_costo_de_consumos_y_cuidados.pdf)"
-        )
+            st.markdown(
+                "- [Costo de consumos y cuidados de la primera infancia, la niñez y la adolescencia. Una aproximación metodológica](https://www.argentina.gob.ar/sites/default/files/2023/06/metodologia_costo_de_consumos_y_cuidados.pdf)"
+            )
 
-        st.markdown(
-            "- [Estimación del costo en tiempo de cuidados de niñas y niños (UNICEF – DNEIyG)](https://www.argentina.gob.ar/sites/default/files/2023/06/unicef_dneig_06-23_estimacion_del_costo_en_tiempo_de_cuidados.pdf)"
-        )
+            st.markdown(
+                "- [Estimación del costo en tiempo de cuidados de niñas y niños (UNICEF – DNEIyG)](https://www.argentina.gob.ar/sites/default/files/2023/06/unicef_dneig_06-23_estimacion_del_costo_en_tiempo_de_cuidados.pdf)"
+            )
 
-        st.markdown(
-           """
+            st.markdown(
+               """
                <div style="
                     border: 1px solid #ccc;
                     padding: 12px 20px;
@@ -752,5 +561,9 @@ if st.session_state.calc_done:
                     <strong>Contacto:</strong> hiloferrea@gmail.com — hferrea@estadistica.ec.gba.gov.ar
                 </div>
                 """,
-                unsafe_allow_html=True
-        )
+                    unsafe_allow_html=True
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Calculadora del costo de la crianza – modo lote (sin interfaz).
+
+Lee un archivo CSV o Parquet con un hogar por fila y escribe el costo
+total de cada hogar y el mismo detalle por niño/a que muestra la app.
+
+Cada hogar trae sus edades separadas por ";" (columna `edades`, p. ej.
+"0;5;12") o sus fechas de nacimiento (columna `fechas_nacimiento`, p. ej.
+"2015-03-01;2020-06-10"), que se convierten a años cumplidos a la fecha de
+referencia. El archivo se procesa en bloques de tamaño fijo repartidos
+entre varios procesos, así que la memoria no depende del tamaño total.
+
+Uso:
+    python calculadora_crianza_lote.py hogares.csv totales.csv --detalle detalle.csv
+    python calculadora_crianza_lote.py hogares.parquet totales.parquet --procesos 8
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from crianza import (
+    FACTORES_ESCALA,
+    GRUPOS_PBA,
+    Refrescador,
+    codigos_grupo,
+    configurar_origen,
+    costo_crianza_lote,
+    costos_individuales_por_grupo,
+)
+from crianza.metricas import METRICAS_ARCHIVO, registro
+
+TAMANIO_BLOQUE = 100_000  # hogares por bloque
+
+
+# -----------------------------
+# 1. LECTURA Y ESCRITURA
+# -----------------------------
+def es_parquet(ruta):
+    return Path(ruta).suffix.lower() in (".parquet", ".pq")
+
+
+def leer_bloques(ruta, columnas, tamanio):
+    """
+    Itera el archivo de entrada en DataFrames de a `tamanio` filas.
+    """
+    if es_parquet(ruta):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        for lote in archivo.iter_batches(batch_size=tamanio, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(ruta, usecols=columnas, dtype=str, chunksize=tamanio)
+
+
+class Escritor:
+    """
+    Agrega bloques a un CSV o Parquet sin tener el archivo entero en memoria.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+
+    def escribir(self, df):
+        if es_parquet(self.ruta):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+            if self._archivo is None:
+                self._archivo = pq.ParquetWriter(self.ruta, tabla.schema)
+            self._archivo.write_table(tabla)
+        else:
+            primero = self._archivo is None
+            if primero:
+                self._archivo = open(self.ruta, "w", newline="", encoding="utf-8")
+            df.to_csv(self._archivo, header=primero, index=False)
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+
+
+# -----------------------------
+# 2. CÁLCULO POR BLOQUE
+# -----------------------------
+_PARAMETROS = {}
+
+
+def _iniciar_proceso(parametros):
+    """
+    Recibe una sola vez por proceso los valores de las fuentes.
+    """
+    _PARAMETROS.update(parametros)
+
+
+def edades_desde_fechas(fechas, fecha_ref):
+    """
+    Matriz de fechas de nacimiento (texto) -> años cumplidos a `fecha_ref`.
+    Los nacimientos posteriores a la fecha de referencia quedan en NaN.
+    """
+    ref = pd.Timestamp(fecha_ref)
+    edades = np.full(fechas.shape, np.nan)
+    for j in range(fechas.shape[1]):
+        nac = pd.to_datetime(fechas.iloc[:, j], errors="coerce")
+        anios = ref.year - nac.dt.year
+        anios -= (ref.month < nac.dt.month) | ((ref.month == nac.dt.month) & (ref.day < nac.dt.day))
+        edades[:, j] = anios.where(nac <= ref).to_numpy(dtype="float64", na_value=np.nan)
+    return edades
+
+
+def procesar_bloque(bloque):
+    """
+    Calcula un bloque de hogares. Devuelve (totales, detalle) como DataFrames.
+
+    Los hogares con más niños/as de los que admite la escala no se calculan:
+    quedan sin costo total y con el motivo en la columna "Error".
+    """
+    p = _PARAMETROS
+    hogares = bloque[p["col_id"]].to_numpy() if p["col_id"] else bloque.index.to_numpy()
+
+    # en Parquet la columna puede venir numérica (una sola edad por hogar)
+    datos = bloque[p["col_datos"]].astype("string").fillna("")
+    partes = datos.str.split(";", expand=True)
+    partes = partes.apply(lambda c: c.str.strip())
+    if p["fechas"]:
+        edades = edades_desde_fechas(partes, p["fecha_ref"])
+    else:
+        edades = partes.apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+
+    ninios = (codigos_grupo(edades) >= 0).sum(axis=1)
+    excedidos = ninios > len(FACTORES_ESCALA)
+    edades = np.where(excedidos[:, None], np.nan, edades)
+
+    totales, det = costo_crianza_lote(
+        edades, p["cba_gba"], p["valor_hora"], p["salario_mensual"]
+    )
+
+    costo = pd.array(totales, dtype="Int64")
+    costo[excedidos] = pd.NA
+
+    validos = det["Grupo"] >= 0
+    fila = np.nonzero(validos)[0]
+    df_totales = pd.DataFrame({
+        "Hogar": hogares,
+        "Niños/as": ninios,
+        "Costo total": costo,
+        "Error": np.where(excedidos, f"Más de {len(FACTORES_ESCALA)} niños/as.", ""),
+    })
+    df_detalle = pd.DataFrame({
+        "Hogar": hogares[fila],
+        "Edad": det["Edad"][validos],
+        "Grupo": np.array(GRUPOS_PBA)[det["Grupo"][validos]],
+        "ByS": det["Bienes"][validos],
+        "TC": det["Tiempo"][validos],
+        "Total individual": det["Total individual"][validos],
+        "Factor escala": det["Factor escala"][validos],
+        "Costo ajustado": det["Costo ajustado"][validos],
+    })
+    return df_totales, df_detalle
+
+
+# -----------------------------
+# 3. ORQUESTACIÓN
+# -----------------------------
+def procesar_archivo(entrada, salida, parametros, salida_detalle=None,
+                     tamanio=TAMANIO_BLOQUE, procesos=None):
+    """
+    Reparte los bloques entre `procesos` workers, con a lo sumo dos bloques
+    en vuelo por worker, y escribe los resultados en el orden de entrada.
+    Devuelve la cantidad de hogares procesados.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    columnas = [parametros["col_datos"]] + ([parametros["col_id"]] if parametros["col_id"] else [])
+
+    totales = Escritor(salida)
+    detalle = Escritor(salida_detalle) if salida_detalle else None
+    en_vuelo = deque()
+    n = 0
+
+    def volcar():
+        df_totales, df_detalle = en_vuelo.popleft().result()
+        totales.escribir(df_totales)
+        if detalle is not None:
+            detalle.escribir(df_detalle)
+        return len(df_totales)
+
+    try:
+        with ProcessPoolExecutor(procesos, initializer=_iniciar_proceso, initargs=(parametros,)) as ex:
+            inicio = 0
+            for bloque in leer_bloques(entrada, columnas, tamanio):
+                # numeración global de filas (sirve de id si no hay columna)
+                bloque.index = pd.RangeIndex(inicio, inicio + len(bloque))
+                inicio += len(bloque)
+                en_vuelo.append(ex.submit(procesar_bloque, bloque))
+                if len(en_vuelo) >= 2 * procesos:
+                    n += volcar()
+            while en_vuelo:
+                n += volcar()
+    finally:
+        totales.cerrar()
+        if detalle is not None:
+            detalle.cerrar()
+
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Costo de la crianza (PBA) para un archivo de hogares."
+    )
+    parser.add_argument("entrada", help="CSV o Parquet, un hogar por fila")
+    parser.add_argument("salida", help="CSV o Parquet con el costo total por hogar")
+    parser.add_argument("--detalle", help="CSV o Parquet con el detalle por niño/a")
+    parser.add_argument("--columna", default=None,
+                        help="columna con edades o fechas (por defecto 'edades' o 'fechas_nacimiento')")
+    parser.add_argument("--fechas", action="store_true",
+                        help="la columna trae fechas de nacimiento en lugar de edades")
+    parser.add_argument("--fecha-referencia", default=date.today().isoformat(),
+                        help="fecha para calcular edades desde nacimientos (AAAA-MM-DD)")
+    parser.add_argument("--id", default=None, help="columna identificadora del hogar")
+    parser.add_argument("--tamanio-bloque", type=int, default=TAMANIO_BLOQUE)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--origen", default=None,
+                        help="origen de los datos: vivo, directorio espejo o URL de un doble")
+    args = parser.parse_args(argv)
+
+    if args.origen is not None:
+        configurar_origen(args.origen)
+
+    # Fuentes: se obtienen una vez y se comparten con todos los procesos
+    datos = Refrescador().datos()
+    for fuente, v in datos["vencidas"].items():
+        print(f"aviso: {fuente} no se pudo actualizar ({v['error']}); "
+              f"se usa el último valor válido del {v['ts']:%Y-%m-%d %H:%M}", file=sys.stderr)
+    fecha_cba, cba_gba = datos["valores"]["cba"]
+    valor_hora, salario_mensual = datos["valores"]["upacp"]
+
+    parametros = {
+        "cba_gba": cba_gba,
+        "valor_hora": valor_hora,
+        "salario_mensual": salario_mensual,
+        "col_datos": args.columna or ("fechas_nacimiento" if args.fechas else "edades"),
+        "col_id": args.id,
+        "fechas": args.fechas,
+        "fecha_ref": args.fecha_referencia,
+    }
+
+    with registro.tramo("lote"):
+        n = procesar_archivo(
+            args.entrada, args.salida, parametros,
+            salida_detalle=args.detalle,
+            tamanio=args.tamanio_bloque,
+            procesos=args.procesos,
+        )
+
+    # Datos utilizados, junto a la salida (mismo criterio que la app)
+    resumen = {
+        "hogares": n,
+        "fecha_cba": pd.Timestamp(fecha_cba).strftime("%Y-%m"),
+        "cba_gba": cba_gba,
+        "valor_hora": valor_hora,
+        "salario_mensual": salario_mensual,
+        "costos_por_grupo": costos_individuales_por_grupo(cba_gba, valor_hora, salario_mensual),
+        "actualizado": datos["ts"].isoformat(),
+        "vencidas": {fuente: v["ts"].isoformat() for fuente, v in datos["vencidas"].items()},
+    }
+    Path(f"{args.salida}.fuentes.json").write_text(
+        json.dumps(resumen, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"{n} hogares procesados -> {args.salida}", file=sys.stderr)
+    if METRICAS_ARCHIVO:
+        registro.escribir(METRICAS_ARCHIVO)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Núcleo de la calculadora del costo de la crianza (PBA), sin interfaz.
+
+    from crianza import costo_crianza
+    total, detalle = costo_crianza([0, 5, 12], cba_gba, hora_upacp, mensual_upacp)
+
+Los submódulos se importan recién cuando se usa uno de sus nombres: la
+metodología sólo necesita la biblioteca estándar, y NumPy, pandas y
+requests se cargan cuando hace falta el motor vectorizado o un loader.
+"""
+import importlib
+
+_SUBMODULOS = {
+    "metodologia": [
+        "FACTORES_ESCALA", "GRUPOS_PBA", "TRAMOS_COMPARACION", "comparacion_indec",
+        "costo_crianza", "costos_individuales_por_grupo", "escala_bienes", "fila_comparacion",
+        "grupo_edad", "horas_cuidado",
+    ],
+    "motor": [
+        "MAX_HIJOS", "ResultadoHogar", "TablaComposiciones", "codigos_grupo",
+        "costo_crianza_lote", "costos_por_grupo_arr", "detalle_hogar", "matriz_edades",
+    ],
+    "red": [
+        "CACHE_DIR", "CacheHTTP", "ClienteHTTP", "VueloUnico", "cache_http", "cliente_http",
+        "get_remote_version", "vuelos",
+    ],
+    "snapshots": ["SeriesIncrementales", "SnapshotStore", "VERSION_PARSER"],
+    "metricas": ["Metricas"],
+    "origen": ["Origen", "configurar_origen", "origen_datos", "sincronizar"],
+    "indec": [
+        "CambioFormatoINDEC", "GRUPOS_INDEC", "URL_INDEC_CBA", "URL_INDEC_CRIANZA",
+        "obtener_canasta_crianza_indec", "obtener_cba_gba_indec",
+    ],
+    "upacp": [
+        "CATEGORIAS_UPACP", "HistorialUPACP", "URL_UPACP", "escala_upacp", "historial_upacp",
+        "leer_escala_upacp", "obtener_escala_upacp", "obtener_upacp", "valores_upacp",
+        "vigencia_upacp",
+    ],
+    "fuentes": [
+        "Cortacircuitos", "FUENTES", "Refrescador", "UltimosValidos", "fmt_tiempos",
+        "obtener_fuentes", "validar_fuente", "validar_fuentes",
+    ],
+    "historico": ["SerieHistorica", "serie_historica"],
+    "escenarios": ["Barrido", "elasticidades"],
+    "atrasos": ["LineasDeTiempo", "valores_por_mes"],
+    "servicio": ["MicroLotes", "ServicioCrianza", "calcular_hogares"],
+}
+
+_MODULO_DE = {nombre: mod for mod, nombres in _SUBMODULOS.items() for nombre in nombres}
+
+__all__ = sorted(_MODULO_DE)
+
+
+def __getattr__(nombre):
+    if nombre in _SUBMODULOS:
+        return importlib.import_module(f".{nombre}", __name__)
+    if nombre in _MODULO_DE:
+        valor = getattr(importlib.import_module(f".{_MODULO_DE[nombre]}", __name__), nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULOS))
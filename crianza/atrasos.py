@@ -0,0 +1,343 @@
+"""
+Atrasos de cuota alimentaria: costo de la crianza mes por mes a lo largo de
+un período, con los niños/as creciendo y los valores de CBA, INDEC y UPACP
+vigentes en cada mes.
+
+    from crianza.atrasos import LineasDeTiempo
+
+    lineas = LineasDeTiempo([
+        {"caso": "expte-123", "nacimientos": ["2015-03-10", "2020-07-02"],
+         "desde": "2019-01", "hasta": "2024-12"},
+    ])
+    lineas.resumen()     # total adeudado por caso
+    lineas.detalle(0)    # un mes por fila
+
+La edad de cada niño/a es la cumplida al último día de cada mes (como
+edades_desde_fechas del modo lote): cambia de grupo etario en el mes de su
+cumpleaños, el mes en que nace ya cuenta y desde los 18 años deja de sumar.
+Cada mes se calcula como costo_crianza con los valores de ese mes (orden
+por costo individual, factores de escala y redondeo por niño/a), en una
+sola cuenta vectorizada casos x meses x niños.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .indec import GRUPOS_INDEC
+from .metodologia import FACTORES_ESCALA, GRUPOS_PBA, escala_bienes, horas_cuidado
+from .metricas import registro
+from .motor import codigos_grupo
+
+ELEMENTOS_BLOQUE = 4_000_000  # casos x meses x niños por bloque
+
+
+# ------------------------------------------------------------
+# 1. VALORES VIGENTES EN CADA MES
+# ------------------------------------------------------------
+def meses_entre(desde, hasta):
+    """
+    Meses de `desde` a `hasta` inclusive (datetime64[M]).
+    """
+    desde = np.datetime64(pd.Timestamp(desde).strftime("%Y-%m"), "M")
+    hasta = np.datetime64(pd.Timestamp(hasta).strftime("%Y-%m"), "M")
+    return np.arange(desde, hasta + 1)
+
+
+def _vigente(periodos, valores, meses, nombre=None):
+    """
+    Para cada mes, el último valor publicado hasta ese mes inclusive. Antes
+    del comienzo de la serie: ValueError si se da `nombre`, si no NaN.
+    """
+    valores = np.asarray(valores, dtype="float64")
+    hay = ~np.isnan(valores)
+    periodos, valores = periodos[hay], np.append(valores[hay], np.nan)
+    i = np.searchsorted(periodos, meses, side="right") - 1
+    if nombre and len(meses) and i[0] < 0:
+        desde = periodos[0] if len(periodos) else "—"
+        raise ValueError(f"{nombre}: no hay datos para {meses[0]} (la serie empieza en {desde}).")
+    return valores[i]
+
+
+def valores_por_mes(meses, serie=None, hora_upacp=None, mensual_upacp=None):
+    """
+    {columna: arreglo por mes} con la CBA GBA, la canasta de crianza INDEC
+    ({grupo}_Total) y los valores UPACP vigentes en cada uno de `meses`.
+
+    La CBA y la canasta INDEC salen de la serie histórica (`serie`, por
+    defecto serie_historica()): para un mes todavía no publicado se usa el
+    último valor publicado. La canasta INDEC es sólo de referencia y queda
+    en NaN antes de su primera publicación. `hora_upacp` y `mensual_upacp`
+    pueden ser un valor único o uno por mes; por defecto, los de la escala
+    vigente en cada mes según el historial UPACP (ValueError si algún mes
+    es anterior a la primera escala registrada).
+    """
+    if serie is None:
+        from .historico import serie_historica
+
+        serie = serie_historica()
+
+    meses = np.asarray(meses, dtype="datetime64[M]")
+    if hora_upacp is None or mensual_upacp is None:
+        from .upacp import historial_upacp
+
+        hora_upacp, mensual_upacp = historial_upacp.valores(meses)
+        if np.isnan(hora_upacp).any():
+            raise ValueError(
+                f"UPACP: no hay escala vigente en {meses[np.isnan(hora_upacp)][0]} (el historial "
+                f"empieza en {historial_upacp.desde()}). Importar las escalas anteriores con "
+                "`python -m crianza.upacp importar`."
+            )
+
+    valores = {
+        "Fecha": meses,
+        "CBA_GBA": _vigente(serie.periodos, serie.columnas["CBA_GBA"], meses, "CBA GBA"),
+        "hora_upacp": np.broadcast_to(np.asarray(hora_upacp, dtype="float64"), meses.shape),
+        "mensual_upacp": np.broadcast_to(np.asarray(mensual_upacp, dtype="float64"), meses.shape),
+    }
+    for g in GRUPOS_INDEC:
+        valores[f"{g}_Total"] = _vigente(serie.periodos, serie.columnas[f"{g}_Total"], meses)
+    return valores
+
+
+def costos_por_mes(cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+    """
+    Costo individual sin redondear (meses x grupos, en el orden de
+    GRUPOS_PBA). Mismas cuentas que costos_por_grupo_arr, un mes por fila.
+    """
+    gasto_ref = np.asarray(cba_gba, dtype="float64") * icg * ae
+    hora_24_mas = np.round(np.asarray(mensual_upacp, dtype="float64") / (6 * 30.5))
+    hora = np.broadcast_to(np.asarray(hora_upacp, dtype="float64"), gasto_ref.shape)
+    hora_24_mas = np.broadcast_to(hora_24_mas, gasto_ref.shape)
+
+    es_menor1 = np.array([g == "menor1" for g in GRUPOS_PBA])
+    valor_hora = np.where(es_menor1, hora_24_mas[:, None], hora[:, None])
+    bienes = np.array([escala_bienes[g] for g in GRUPOS_PBA]) * gasto_ref[:, None]
+    tiempo = np.array([horas_cuidado[g] for g in GRUPOS_PBA], dtype="float64") * valor_hora
+    return bienes + tiempo
+
+
+# ------------------------------------------------------------
+# 2. LÍNEAS DE TIEMPO (CASOS x MESES x NIÑOS)
+# ------------------------------------------------------------
+def edades_fin_de_mes(nacimientos, meses):
+    """
+    Años cumplidos al último día de cada mes (casos x meses x niños) para
+    una matriz casos x niños de fechas de nacimiento (datetime64[D], NaT de
+    relleno). Antes del mes de nacimiento queda NaN.
+    """
+    nac = np.asarray(nacimientos, dtype="datetime64[D]")
+    meses = np.asarray(meses, dtype="datetime64[M]")
+    fin = (meses + 1).astype("datetime64[D]") - 1
+
+    nac_mes = nac.astype("datetime64[M]")
+    nac_anio = nac.astype("datetime64[Y]").astype("int64")
+    nac_m = (nac_mes - nac.astype("datetime64[Y]")).astype("int64")
+    nac_dia = (nac - nac_mes).astype("int64")
+    anio = meses.astype("datetime64[Y]").astype("int64")
+    m = (meses - meses.astype("datetime64[Y]")).astype("int64")
+    dia = (fin - meses).astype("int64")
+
+    edades = (anio[None, :, None] - nac_anio[:, None, :]).astype("float64")
+    antes = (m[None, :, None] < nac_m[:, None, :]) | (
+        (m[None, :, None] == nac_m[:, None, :]) & (dia[None, :, None] < nac_dia[:, None, :])
+    )
+    edades -= antes
+    edades[~(nac[:, None, :] <= fin[None, :, None])] = np.nan  # NaT o todavía no nació
+    return edades
+
+
+def totales_mes(edades, total_g, en_periodo):
+    """
+    (total de cada caso y mes, niños/as que suman): como costo_crianza, con
+    el costo individual del mes (`total_g`, meses x grupos). Los meses
+    fuera de `en_periodo` (casos x meses) quedan en 0.
+    """
+    codigos = codigos_grupo(edades)
+    codigos[~en_periodo] = -1
+    hay = codigos >= 0
+    ninos = hay.sum(axis=2)
+    if ninos.max(initial=0) > len(FACTORES_ESCALA):
+        raise ValueError(f"Un hogar no puede tener más de {len(FACTORES_ESCALA)} niños/as.")
+
+    # celda vacía (código -1) -> última columna: costo 0 y último lugar
+    por_grupo = np.concatenate([total_g, np.zeros((len(total_g), 1))], axis=1)
+    individuales = por_grupo[np.arange(len(total_g))[None, :, None], codigos]
+    orden = np.argsort(np.where(hay, -individuales, np.inf), axis=2, kind="stable")
+    individuales = np.take_along_axis(individuales, orden, axis=2)
+
+    k = edades.shape[2]
+    factores = np.zeros(k)
+    factores[:min(k, len(FACTORES_ESCALA))] = FACTORES_ESCALA[:k]
+    return np.rint(individuales * factores).sum(axis=2).astype("int64"), ninos
+
+
+def _en_meses(valores, meses):
+    # valores_por_mes de un rango que cubre `meses` -> sólo esos meses
+    fechas = np.asarray(valores["Fecha"], dtype="datetime64[M]")
+    i = np.minimum(np.searchsorted(fechas, meses), max(len(fechas) - 1, 0))
+    if len(meses) and (not len(fechas) or (fechas[i] != meses).any()):
+        raise ValueError(f"Los valores no cubren todos los meses de {meses[0]} a {meses[-1]}.")
+    return {c: np.asarray(v)[i] for c, v in valores.items()}
+
+
+def _matriz_nacimientos(listas):
+    largos = np.fromiter((len(n) for n in listas), dtype="int64", count=len(listas))
+    m = np.full((len(listas), int(largos.max(initial=0))), np.datetime64("NaT"), dtype="datetime64[D]")
+    fechas = pd.to_datetime(pd.Series([f for n in listas for f in n], dtype="object"), errors="raise")
+    m[np.arange(m.shape[1]) < largos[:, None]] = fechas.to_numpy(dtype="datetime64[D]")
+    return m
+
+
+class LineasDeTiempo:
+    """
+    Costo mensual de muchos casos a la vez. Cada caso es un dict con
+    "nacimientos" (fechas), "desde" y "hasta" (meses inclusive) y,
+    opcionalmente, "caso" (identificador).
+
+    `totales` (casos x meses) tiene el costo de cada mes de `meses`, el
+    rango que cubre todos los casos; los meses fuera del período de cada
+    caso quedan en 0. `valores` son los de valores_por_mes (por defecto se
+    arman para esos meses; si se pasan, tienen que cubrirlos).
+    """
+
+    @registro.cronometrar("atrasos")
+    def __init__(self, casos, valores=None, icg=3.14, ae=1.7, tamanio=None):
+        casos = list(casos)
+        self.casos = [c.get("caso", i) for i, c in enumerate(casos)]
+        self.nacimientos = _matriz_nacimientos([list(c["nacimientos"]) for c in casos])
+        self.desde = np.array([meses_entre(c["desde"], c["desde"])[0] for c in casos], dtype="datetime64[M]")
+        self.hasta = np.array([meses_entre(c["hasta"], c["hasta"])[0] for c in casos], dtype="datetime64[M]")
+        if (self.hasta < self.desde).any():
+            raise ValueError("Hay casos con 'hasta' anterior a 'desde'.")
+
+        self.meses = meses_entre(self.desde.min(), self.hasta.max()) if casos else \
+            np.array([], dtype="datetime64[M]")
+        self.valores = valores_por_mes(self.meses) if valores is None else _en_meses(valores, self.meses)
+        total_g = costos_por_mes(
+            self.valores["CBA_GBA"], self.valores["hora_upacp"], self.valores["mensual_upacp"], icg, ae
+        )
+
+        n, m, k = len(casos), len(self.meses), max(self.nacimientos.shape[1], 1)
+        self.totales = np.zeros((n, m), dtype="int64")
+        self.ninos = np.zeros((n, m), dtype="int8")
+        tamanio = tamanio or max(ELEMENTOS_BLOQUE // max(m * k, 1), 1)
+        for i in range(0, n, tamanio):
+            bloque = slice(i, i + tamanio)
+            en_periodo = (self.meses >= self.desde[bloque, None]) & (self.meses <= self.hasta[bloque, None])
+            edades = edades_fin_de_mes(self.nacimientos[bloque], self.meses)
+            self.totales[bloque], self.ninos[bloque] = totales_mes(edades, total_g, en_periodo)
+
+    def __len__(self):
+        return len(self.casos)
+
+    def total(self):
+        """
+        Total del período de cada caso.
+        """
+        return self.totales.sum(axis=1)
+
+    def resumen(self):
+        """
+        Un caso por fila: período, meses con niños/as a cargo y total.
+        """
+        return pd.DataFrame({
+            "Caso": self.casos,
+            "Desde": self.desde.astype(str),
+            "Hasta": self.hasta.astype(str),
+            "Meses": (self.hasta - self.desde).astype("int64") + 1,
+            "Meses con niños/as": (self.ninos > 0).sum(axis=1),
+            "Total": self.total(),
+        })
+
+    def detalle(self, i):
+        """
+        Los meses del período del caso `i` (posición): edades y grupos de
+        cada niño/a, valores vigentes y costo del mes.
+        """
+        en_periodo = (self.meses >= self.desde[i]) & (self.meses <= self.hasta[i])
+        meses = self.meses[en_periodo]
+        edades = edades_fin_de_mes(self.nacimientos[i:i + 1], meses)[0]
+        codigos = codigos_grupo(edades)
+        grupos = np.array(GRUPOS_PBA + [None], dtype="object")[codigos]
+
+        def lista(fila, valores):
+            return ", ".join(str(v) for v, c in zip(valores, fila) if c >= 0)
+
+        df = pd.DataFrame({
+            "Mes": meses.astype(str),
+            "Edades": [lista(c, e) for c, e in zip(codigos, np.nan_to_num(edades).astype("int64"))],
+            "Grupos": [lista(c, g) for c, g in zip(codigos, grupos)],
+            "Niños/as": self.ninos[i, en_periodo],
+            "CBA GBA": self.valores["CBA_GBA"][en_periodo],
+            "Valor hora UPACP": self.valores["hora_upacp"][en_periodo],
+            "Salario mensual UPACP": self.valores["mensual_upacp"][en_periodo],
+            "Costo del mes": self.totales[i, en_periodo],
+        })
+        df["Acumulado"] = df["Costo del mes"].cumsum()
+        return df
+
+    def a_dataframe(self):
+        """
+        Un (caso, mes) por fila, sólo los meses del período de cada caso.
+        """
+        en_periodo = (self.meses >= self.desde[:, None]) & (self.meses <= self.hasta[:, None])
+        caso, mes = np.nonzero(en_periodo)
+        return pd.DataFrame({
+            "Caso": np.asarray(self.casos, dtype="object")[caso],
+            "Mes": self.meses[mes].astype(str),
+            "Niños/as": self.ninos[caso, mes],
+            "CBA GBA": self.valores["CBA_GBA"][mes],
+            "Valor hora UPACP": self.valores["hora_upacp"][mes],
+            "Salario mensual UPACP": self.valores["mensual_upacp"][mes],
+            "Costo del mes": self.totales[caso, mes],
+        })
+
+    def valores_mes(self):
+        """
+        Valores vigentes en cada mes (CBA, canasta INDEC por grupo y UPACP).
+        """
+        df = pd.DataFrame({c: v for c, v in self.valores.items() if c != "Fecha"})
+        df.index = pd.PeriodIndex(self.meses.astype(str), freq="M", name="Mes")
+        return df
+
+
+# ------------------------------------------------------------
+# 3. LÍNEA DE COMANDOS
+# ------------------------------------------------------------
+def leer_casos(ruta):
+    """
+    Casos desde un CSV con columnas caso, fechas_nacimiento ("AAAA-MM-DD"
+    separadas por ";"), desde y hasta ("AAAA-MM").
+    """
+    df = pd.read_csv(ruta, dtype=str).fillna("")
+    return [
+        {
+            "caso": fila["caso"],
+            "nacimientos": [f.strip() for f in fila["fechas_nacimiento"].split(";") if f.strip()],
+            "desde": fila["desde"],
+            "hasta": fila["hasta"],
+        }
+        for _, fila in df.iterrows()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atrasos mes por mes del costo de la crianza.")
+    parser.add_argument("casos", help="CSV con caso, fechas_nacimiento, desde y hasta")
+    parser.add_argument("salida", help="CSV con un (caso, mes) por fila")
+    parser.add_argument("--resumen", default=None, help="CSV con el total de cada caso")
+    args = parser.parse_args(argv)
+
+    lineas = LineasDeTiempo(leer_casos(args.casos))
+    lineas.a_dataframe().to_csv(args.salida, index=False)
+    resumen = lineas.resumen()
+    if args.resumen:
+        resumen.to_csv(args.resumen, index=False)
+    print(f"{len(lineas)} casos, {len(lineas.meses)} meses -> {args.salida}", file=sys.stderr)
+    print(f"Total: ${resumen['Total'].sum():,.0f}".replace(",", "."), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
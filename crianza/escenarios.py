@@ -0,0 +1,378 @@
+"""
+Barrido de escenarios de la metodología PBA: grillas de parámetros (icg,
+ae, CBA, UPACP, escalas y horas por grupo, factores de escala) evaluadas
+como una sola cuenta vectorizada por bloque de escenarios.
+
+    from crianza.escenarios import Barrido
+
+    barrido = Barrido(
+        {"icg": [3.0, 3.14, 3.3], "ae": {"desde": 1.5, "hasta": 1.9, "pasos": 5},
+         "horas_cuidado.menor1": [110, 129, 150]},
+        base={"cba_gba": 180_000, "hora_upacp": 3_500, "mensual_upacp": 430_000},
+        hogares=[[0, 5, 12], [3]],
+    )
+    resumen = barrido.a_parquet("escenarios.parquet")
+
+Cada fila de la salida es un escenario: sus parámetros, el costo individual
+de cada grupo (como costos_individuales_por_grupo) y el total de cada hogar
+de referencia (como costo_crianza). El resumen trae la sensibilidad de cada
+grupo y hogar a cada eje de la grilla y las elasticidades en el escenario
+base.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .metodologia import FACTORES_ESCALA, GRUPOS_PBA, escala_bienes, horas_cuidado
+from .metricas import registro
+from .motor import codigos_grupo, matriz_edades
+
+# ------------------------------------------------------------
+# 1. PARÁMETROS Y GRILLA
+# ------------------------------------------------------------
+ESCALARES = ["cba_gba", "icg", "ae", "hora_upacp", "mensual_upacp"]
+COLUMNAS = (
+    ESCALARES
+    + [f"escala_bienes.{g}" for g in GRUPOS_PBA]
+    + [f"horas_cuidado.{g}" for g in GRUPOS_PBA]
+    + [f"factor_escala.{i + 1}" for i in range(len(FACTORES_ESCALA))]
+)
+_POSICION = {c: i for i, c in enumerate(COLUMNAS)}
+HOGARES_REFERENCIA = [[0], [5], [8], [14], [0, 5], [3, 8, 14]]
+ELEMENTOS_BLOQUE = 4_000_000  # escenarios x hogares x niños por bloque
+
+
+def vector_base(base):
+    """
+    Vector de parámetros (en el orden de COLUMNAS) con los valores vigentes
+    de la metodología y los de `base` (cba_gba, hora_upacp y mensual_upacp
+    son obligatorios; icg y ae toman los valores por defecto).
+    """
+    valores = {"icg": 3.14, "ae": 1.7}
+    valores.update({f"escala_bienes.{g}": v for g, v in escala_bienes.items()})
+    valores.update({f"horas_cuidado.{g}": v for g, v in horas_cuidado.items()})
+    valores.update({f"factor_escala.{i + 1}": f for i, f in enumerate(FACTORES_ESCALA)})
+    for clave, valor in base.items():
+        if clave not in _POSICION:
+            raise ValueError(f"Parámetro desconocido: {clave!r}")
+        valores[clave] = valor
+
+    faltan = [c for c in COLUMNAS if c not in valores]
+    if faltan:
+        raise ValueError(f"Faltan parámetros base: {', '.join(faltan)}")
+    return np.array([valores[c] for c in COLUMNAS], dtype="float64")
+
+
+def _valores_eje(valores):
+    # lista de valores, o {"desde", "hasta", "pasos"} -> linspace
+    if isinstance(valores, dict):
+        return list(np.linspace(valores["desde"], valores["hasta"], int(valores["pasos"])))
+    return list(valores)
+
+
+def eje(nombre, valores):
+    """
+    (nombre, columnas, matriz n_valores x columnas) de un eje de la grilla.
+
+    `nombre` es un parámetro de COLUMNAS (un valor por punto), o bien
+    "escala_bienes" / "horas_cuidado" (cada punto, un dict grupo -> valor
+    con los grupos que cambian) o "factores" (cada punto, una lista de
+    factores por orden de costo; el último se repite hasta completar).
+    """
+    valores = _valores_eje(valores)
+    if not valores:
+        raise ValueError(f"El eje {nombre!r} no tiene valores.")
+
+    if nombre in _POSICION:
+        return nombre, [_POSICION[nombre]], np.array(valores, dtype="float64")[:, None]
+
+    if nombre in ("escala_bienes", "horas_cuidado"):
+        grupos = sorted({g for v in valores for g in v}, key=GRUPOS_PBA.index)
+        columnas = [_POSICION[f"{nombre}.{g}"] for g in grupos]
+        base = escala_bienes if nombre == "escala_bienes" else horas_cuidado
+        matriz = np.array([[v.get(g, base[g]) for g in grupos] for v in valores], dtype="float64")
+        return nombre, columnas, matriz
+
+    if nombre == "factores":
+        n = len(FACTORES_ESCALA)
+        matriz = np.array([(list(v) + [v[-1]] * n)[:n] for v in valores], dtype="float64")
+        return nombre, [_POSICION[f"factor_escala.{i + 1}"] for i in range(n)], matriz
+
+    raise ValueError(f"Eje desconocido: {nombre!r}")
+
+
+# ------------------------------------------------------------
+# 2. EVALUACIÓN VECTORIZADA
+# ------------------------------------------------------------
+def costos_grupo(P):
+    """
+    Costo individual sin redondear (escenarios x grupos) para una matriz de
+    parámetros escenarios x COLUMNAS. Mismas cuentas que costos_por_grupo_arr.
+    """
+    n_g = len(GRUPOS_PBA)
+    cba, icg, ae, hora, mensual = (P[:, _POSICION[c]] for c in ESCALARES)
+    escala = P[:, _POSICION[f"escala_bienes.{GRUPOS_PBA[0]}"]:][:, :n_g]
+    horas = P[:, _POSICION[f"horas_cuidado.{GRUPOS_PBA[0]}"]:][:, :n_g]
+
+    valor_hora = np.repeat(hora[:, None], n_g, axis=1)
+    valor_hora[:, GRUPOS_PBA.index("menor1")] = np.round(mensual / (6 * 30.5))
+    return escala * (cba * icg * ae)[:, None] + horas * valor_hora
+
+
+def totales_hogares(P, total_g, codigos):
+    """
+    Total de cada hogar (escenarios x hogares) como en costo_crianza: orden
+    descendente por costo individual, factores de escala del escenario y
+    redondeo por niño/a.
+    """
+    k = codigos.shape[1]
+    if k > len(FACTORES_ESCALA):
+        raise ValueError(f"Un hogar no puede tener más de {len(FACTORES_ESCALA)} niños/as.")
+
+    # El orden de los niños/as sólo depende del ranking de los grupos en
+    # cada escenario, y en una grilla hay pocos rankings distintos: se ordena
+    # una vez por ranking en lugar de una vez por escenario y hogar.
+    n_g = total_g.shape[1]
+    rangos = np.empty((len(P), n_g), dtype="int64")
+    np.put_along_axis(rangos, np.argsort(-total_g, axis=1, kind="stable"), np.arange(n_g), axis=1)
+    claves, cual = np.unique(rangos @ (n_g ** np.arange(n_g)), return_inverse=True)
+
+    # celda vacía (código -1) -> última columna: costo 0 y último lugar
+    por_grupo = np.concatenate([total_g, np.zeros((len(P), 1))], axis=1)
+    individuales = np.empty((len(P),) + codigos.shape)
+    for i in range(len(claves)):
+        filas = np.flatnonzero(cual == i)
+        rango = np.append(rangos[filas[0]], n_g)
+        orden = np.argsort(rango[codigos], axis=1, kind="stable")
+        individuales[filas] = por_grupo[filas][:, np.take_along_axis(codigos, orden, axis=1)]
+
+    factores = P[:, _POSICION["factor_escala.1"]:][:, :k]
+    return np.rint(individuales * factores[:, None, :]).sum(axis=2)
+
+
+def evaluar(P, codigos, parametros=COLUMNAS):
+    """
+    {columna: arreglo} con los `parametros` pedidos, el costo individual de
+    cada grupo y el total de cada hogar (en pesos enteros) para los
+    escenarios de P.
+    """
+    total_g = costos_grupo(P)
+    resultado = {c: P[:, _POSICION[c]] for c in parametros}
+    resultado.update({f"costo.{g}": np.rint(total_g[:, j]).astype("int64") for j, g in enumerate(GRUPOS_PBA)})
+    totales = totales_hogares(P, total_g, codigos).astype("int64")
+    resultado.update({f"hogar.{h}": totales[:, h] for h in range(codigos.shape[0])})
+    return resultado
+
+
+# ------------------------------------------------------------
+# 3. BARRIDO, SENSIBILIDAD Y ELASTICIDADES
+# ------------------------------------------------------------
+class Barrido:
+    """
+    Producto cartesiano de los ejes de `grilla` sobre el escenario `base`,
+    evaluado de a bloques: nunca se arma la grilla entera en memoria.
+    """
+
+    def __init__(self, grilla, base, hogares=None):
+        self.base = vector_base(base)
+        self.ejes = [eje(nombre, valores) for nombre, valores in grilla.items()]
+        self.tamanios = np.array([len(m) for _, _, m in self.ejes], dtype="int64")
+        # el último eje es el que varía más rápido
+        self.pasos = np.ones(len(self.ejes), dtype="int64")
+        for i in range(len(self.ejes) - 2, -1, -1):
+            self.pasos[i] = self.pasos[i + 1] * self.tamanios[i + 1]
+        self.hogares = [list(h) for h in (HOGARES_REFERENCIA if hogares is None else hogares)]
+        self.codigos = codigos_grupo(matriz_edades(self.hogares))
+        # sólo los parámetros que cambian van a la salida; el resto es la base
+        cambian = {c for _, columnas, _ in self.ejes for c in columnas}
+        self.variables = [c for i, c in enumerate(COLUMNAS) if i in cambian]
+
+    @property
+    def n_escenarios(self):
+        return int(self.tamanios.prod())
+
+    def parametros(self, desde, hasta):
+        """
+        Matriz de parámetros de los escenarios [desde, hasta) y la posición
+        de cada uno en cada eje.
+        """
+        indices = np.arange(desde, hasta, dtype="int64")
+        posiciones = (indices[:, None] // self.pasos) % self.tamanios
+        P = np.repeat(self.base[None, :], len(indices), axis=0)
+        for i, (_, columnas, matriz) in enumerate(self.ejes):
+            P[:, columnas] = matriz[posiciones[:, i]]
+        return P, posiciones
+
+    def bloques(self, tamanio=None):
+        """
+        Itera (posiciones, resultado de evaluar) por bloque de escenarios.
+        """
+        if tamanio is None:
+            celdas = max(self.codigos.size, 1)
+            tamanio = max(ELEMENTOS_BLOQUE // celdas, 1)
+        for desde in range(0, self.n_escenarios, tamanio):
+            P, posiciones = self.parametros(desde, min(desde + tamanio, self.n_escenarios))
+            yield posiciones, evaluar(P, self.codigos, self.variables)
+
+    @registro.cronometrar("barrido_escenarios")
+    def a_parquet(self, ruta, tamanio=None):
+        """
+        Escribe un escenario por fila en `ruta` (un row group por bloque) y
+        devuelve el resumen (ver resumir). Los parámetros que no cambian y
+        los hogares de referencia quedan en los metadatos del archivo
+        (clave "crianza").
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        metadatos = {"crianza": json.dumps({
+            "base": dict(zip(COLUMNAS, self.base.tolist())), "hogares": self.hogares,
+        })}
+        escritor = None
+        acumulado = _Acumulador(self)
+        try:
+            for posiciones, resultado in self.bloques(tamanio):
+                acumulado.sumar(posiciones, resultado)
+                tabla = pa.table({"escenario": np.arange(acumulado.n - len(posiciones), acumulado.n),
+                                  **resultado}, metadata=metadatos)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(ruta, tabla.schema)
+                escritor.write_table(tabla)
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return self.resumir(acumulado)
+
+    def resumir(self, acumulado=None):
+        """
+        {"escenarios", "sensibilidad", "elasticidades"}.
+
+        sensibilidad: por eje y salida (costo de cada grupo y total de cada
+        hogar), el rango de la media marginal a lo largo del eje, relativo a
+        la media general (efecto principal). elasticidades: d ln(salida) /
+        d ln(parámetro) en el escenario base, para cada parámetro numérico.
+        """
+        if acumulado is None:
+            acumulado = _Acumulador(self)
+            for posiciones, resultado in self.bloques():
+                acumulado.sumar(posiciones, resultado)
+        return {
+            "escenarios": acumulado.n,
+            "sensibilidad": acumulado.sensibilidad(),
+            "elasticidades": elasticidades(self.base, self.hogares),
+        }
+
+
+class _Acumulador:
+    # sumas por valor de cada eje, para las medias marginales
+    def __init__(self, barrido):
+        self.barrido = barrido
+        self.salidas = [f"costo.{g}" for g in GRUPOS_PBA] + \
+            [f"hogar.{h}" for h in range(len(barrido.hogares))]
+        self.sumas = [np.zeros((n, len(self.salidas))) for n in barrido.tamanios]
+        self.total = np.zeros(len(self.salidas))
+        self.n = 0
+
+    def sumar(self, posiciones, resultado):
+        salidas = np.column_stack([resultado[s] for s in self.salidas]).astype("float64")
+        m = salidas.shape[1]
+        for i, sumas in enumerate(self.sumas):
+            # una sola pasada por eje: celda (valor del eje, salida)
+            celdas = (posiciones[:, i, None] * m + np.arange(m)).ravel()
+            sumas += np.bincount(celdas, weights=salidas.ravel(), minlength=sumas.size).reshape(sumas.shape)
+        self.total += salidas.sum(axis=0)
+        self.n += len(posiciones)
+
+    def sensibilidad(self):
+        filas = {}
+        media = self.total / max(self.n, 1)
+        for (nombre, _, _), n, sumas in zip(self.barrido.ejes, self.barrido.tamanios, self.sumas):
+            marginal = sumas / (self.n / n)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                filas[nombre] = (marginal.max(axis=0) - marginal.min(axis=0)) / media
+        return pd.DataFrame(filas, index=self.salidas).T
+
+
+def elasticidades(base, hogares=None, paso=0.01):
+    """
+    Elasticidad de cada salida respecto de cada parámetro numérico en el
+    escenario `base` (dict o vector de parámetros), por diferencias
+    centradas de ±`paso` relativo. Filas: parámetros; columnas: costo de
+    cada grupo y total de cada hogar.
+    """
+    base = vector_base(base) if isinstance(base, dict) else np.asarray(base, dtype="float64")
+    hogares = [list(h) for h in (HOGARES_REFERENCIA if hogares is None else hogares)]
+    codigos = codigos_grupo(matriz_edades(hogares))
+
+    # los factores de escala no se perturban: son un esquema, no un monto
+    parametros = [c for c in COLUMNAS if not c.startswith("factor_escala.") and base[_POSICION[c]]]
+    P = np.repeat(base[None, :], 2 * len(parametros), axis=0)
+    for i, c in enumerate(parametros):
+        P[2 * i, _POSICION[c]] *= 1 + paso
+        P[2 * i + 1, _POSICION[c]] *= 1 - paso
+
+    # sin redondear: el redondeo a pesos haría saltos en la derivada
+    total_g = costos_grupo(P)
+    por_grupo = np.concatenate([total_g, np.zeros((len(P), 1))], axis=1)
+    individuales = -np.sort(-por_grupo[:, codigos], axis=2)
+    factores = P[:, _POSICION["factor_escala.1"]:][:, :codigos.shape[1]]
+    totales = (individuales * factores[:, None, :]).sum(axis=2)
+
+    salidas = np.column_stack([total_g, totales])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        e = (np.log(salidas[0::2]) - np.log(salidas[1::2])) / (np.log1p(paso) - np.log1p(-paso))
+    columnas = [f"costo.{g}" for g in GRUPOS_PBA] + [f"hogar.{h}" for h in range(len(hogares))]
+    return pd.DataFrame(e, index=parametros, columns=columnas)
+
+
+# ------------------------------------------------------------
+# 4. LÍNEA DE COMANDOS
+# ------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de escenarios de la metodología PBA.")
+    parser.add_argument("grilla", help='JSON con los ejes, p. ej. {"icg": [3, 3.14], "ae": [1.6, 1.7]}')
+    parser.add_argument("salida", help="Parquet con un escenario por fila")
+    parser.add_argument("--hogares", default=None,
+                        help="hogares de referencia: edades separadas por ',' y hogares por ';'")
+    parser.add_argument("--base", default=None,
+                        help="JSON con cba_gba, hora_upacp y mensual_upacp (por defecto, los vigentes)")
+    args = parser.parse_args(argv)
+
+    with open(args.grilla, encoding="utf-8") as f:
+        grilla = json.load(f)
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+    else:
+        from .fuentes import Refrescador
+
+        p = Refrescador().datos()["tabla"].parametros
+        base = {c: p[c] for c in ("cba_gba", "hora_upacp", "mensual_upacp")}
+    hogares = None
+    if args.hogares:
+        hogares = [[float(e) for e in h.split(",")] for h in args.hogares.split(";")]
+
+    barrido = Barrido(grilla, base, hogares)
+    resumen = barrido.a_parquet(args.salida)
+    with open(f"{args.salida}.resumen.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "escenarios": resumen["escenarios"],
+            "base": dict(zip(COLUMNAS, barrido.base.tolist())),
+            "hogares": barrido.hogares,
+            "sensibilidad": json.loads(resumen["sensibilidad"].to_json(orient="index")),
+            "elasticidades": json.loads(resumen["elasticidades"].to_json(orient="index")),
+        }, f, ensure_ascii=False, indent=2)
+
+    with pd.option_context("display.width", 160, "display.max_columns", None, "display.precision", 3):
+        print(f"{resumen['escenarios']} escenarios -> {args.salida}\n", file=sys.stderr)
+        print("Sensibilidad (rango de la media marginal / media):", file=sys.stderr)
+        print(resumen["sensibilidad"], "\n", file=sys.stderr)
+        print("Elasticidades en el escenario base:", file=sys.stderr)
+        print(resumen["elasticidades"], file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
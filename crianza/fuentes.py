@@ -0,0 +1,582 @@
+"""
+Orquestación de las fuentes: descarga concurrente con plazos, cortacircuitos
+por fuente con último valor válido persistido, calendario de publicación de
+cada fuente y refresco en segundo plano del último juego de datos válido.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from .indec import GRUPOS_INDEC, obtener_canasta_crianza_indec, obtener_cba_gba_indec
+from .metricas import registro
+from .motor import TablaComposiciones
+from .red import CACHE_DIR, bloqueo_host
+from .upacp import obtener_upacp
+
+# ------------------------------------------------------------
+# 1. DESCARGA CONCURRENTE DE FUENTES
+# ------------------------------------------------------------
+TIMEOUT_FUENTE = 30  # segundos máximos por fuente
+TIMEOUT_TOTAL = 45   # segundos máximos para el conjunto
+
+FUENTES = {
+    "cba": obtener_cba_gba_indec,
+    "upacp": obtener_upacp,
+    "crianza": obtener_canasta_crianza_indec,
+}
+
+
+@registro.cronometrar()
+def obtener_fuentes(fuentes=None, timeout_fuente=TIMEOUT_FUENTE, timeout_total=TIMEOUT_TOTAL):
+    """
+    Ejecuta todas las fuentes en paralelo (un hilo por fuente).
+
+    Cada fuente tiene su propio plazo (`timeout_fuente`, contado desde que
+    empieza a ejecutarse) y el conjunto un plazo global (`timeout_total`).
+    Devuelve {nombre: {"valor", "error", "segundos"}}; si una fuente falla
+    o vence su plazo, "valor" es None y "error" describe el problema.
+    """
+    fuentes = FUENTES if fuentes is None else fuentes
+    inicios = {}
+    fines = {}
+
+    def ejecutar(nombre, fn):
+        inicios[nombre] = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            fines[nombre] = time.perf_counter()
+
+    t0 = time.perf_counter()
+    limite_total = t0 + timeout_total
+    ex = ThreadPoolExecutor(max_workers=len(fuentes), thread_name_prefix="fuente")
+    futuros = {ex.submit(ejecutar, nombre, fn): nombre for nombre, fn in fuentes.items()}
+    pendientes = set(futuros)
+    vencidos = set()
+
+    try:
+        while pendientes:
+            ahora = time.perf_counter()
+            limites = {
+                f: min(limite_total, inicios.get(futuros[f], ahora) + timeout_fuente)
+                for f in pendientes
+            }
+            for f, limite in limites.items():
+                if ahora >= limite:
+                    vencidos.add(f)
+            pendientes -= vencidos
+            if not pendientes:
+                break
+            espera = min(limites[f] for f in pendientes) - ahora
+            _, pendientes = wait(pendientes, timeout=max(espera, 0), return_when=FIRST_COMPLETED)
+    finally:
+        # No esperamos a los hilos vencidos: siguen en segundo plano y se descartan.
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    resultados = {}
+    for f, nombre in futuros.items():
+        inicio = inicios.get(nombre, t0)
+        if f in vencidos:
+            resultados[nombre] = {
+                "valor": None,
+                "error": f"Tiempo de espera agotado ({nombre})",
+                "segundos": time.perf_counter() - inicio,
+            }
+            continue
+
+        error = f.exception()
+        resultados[nombre] = {
+            "valor": None if error else f.result(),
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "segundos": fines.get(nombre, time.perf_counter()) - inicio,
+        }
+
+    return resultados
+
+
+def fmt_tiempos(resultados):
+    """
+    Resumen legible de la duración de cada fuente: 'cba 1,2 s · upacp 0,8 s'.
+    """
+    partes = []
+    for nombre, res in resultados.items():
+        seg = f"{res['segundos']:.1f}".replace(".", ",")
+        partes.append(f"{nombre} {seg} s" + (" (error)" if res["error"] else ""))
+    return " · ".join(partes)
+
+
+# ------------------------------------------------------------
+# 2. VALIDACIÓN, ÚLTIMO VALOR VÁLIDO Y CORTACIRCUITOS
+# ------------------------------------------------------------
+INTERVALO_REFRESCO = 6*60*60  # 6 horas entre consultas de fuentes sin calendario
+REINTENTO_REFRESCO = 5*60     # 5 minutos tras un refresco fallido
+FALLOS_APERTURA = 3           # fallos seguidos que abren el circuito de una fuente
+ULTIMOS_DIR = CACHE_DIR / "ultimos_validos"
+
+
+def validar_fuente(nombre, valor):
+    """
+    Controla el valor de una fuente antes de publicarlo o guardarlo.
+    """
+    if nombre == "cba":
+        fecha, cba_gba = valor
+        montos, fechas = [cba_gba], [fecha]
+    elif nombre == "upacp":
+        montos, fechas = list(valor), []
+    elif nombre == "crianza":
+        montos = [valor[g][c] for g in GRUPOS_INDEC for c in ("ByS", "TC", "Total")]
+        fechas = [valor["Fecha"]]
+    else:
+        return
+
+    if not all(np.isfinite(m) and m > 0 for m in montos):
+        raise ValueError(f"Valor de {nombre} descartado: hay montos faltantes o no positivos.")
+    if any(pd.isna(f) for f in fechas):
+        raise ValueError(f"Valor de {nombre} descartado: falta la fecha de referencia.")
+
+
+def validar_fuentes(valores):
+    """
+    Controla que un refresco esté completo antes de publicarlo.
+    """
+    for nombre in ("cba", "upacp", "crianza"):
+        validar_fuente(nombre, valores[nombre])
+
+
+def _a_json(v):
+    if isinstance(v, pd.Timestamp):
+        return {"__fecha__": v.isoformat()}
+    raise TypeError(f"No se puede guardar {type(v).__name__}")
+
+
+def _desde_json(d):
+    return pd.Timestamp(d["__fecha__"]) if "__fecha__" in d else d
+
+
+def _escribir_json(ruta, datos):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(json.dumps(datos, default=_a_json), encoding="utf-8")
+    os.replace(tmp, ruta)
+
+
+def _leer_json(ruta):
+    try:
+        return json.loads(ruta.read_text(encoding="utf-8"), object_hook=_desde_json)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class UltimosValidos:
+    """
+    Último valor validado de cada fuente, en disco (un JSON por fuente):
+    sobrevive a reinicios y se comparte entre los procesos del host.
+    """
+
+    def __init__(self, directorio=ULTIMOS_DIR):
+        self.directorio = Path(directorio)
+
+    def guardar(self, nombre, valor):
+        _escribir_json(self.directorio / f"{nombre}.json", {
+            "valor": valor,
+            "ts": datetime.now(ZoneInfo("America/Argentina/Buenos_Aires")).isoformat(),
+        })
+
+    def leer(self, nombre):
+        """
+        {"valor", "ts"} o None si la fuente nunca se validó.
+        """
+        guardado = _leer_json(self.directorio / f"{nombre}.json")
+        if guardado is None:
+            return None
+        guardado["ts"] = datetime.fromisoformat(guardado["ts"])
+        # JSON no tiene tuplas: cba y upacp vuelven como listas y no serían
+        # iguales al mismo valor recién descargado
+        if isinstance(guardado["valor"], list):
+            guardado["valor"] = tuple(guardado["valor"])
+        return guardado
+
+
+class Cortacircuitos:
+    """
+    Circuito de una fuente. Tras `umbral` fallos seguidos (error, plazo
+    vencido o valor inválido) se abre: la fuente no se consulta durante
+    `enfriamiento` segundos, y después se deja pasar un solo sondeo. Si el
+    sondeo anda se cierra; si falla, vuelve a abrirse.
+
+    El estado se guarda en disco y se comparte entre los procesos del host:
+    un proceso nuevo no vuelve a esperar el plazo de una fuente caída, y
+    cada cambio lee, modifica y escribe con un lock de archivo tomado, así
+    que no se pierden fallos de otras réplicas y el sondeo lo toma una sola
+    (al tomarlo corre el enfriamiento para las demás).
+    """
+
+    def __init__(self, nombre, umbral=FALLOS_APERTURA, enfriamiento=REINTENTO_REFRESCO, ruta=None):
+        self.nombre = nombre
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.ruta = Path(ruta) if ruta else None
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self._lock = threading.Lock()
+        self._leer()
+
+    @contextmanager
+    def _cambio(self):
+        # lock del proceso y del host; el estado se relee adentro
+        with self._lock, (bloqueo_host(self.ruta) if self.ruta else nullcontext()):
+            self._leer()
+            yield
+
+    def _leer(self):
+        if self.ruta:
+            estado = _leer_json(self.ruta) or {}
+            self.fallos = estado.get("fallos", 0)
+            self.abierto_hasta = estado.get("abierto_hasta", 0.0)
+
+    @property
+    def abierto(self):
+        return self.fallos >= self.umbral
+
+    def permitir(self):
+        """
+        True si la fuente se puede consultar ahora (cerrado, o abierto con
+        el enfriamiento cumplido: sondeo). Quien toma el sondeo corre el
+        enfriamiento, así que hasta que termine nadie más lo toma.
+        """
+        with self._cambio():
+            if not self.abierto:
+                return True
+            ahora = time.time()
+            if ahora >= self.abierto_hasta:
+                self.abierto_hasta = ahora + self.enfriamiento
+                self._guardar()
+                return True
+        registro.sumar("crianza_circuito_total", fuente=self.nombre, evento="rechazo")
+        return False
+
+    def exito(self):
+        with self._cambio():
+            if self.fallos:
+                self.fallos = 0
+                self.abierto_hasta = 0.0
+                self._guardar()
+
+    def fallo(self):
+        with self._cambio():
+            self.fallos += 1
+            if self.abierto:
+                self.abierto_hasta = time.time() + self.enfriamiento
+                registro.sumar("crianza_circuito_total", fuente=self.nombre, evento="apertura")
+            self._guardar()
+
+    def proximo_sondeo(self):
+        """
+        Segundos hasta que el circuito deje pasar un sondeo (0 si está cerrado).
+        """
+        return max(self.abierto_hasta - time.time(), 0.0) if self.abierto else 0.0
+
+    def _guardar(self):
+        if self.ruta:
+            _escribir_json(self.ruta, {"fallos": self.fallos, "abierto_hasta": self.abierto_hasta})
+
+
+# ------------------------------------------------------------
+# 3. CALENDARIO DE PUBLICACIÓN (CUÁNDO VOLVER A CONSULTAR)
+# ------------------------------------------------------------
+ZONA = ZoneInfo("America/Argentina/Buenos_Aires")
+
+# INDEC publica la CBA y la canasta de crianza del mes M entre el 11 y el 15
+# de M+1, por la tarde. UPACP cambia la escala con cada resolución, que
+# suele regir desde los primeros días del mes. Dentro de la ventana (días del
+# mes) se consulta cada `en_ventana` segundos; fuera, a lo sumo cada `fuera`;
+# si la ventana de INDEC pasó sin el mes nuevo, cada `atrasada`.
+CALENDARIO = {
+    "cba": {"ventana": (11, 20), "en_ventana": 6*60*60, "fuera": 7*24*60*60, "atrasada": 6*60*60},
+    "crianza": {"ventana": (11, 20), "en_ventana": 6*60*60, "fuera": 7*24*60*60, "atrasada": 6*60*60},
+    "upacp": {"ventana": (1, 5), "en_ventana": 12*60*60, "fuera": 3*24*60*60},
+}
+
+
+def periodo_fuente(nombre, valor):
+    """
+    Último período (primer día del mes) que trae el valor de una fuente, o
+    None si la fuente no informa período (UPACP).
+    """
+    if nombre == "cba":
+        fecha = valor[0]
+    elif nombre == "crianza":
+        fecha = valor["Fecha"]
+    else:
+        return None
+    fecha = pd.Timestamp(fecha)
+    return fecha.year, fecha.month
+
+
+def _dia(anio, mes, dia):
+    """
+    Epoch del comienzo del día `dia` del mes (`mes` puede pasarse de 12).
+    """
+    anio, mes = anio + (mes - 1) // 12, (mes - 1) % 12 + 1
+    return datetime(anio, mes, dia, tzinfo=ZONA).timestamp()
+
+
+def proxima_consulta(nombre, valor, consultada, calendario=None, intervalo=INTERVALO_REFRESCO):
+    """
+    Epoch en que conviene volver a consultar la fuente `nombre`, consultada
+    por última vez en `consultada` (epoch) con resultado `valor`.
+
+    Para INDEC, el último período del valor dice qué mes falta y en qué
+    ventana se publicaría: el mes M sale en la ventana de M+1, así que con
+    datos hasta M se espera a la ventana de M+2. Para UPACP, que no trae
+    período, la ventana es la de todos los meses. Las fuentes que no están
+    en el calendario se consultan cada `intervalo` segundos.
+    """
+    cal = (CALENDARIO if calendario is None else calendario).get(nombre)
+    if cal is None:
+        return consultada + intervalo
+
+    dia_desde, dia_hasta = cal["ventana"]
+    tope = consultada + cal["fuera"]
+    periodo = periodo_fuente(nombre, valor)
+
+    if periodo is None:
+        hoy = datetime.fromtimestamp(consultada, ZONA)
+        if dia_desde <= hoy.day <= dia_hasta:
+            return min(consultada + cal["en_ventana"], tope)
+        mes = hoy.month + (hoy.day > dia_hasta)
+        return min(_dia(hoy.year, mes, dia_desde), tope)
+
+    anio, mes = periodo
+    abre = _dia(anio, mes + 2, dia_desde)
+    cierra = _dia(anio, mes + 2, dia_hasta) + 24*60*60
+    if consultada < abre:
+        return min(abre, tope)
+    if consultada < cierra:
+        return consultada + cal["en_ventana"]
+    return consultada + cal["atrasada"]
+
+
+# ------------------------------------------------------------
+# 4. REFRESCO EN SEGUNDO PLANO (stale-while-revalidate)
+# ------------------------------------------------------------
+def version_datos(tabla, valores, vencidas):
+    """
+    Id de un juego de datos publicado: la versión de la tabla (CBA, UPACP y
+    metodología), la canasta de crianza y qué fuentes están vencidas. Dos
+    refrescos con los mismos datos dan el mismo id.
+    """
+    clave = json.dumps([tabla.version, valores["crianza"], sorted(vencidas)], sort_keys=True, default=str)
+    return hashlib.blake2b(clave.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class Refrescador:
+    """
+    Mantiene en memoria el último juego de datos válido de todas las fuentes
+    y lo renueva en un hilo de fondo. Mientras un refresco está en curso (o
+    si falla) se sigue sirviendo el último valor bueno; sólo un refresco
+    completo y validado reemplaza al anterior.
+
+    Cada fuente se vuelve a consultar según su calendario de publicación
+    (proxima_consulta): las que todavía no pueden tener datos nuevos
+    conservan su valor sin descargar ni parsear. Al arrancar, una fuente
+    cuyo último valor válido guardado sigue al día según el calendario no se
+    consulta. refrescar_ya() consulta todas.
+
+    Cada fuente tiene su cortacircuitos. Si una fuente falla o su circuito
+    está abierto, se usa su último valor válido guardado en disco y queda
+    listada en datos()["vencidas"]; el hilo de fondo la vuelve a sondear
+    cada `reintento` segundos.
+    """
+
+    def __init__(self, fuentes=None, intervalo=INTERVALO_REFRESCO, reintento=REINTENTO_REFRESCO,
+                 ultimos=None, calendario=None):
+        self.fuentes = FUENTES if fuentes is None else fuentes
+        self.intervalo = intervalo
+        self.reintento = reintento
+        self.calendario = CALENDARIO if calendario is None else calendario
+        self.ultimo_error = None
+        self.ultimos = ultimos or UltimosValidos()
+        self.circuitos = {
+            nombre: Cortacircuitos(nombre, enfriamiento=reintento,
+                                   ruta=self.ultimos.directorio / f"{nombre}.circuito.json")
+            for nombre in self.fuentes
+        }
+        self._actual = None
+        self._proximas = {}  # nombre -> epoch de la próxima consulta
+        self._forzar = False
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def _proxima(self, nombre, valor, consultada):
+        return proxima_consulta(nombre, valor, consultada, self.calendario, self.intervalo)
+
+    def _al_dia(self, forzar):
+        """
+        {nombre: valor} de las fuentes que no hace falta consultar todavía:
+        el valor publicado o, al arrancar, el último válido guardado.
+        """
+        if forzar:
+            return {}
+        ahora = time.time()
+        actual = self._actual
+        al_dia = {}
+        for nombre in self.fuentes:
+            if actual is not None and nombre not in actual["vencidas"]:
+                if self._proximas.get(nombre, 0) > ahora:
+                    al_dia[nombre] = actual["valores"][nombre]
+            elif actual is None:
+                guardado = self.ultimos.leer(nombre)
+                if guardado is None:
+                    continue
+                proxima = self._proxima(nombre, guardado["valor"], guardado["ts"].timestamp())
+                if proxima > ahora:
+                    self._proximas[nombre] = proxima
+                    al_dia[nombre] = guardado["valor"]
+        return al_dia
+
+    def _valores(self, forzar=False):
+        """
+        (valores, resultados, vencidas): un valor por fuente, consultando
+        sólo las fuentes a las que les toca según el calendario (o todas con
+        `forzar`) y tienen el circuito cerrado (o en sondeo), y usando el
+        último valor válido para las que fallan.
+        """
+        al_dia = self._al_dia(forzar)
+        for nombre in al_dia:
+            registro.sumar("crianza_consulta_total", fuente=nombre, resultado="al_dia")
+        permitidas = {
+            n: fn for n, fn in self.fuentes.items()
+            if n not in al_dia and self.circuitos[n].permitir()
+        }
+        consultada = time.time()
+        resultados = obtener_fuentes(permitidas) if permitidas else {}
+
+        valores, vencidas, errores = {}, {}, []
+        for nombre in self.fuentes:
+            if nombre in al_dia:
+                valores[nombre] = al_dia[nombre]
+                continue
+            res = resultados.get(nombre)
+            if res is None:
+                error = f"Circuito abierto ({nombre})"
+            else:
+                error = res["error"]
+                if error is None:
+                    try:
+                        validar_fuente(nombre, res["valor"])
+                    except ValueError as e:
+                        error = str(e)
+                if error is None:
+                    self.circuitos[nombre].exito()
+                    self.ultimos.guardar(nombre, res["valor"])
+                    self._proximas[nombre] = self._proxima(nombre, res["valor"], consultada)
+                    registro.sumar("crianza_consulta_total", fuente=nombre, resultado="consultada")
+                    valores[nombre] = res["valor"]
+                    continue
+                self.circuitos[nombre].fallo()
+
+            guardado = self.ultimos.leer(nombre)
+            if guardado is None:
+                errores.append(error)
+                continue
+            registro.sumar("crianza_circuito_total", fuente=nombre, evento="ultimo_valido")
+            valores[nombre] = guardado["valor"]
+            vencidas[nombre] = {"error": error, "ts": guardado["ts"]}
+
+        if errores:
+            raise RuntimeError("; ".join(errores))
+        return valores, resultados, vencidas
+
+    @registro.cronometrar("refresco")
+    def refrescar(self, forzar=False):
+        """
+        Descarga las fuentes a las que les toca (todas con `forzar`), valida
+        y publica el resultado.
+        """
+        valores, resultados, vencidas = self._valores(forzar)
+        validar_fuentes(valores)
+
+        # Precálculo de todas las composiciones de hogar para esta versión
+        # (se reutiliza si la CBA y UPACP no cambiaron)
+        actual = self._actual
+        if actual is not None and all(valores[n] == actual["valores"][n] for n in ("cba", "upacp")):
+            tabla = actual["tabla"]
+        else:
+            (_, cba_gba), (valor_hora, mensual) = valores["cba"], valores["upacp"]
+            tabla = TablaComposiciones(cba_gba, valor_hora, mensual)
+
+        self._actual = {
+            "valores": valores,
+            "tabla": tabla,
+            "version": version_datos(tabla, valores, vencidas),
+            "ts": datetime.now(ZONA),
+            "tiempos": fmt_tiempos(resultados),
+            "vencidas": vencidas,
+            "proximas": {
+                n: datetime.fromtimestamp(t, ZONA) for n, t in self._proximas.items()
+                if n not in vencidas
+            },
+        }
+        return self._actual
+
+    def datos(self):
+        """
+        Último juego de datos válido. Sólo bloquea si todavía no hay ninguno
+        (arranque en frío); en ese caso espera al refresco en curso.
+        """
+        actual = self._actual
+        if actual is not None:
+            return actual
+
+        with self._lock:
+            if self._actual is None:
+                self.refrescar()
+        return self._actual
+
+    def refrescar_ya(self):
+        """
+        Pide al hilo de fondo consultar todas las fuentes ahora, sin esperar
+        al calendario.
+        """
+        self._forzar = True
+        self._despertar.set()
+
+    def espera(self):
+        """
+        Segundos hasta la próxima consulta de alguna fuente según el calendario.
+        """
+        proximas = [self._proximas.get(n, 0) for n in self.fuentes]
+        return max(min(proximas) - time.time(), 1.0)
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="refrescador", daemon=True)
+            self._hilo.start()
+        return self
+
+    def _bucle(self):
+        while True:
+            forzar, self._forzar = self._forzar, False
+            try:
+                with self._lock:
+                    vencidas = self.refrescar(forzar)["vencidas"]
+                self.ultimo_error = "; ".join(v["error"] for v in vencidas.values()) or None
+                espera = self.reintento if vencidas else self.espera()
+            except Exception as e:
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+                espera = self.reintento
+
+            self._despertar.wait(espera)
+            self._despertar.clear()
@@ -0,0 +1,220 @@
+"""
+Serie histórica completa (todos los meses) de las fuentes y del costo PBA
+por grupo etario.
+"""
+import numpy as np
+import pandas as pd
+
+from .indec import (
+    GRUPOS_INDEC,
+    URL_INDEC_CBA,
+    URL_INDEC_CRIANZA,
+    _columnas_canasta_crianza,
+    _columnas_cba_gba,
+)
+from .metodologia import GRUPOS_PBA, escala_bienes, horas_cuidado
+from .metricas import registro
+from .red import cache_http
+from .snapshots import series
+from .upacp import historial_upacp, obtener_upacp
+
+# ------------------------------------------------------------
+# SERIE HISTÓRICA COMPLETA (TODOS LOS MESES)
+# ------------------------------------------------------------
+def _version_vigente(url):
+    """
+    sha256 de la última versión descargada de `url`: sólo descarga si la
+    fuente nunca se bajó en este host.
+    """
+    entrada = cache_http.entrada(url) or cache_http.obtener(url)
+    return entrada["sha256"]
+
+
+class SerieHistorica:
+    """
+    Serie mensual completa: CBA GBA, canasta de crianza INDEC (ByS / TC /
+    Total) y costo PBA por grupo etario para cada mes, calculado en una sola
+    pasada vectorizada. Los períodos quedan ordenados, así que "el costo del
+    mes X" es una búsqueda binaria.
+
+    `hora_upacp` y `mensual_upacp` pueden ser un valor único o un arreglo
+    con un valor por período.
+    """
+
+    def __init__(self, cba, crianza, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+        self._fuentes(cba, crianza)
+        self.parametros = (hora_upacp, mensual_upacp, icg, ae)
+        self._calcular_pba(slice(None))
+
+    def _fuentes(self, cba, crianza):
+        meses_cba = np.asarray(cba["Fecha"]).astype("datetime64[M]")
+        meses_crianza = np.asarray(crianza["Fecha"]).astype("datetime64[M]")
+        self.periodos = np.union1d(meses_cba, meses_crianza)
+        self.columnas = {"CBA_GBA": self._alinear(meses_cba, cba["CBA_GBA"])}
+
+        for g in GRUPOS_INDEC:
+            for t in ("ByS", "TC", "Total"):
+                self.columnas[f"{g}_{t}"] = self._alinear(meses_crianza, crianza[f"{g}_{t}"])
+
+    def _calcular_pba(self, idx):
+        """
+        Costo PBA por grupo de los períodos `idx`: meses x grupos, mismas
+        cuentas que costos_individuales_por_grupo.
+        """
+        hora_upacp, mensual_upacp, icg, ae = self.parametros
+        gasto_ref = self.columnas["CBA_GBA"][idx] * icg * ae
+        hora = np.broadcast_to(np.asarray(hora_upacp, dtype="float64"), self.periodos.shape)[idx]
+        hora_24_mas = np.rint(np.asarray(mensual_upacp, dtype="float64") / (6 * 30.5))
+        hora_24_mas = np.broadcast_to(hora_24_mas, self.periodos.shape)[idx]
+
+        for g in GRUPOS_PBA:
+            bienes = escala_bienes[g] * gasto_ref
+            tiempo = horas_cuidado[g] * (hora_24_mas if g == "menor1" else hora)
+            for t, valores in (("ByS", bienes), ("TC", tiempo), ("Total", bienes + tiempo)):
+                columna = self.columnas.setdefault(f"{g}_{t}_PBA", np.empty(self.periodos.shape))
+                columna[idx] = np.rint(valores)
+
+    def actualizar(self, cba, crianza, tocados):
+        """
+        Serie para una versión nueva de las fuentes que sólo recalcula el
+        costo PBA de los períodos nuevos y de los `tocados` (revisados); el
+        resto se copia de esta serie. Con valores UPACP por período se
+        recalcula todo.
+        """
+        nueva = SerieHistorica.__new__(SerieHistorica)
+        nueva._fuentes(cba, crianza)
+        nueva.parametros = self.parametros
+        if any(np.ndim(p) for p in self.parametros):
+            nueva._calcular_pba(slice(None))
+            return nueva
+
+        previos = np.minimum(np.searchsorted(self.periodos, nueva.periodos), len(self) - 1)
+        existe = self.periodos[previos] == nueva.periodos if len(self) else np.zeros(len(nueva), bool)
+        existe &= ~np.isin(nueva.periodos, np.asarray(tocados, dtype="datetime64[M]"))
+        for c, valores in self.columnas.items():
+            if c.endswith("_PBA"):
+                nueva.columnas[c] = np.empty(nueva.periodos.shape)
+                nueva.columnas[c][existe] = valores[previos[existe]]
+
+        recalcular = np.flatnonzero(~existe)
+        nueva._calcular_pba(recalcular)
+        registro.sumar("crianza_periodos_recalculados_total", len(recalcular))
+        return nueva
+
+    def _alinear(self, meses, valores):
+        """
+        Lleva una columna de la fuente a los períodos de la serie (NaN donde
+        la fuente no tiene dato).
+        """
+        salida = np.full(self.periodos.shape, np.nan)
+        salida[np.searchsorted(self.periodos, meses)] = np.asarray(valores, dtype="float64")
+        return salida
+
+    def __len__(self):
+        return len(self.periodos)
+
+    def indice(self, periodo):
+        """
+        Posición del mes de `periodo` en la serie (KeyError si no está).
+        """
+        mes = np.datetime64(pd.Timestamp(periodo).strftime("%Y-%m"), "M")
+        i = int(np.searchsorted(self.periodos, mes))
+        if i == len(self.periodos) or self.periodos[i] != mes:
+            raise KeyError(f"Sin datos para el período {mes}")
+        return i
+
+    def en(self, periodo):
+        """
+        Valores de un mes, con las mismas formas que usa la app: "PBA" como
+        costos_individuales_por_grupo e "INDEC" como obtener_canasta_crianza_indec.
+        """
+        i = self.indice(periodo)
+        c = self.columnas
+        return {
+            "Fecha": pd.Timestamp(self.periodos[i]),
+            "CBA_GBA": float(c["CBA_GBA"][i]),
+            "PBA": {
+                g: {
+                    "Bienes": float(c[f"{g}_ByS_PBA"][i]),
+                    "Tiempo": float(c[f"{g}_TC_PBA"][i]),
+                    "Total": float(c[f"{g}_Total_PBA"][i]),
+                }
+                for g in GRUPOS_PBA
+            },
+            "INDEC": {
+                g: {t: float(c[f"{g}_{t}"][i]) for t in ("ByS", "TC", "Total")}
+                for g in GRUPOS_INDEC
+            },
+        }
+
+    def a_dataframe(self):
+        return pd.DataFrame(self.columnas, index=pd.DatetimeIndex(self.periodos, name="Fecha"))
+
+
+_ultima = {}  # parámetros -> ((versión cba, versión crianza), SerieHistorica)
+
+
+def _tocados(fuentes):
+    """
+    Períodos nuevos o revisados entre dos versiones de cada fuente, según la
+    última ingesta incremental; None si no se conocen (otro proceso ingirió
+    la versión, o desaparecieron períodos) y hay que recalcular todo.
+    """
+    tocados = []
+    for fuente, antes, ahora in fuentes:
+        if antes == ahora:
+            continue
+        cambios = series.cambios.get(fuente)
+        if (
+            cambios is None
+            or (cambios["desde"], cambios["version"]) != (antes, ahora)
+            or len(cambios["eliminados"])
+        ):
+            return None
+        tocados += [cambios["nuevos"], cambios["revisados"]]
+    return np.concatenate(tocados) if tocados else np.array([], dtype="datetime64[ns]")
+
+
+@registro.cronometrar()
+def serie_historica(hora_upacp=None, mensual_upacp=None, icg=3.14, ae=1.7):
+    """
+    Serie histórica a partir de las series ya ingeridas (sin volver a
+    descargar ni parsear los libros). Si no se indican valores UPACP, cada
+    mes usa la escala vigente según el historial de escalas UPACP (NaN en
+    el costo PBA de los meses anteriores a la primera escala registrada);
+    sólo se consulta la página si el historial está vacío.
+
+    Con los mismos parámetros, una versión nueva de INDEC sólo recalcula los
+    períodos que cambiaron respecto de la serie anterior.
+    """
+    versiones = (_version_vigente(URL_INDEC_CBA), _version_vigente(URL_INDEC_CRIANZA))
+    cba = _columnas_cba_gba(versiones[0])
+    crianza = _columnas_canasta_crianza(versiones[1])
+
+    clave = None
+    if hora_upacp is None or mensual_upacp is None:
+        if not historial_upacp.entradas():
+            obtener_upacp()  # registra la escala vigente
+        periodos = np.union1d(np.asarray(cba["Fecha"]).astype("datetime64[M]"),
+                              np.asarray(crianza["Fecha"]).astype("datetime64[M]"))
+        hora_upacp, mensual_upacp = historial_upacp.valores(periodos)
+        clave = ("historial", historial_upacp.version(), icg, ae)
+    elif not (np.ndim(hora_upacp) or np.ndim(mensual_upacp)):
+        clave = (float(hora_upacp), float(mensual_upacp), icg, ae)
+    previa = _ultima.get(clave)
+    if previa is not None and previa[0] == versiones:
+        return previa[1]
+
+    # con UPACP por mes cambian también los valores de los períodos nuevos
+    tocados = None
+    if previa is not None and clave[0] != "historial":
+        tocados = _tocados(zip(("cba_gba", "canasta_crianza"), previa[0], versiones))
+    if tocados is None:
+        serie = SerieHistorica(cba, crianza, hora_upacp, mensual_upacp, icg=icg, ae=ae)
+    else:
+        serie = previa[1].actualizar(cba, crianza, tocados)
+
+    if clave is not None:
+        _ultima.clear()
+        _ultima[clave] = (versiones, serie)
+    return serie
@@ -0,0 +1,363 @@
+"""
+Loaders INDEC: serie de la CBA GBA y canasta de crianza (ByS / TC / Total).
+"""
+import hashlib
+import json
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .metricas import registro
+from .red import CACHE_DIR, cache_http, vuelos
+from .snapshots import series
+
+URL_INDEC_CRIANZA = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_canasta_crianza.xlsx"
+URL_INDEC_CBA = "https://www.indec.gob.ar/ftp/cuadros/sociedad/serie_cba_cbt.xls"
+
+# ------------------------------------------------------------
+# 1. LECTURA DE LIBROS EXCEL EN STREAMING
+# ------------------------------------------------------------
+class CambioFormatoINDEC(ValueError):
+    """
+    El encabezado del libro INDEC cambió y ya no se pueden ubicar las
+    columnas esperadas.
+    """
+
+
+def filas_libro(contenido):
+    """
+    Itera las filas (tuplas de valores) de la primera hoja de un libro
+    .xlsx (openpyxl en modo sólo lectura) o .xls (xlrd), sin armar un
+    DataFrame. Las celdas vacías vienen como None.
+    """
+    if contenido[:4] == b"PK\x03\x04":
+        import openpyxl
+
+        libro = openpyxl.load_workbook(BytesIO(contenido), read_only=True, data_only=True)
+        try:
+            yield from libro.worksheets[0].iter_rows(values_only=True)
+        finally:
+            libro.close()
+        return
+
+    import xlrd
+
+    libro = xlrd.open_workbook(file_contents=contenido, on_demand=True)
+    hoja = libro.sheet_by_index(0)
+    for r in range(hoja.nrows):
+        fila = []
+        for celda in hoja.row(r):
+            if celda.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                fila.append(None)
+            elif celda.ctype == xlrd.XL_CELL_DATE:
+                fila.append(xlrd.xldate.xldate_as_datetime(celda.value, libro.datemode))
+            else:
+                fila.append(celda.value)
+        yield tuple(fila)
+
+
+def _vacia(v):
+    return v is None or (isinstance(v, str) and v.strip() == "")
+
+
+def _a_numero(v):
+    """
+    Equivalente por celda de pd.to_numeric(errors="coerce").
+    """
+    if isinstance(v, bool) or v is None:
+        return np.nan
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(str(v).strip())
+    except ValueError:
+        return np.nan
+
+
+# ------------------------------------------------------------
+# 2. DATOS INDEC – CBA GBA
+# ------------------------------------------------------------
+@registro.cronometrar()
+@vuelos.unico("cba_gba")
+def obtener_cba_gba_indec():
+    entrada = cache_http.obtener(URL_INDEC_CBA)
+    return _parsear_cba_gba(entrada["sha256"])
+
+
+@lru_cache(maxsize=4)  # por contenido: un 304 no vuelve a parsear
+def _parsear_cba_gba(sha256):
+    serie = _columnas_cba_gba(sha256)
+    return pd.Timestamp(serie["Fecha"][-1]), float(serie["CBA_GBA"][-1])
+
+
+registro.registrar_cache("parseo_cba_gba", _parsear_cba_gba)
+
+
+@registro.cronometrar("parseo_cba_gba")
+def _columnas_cba_gba(sha256):
+    """
+    Serie de la versión `sha256`, ingerida de forma incremental: sólo se
+    convierten las filas que no estaban en la versión anterior.
+    """
+    return series.obtener(
+        "cba_gba", sha256, lambda: _filas_cba_gba(cache_http.leer(sha256)), _convertir_cba_gba
+    )
+
+
+def _filas_cba_gba(contenido):
+    """
+    (nombres de columna, filas crudas (fecha, cba)) de las dos primeras
+    columnas del libro, leído fila por fila.
+    """
+    def crudas():
+        filas = filas_libro(contenido)
+
+        # 5 filas de títulos y luego el encabezado (la primera fila no vacía)
+        for i, fila in enumerate(filas):
+            if i >= 5 and not all(_vacia(v) for v in fila):
+                break
+
+        for fila in filas:
+            fila = tuple(fila) + (None, None)
+            if _vacia(fila[0]) or _vacia(fila[1]):
+                continue
+            yield fila[0], fila[1]
+
+    return ["CBA_GBA"], crudas()
+
+
+def _convertir_cba_gba(crudo):
+    fecha, cba = crudo
+    return pd.Timestamp(fecha).to_datetime64(), [float(cba)]
+
+
+def _serie_cba_gba(contenido):
+    """
+    Serie mensual completa de la CBA GBA (Fecha, CBA_GBA) ordenada por fecha,
+    convirtiendo todas las filas.
+    """
+    return _serie_completa("cba_gba", _filas_cba_gba(contenido), _convertir_cba_gba)
+
+
+def _serie_completa(fuente, leidas, convertir):
+    nombres, crudos = leidas
+    fechas, valores = [], []
+    for crudo in crudos:
+        fila = convertir(crudo)
+        if fila is not None:
+            fechas.append(fila[0])
+            valores.append(fila[1])
+
+    registro.sumar("crianza_filas_parseadas_total", len(fechas), fuente=fuente)
+    datos = np.array(valores, dtype="float64").reshape(len(valores), len(nombres))
+    df = pd.DataFrame({"Fecha": np.array(fechas, dtype="datetime64[ns]")})
+    for k, c in enumerate(nombres):
+        df[c] = datos[:, k]
+    return df.sort_values("Fecha", kind="stable")
+
+
+# ------------------------------------------------------------
+# 3. DATOS INDEC – CANASTA DE CRIANZA (ByS / TC / Total)
+# ------------------------------------------------------------
+
+GRUPOS_INDEC = {
+    "menor1": "menor de 1 año",
+    "1-3": "1 a 3 años",
+    "4-5": "4 a 5 años",
+    "6-12": "6 a 12 años",
+}
+
+
+@registro.cronometrar()
+@vuelos.unico("canasta_crianza")
+def obtener_canasta_crianza_indec():
+    entrada = cache_http.obtener(URL_INDEC_CRIANZA)
+    return _parsear_canasta_crianza(entrada["sha256"])
+
+
+@lru_cache(maxsize=4)  # por contenido: un 304 no vuelve a parsear
+def _parsear_canasta_crianza(sha256):
+    serie = _columnas_canasta_crianza(sha256)
+
+    resultado = {"Fecha": pd.Timestamp(serie["Fecha"][-1])}
+    for g in GRUPOS_INDEC:
+        resultado[g] = {
+            "ByS": float(serie[f"{g}_ByS"][-1]),
+            "TC": float(serie[f"{g}_TC"][-1]),
+            "Total": float(serie[f"{g}_Total"][-1]),
+        }
+    return resultado
+
+
+registro.registrar_cache("parseo_canasta_crianza", _parsear_canasta_crianza)
+
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12
+}
+
+FILAS_ENCABEZADO_CRIANZA = (2, 3, 4, 5)
+DIR_ENCABEZADOS = CACHE_DIR / "encabezados"
+_columnas_por_huella = {}
+
+
+def _aplanar_encabezado(filas):
+    """
+    Nombres de columna "nivel1 | nivel2 | ..." a partir de las filas de
+    encabezado, rellenando hacia la derecha las celdas combinadas dentro de
+    su grupo superior (mismo criterio que pandas con header=[2, 3, 4, 5]).
+    """
+    ancho = max(len(f) for f in filas)
+    filas = [list(f) + [None] * (ancho - len(f)) for f in filas]
+
+    control = [True] * ancho
+    for fila in filas:
+        ultimo = fila[0]
+        for i in range(1, ancho):
+            if not control[i]:
+                ultimo = fila[i]
+            if _vacia(fila[i]):
+                fila[i] = ultimo
+            else:
+                control[i] = False
+                ultimo = fila[i]
+
+    nombres = []
+    for i in range(ancho):
+        partes = [str(f[i]).strip() for f in filas if not _vacia(f[i])]
+        nombres.append(" | ".join(p for p in partes if p.lower() not in ("nan", "none")))
+    return nombres
+
+
+def _resolver_columnas(nombres):
+    """
+    Posición de cada columna {grupo}_{ByS|TC|Total} dentro de `nombres`.
+    """
+    sufijos = {"ByS": "bienes y servicios", "TC": "cuidado", "Total": "total"}
+    columnas = {}
+    for g, grupo_txt in GRUPOS_INDEC.items():
+        for tipo, sufijo in sufijos.items():
+            for i, nombre in enumerate(nombres):
+                s = nombre.lower().strip()
+                if grupo_txt.lower() in s and s.endswith(sufijo):
+                    columnas[f"{g}_{tipo}"] = i
+                    break
+            else:
+                return None
+    return columnas
+
+
+def columnas_crianza(encabezado):
+    """
+    Ubica las 12 columnas de la canasta a partir de las filas de encabezado.
+
+    La resolución se guarda por huella (SHA-256 del encabezado), en memoria
+    y en disco: mientras el formato no cambie no se vuelve a buscar. Si la
+    huella es nueva y las columnas no aparecen, se informa el cambio de
+    formato con CambioFormatoINDEC.
+    """
+    huella = hashlib.sha256(repr(encabezado).encode("utf-8")).hexdigest()
+    if huella in _columnas_por_huella:
+        registro.cache("encabezados", acierto=True)
+        return _columnas_por_huella[huella]
+
+    ruta = DIR_ENCABEZADOS / f"{huella}.json"
+    try:
+        columnas = json.loads(ruta.read_text(encoding="utf-8"))
+        registro.cache("encabezados", acierto=True)
+    except (FileNotFoundError, ValueError):
+        registro.cache("encabezados", acierto=False)
+        columnas = _resolver_columnas(_aplanar_encabezado(encabezado))
+        if columnas is None:
+            raise CambioFormatoINDEC(
+                f"INDEC: cambió el encabezado de la canasta de crianza (huella {huella[:12]}); "
+                "no se encontraron las columnas ByS / TC / Total de todos los grupos."
+            )
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_text(json.dumps(columnas), encoding="utf-8")
+
+    _columnas_por_huella[huella] = columnas
+    return columnas
+
+
+@registro.cronometrar("parseo_canasta_crianza")
+def _columnas_canasta_crianza(sha256):
+    """
+    Serie de la versión `sha256`, ingerida de forma incremental: sólo se
+    convierten las filas nuevas o revisadas respecto de la versión anterior.
+    """
+    columnas = series.obtener(
+        "canasta_crianza", sha256,
+        lambda: _filas_canasta_crianza(cache_http.leer(sha256)), _convertir_canasta_crianza,
+    )
+    if not len(columnas["Fecha"]):
+        raise ValueError(
+            "INDEC: la tabla quedó vacía tras limpieza (cambió el formato o encabezados)."
+        )
+    return columnas
+
+
+def _filas_canasta_crianza(contenido):
+    """
+    (nombres de columna, filas crudas) de la canasta de crianza: lee el
+    encabezado una vez, ubica las columnas y recorre las filas de datos en
+    streaming quedándose sólo con (año, mes, 12 celdas sin convertir).
+    """
+    filas = filas_libro(contenido)
+    encabezado = []
+    for i, fila in enumerate(filas):
+        if i in FILAS_ENCABEZADO_CRIANZA:
+            encabezado.append(tuple(fila))
+        if i == max(FILAS_ENCABEZADO_CRIANZA):
+            break
+
+    columnas = columnas_crianza(tuple(encabezado))
+    nombres = list(columnas)
+    indices = [columnas[c] for c in nombres]
+
+    def crudas():
+        # Año sólo en enero -> se arrastra hacia abajo (como ffill)
+        anio = np.nan
+        for fila in filas:
+            fila = tuple(fila)
+            if not fila or all(_vacia(v) for v in fila):
+                continue
+            fila = fila + (None,) * (max(indices) + 1 - len(fila))
+
+            a = _a_numero(fila[0])
+            if not np.isnan(a):
+                anio = a
+            mes = MESES.get(str(fila[1]).strip().lower())
+            if np.isnan(anio) or mes is None:
+                continue
+            yield (int(anio), mes) + tuple(fila[k] for k in indices)
+
+    return nombres, crudas()
+
+
+def _convertir_canasta_crianza(crudo):
+    nums = [_a_numero(v) for v in crudo[2:]]
+    if any(np.isnan(x) for x in nums):
+        return None
+    return np.datetime64(f"{crudo[0]:04d}-{crudo[1]:02d}-01", "ns"), nums
+
+
+def _serie_canasta_crianza(contenido):
+    """
+    Serie mensual completa de la canasta de crianza INDEC: Fecha y
+    {grupo}_ByS / {grupo}_TC / {grupo}_Total, ordenada por fecha,
+    convirtiendo todas las filas.
+    """
+    df = _serie_completa(
+        "canasta_crianza", _filas_canasta_crianza(contenido), _convertir_canasta_crianza
+    )
+    if df.empty:
+        raise ValueError(
+            "INDEC: la tabla quedó vacía tras limpieza (cambió el formato o encabezados)."
+        )
+    return df
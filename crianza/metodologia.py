@@ -0,0 +1,168 @@
+"""
+Metodología PBA del costo de la crianza: parámetros por grupo etario y
+cálculo del costo de un hogar.
+
+No depende de nada (ni de las métricas), así que importarla es inmediato y
+costo_crianza no paga ningún envoltorio por llamada; se mide en quien la
+llama (el rerun de la app, los handlers del servicio).
+"""
+
+# --------------------------------
+# 1. METODOLOGÍA DE CRIANZA - PBA
+# --------------------------------
+escala_bienes = {
+    "menor1": 0.298,
+    "1-3": 0.298,
+    "4-5": 0.298,
+    "6-11": 0.577,
+    "12-17": 0.647,
+}
+
+GRUPOS_PBA = list(escala_bienes.keys())
+
+horas_cuidado = {
+    "menor1": 129,
+    "1-3": 66,
+    "4-5": 52,
+    "6-11": 57,
+    "12-17": 24,
+}
+
+
+# 1 para el NNyA de mayor costo, 0,7 para el segundo y 0,5 para el resto
+FACTORES_ESCALA = [1.0, 0.7] + [0.5] * 10
+
+
+def grupo_edad(e):
+    if e < 1:
+        return "menor1"
+    if 1 <= e <= 3:
+        return "1-3"
+    if 4 <= e <= 5:
+        return "4-5"
+    if 6 <= e <= 11:
+        return "6-11"
+    if 12 <= e <= 17:
+        return "12-17"
+    return None
+
+
+def costo_crianza(edades, cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+    gasto_ref = cba_gba * icg * ae
+    valor_hora_24_mas = round(mensual_upacp / (6 * 30.5))
+
+    costos = []
+    for edad in edades:
+        g = grupo_edad(edad)
+        if g is None:
+            continue
+
+        bienes = escala_bienes[g] * gasto_ref
+
+        if g == "menor1":
+            valor_hora = valor_hora_24_mas
+        else:
+            valor_hora = hora_upacp
+
+        tiempo = horas_cuidado[g] * valor_hora
+        total_ind = bienes + tiempo
+        costos.append((edad, g, bienes, tiempo, total_ind))
+
+    # Ordenar por costo individual
+    costos.sort(key=lambda x: x[4], reverse=True)
+
+    factores = FACTORES_ESCALA
+
+    total = 0
+    detalles = []
+    for i, (edad, g, bienes, tiempo, total_ind) in enumerate(costos):
+        factor = factores[i]
+        ajustado = round(total_ind * factor)
+        total += ajustado
+
+        detalles.append({
+            "Edad": edad,
+            "Grupo": g,
+            "Bienes": round(bienes),
+            "Tiempo": round(tiempo),
+            "Total individual": round(total_ind),
+            "Factor escala": factor,
+            "Costo ajustado": ajustado
+        })
+
+    return total, detalles
+
+def costos_individuales_por_grupo(cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+    """
+    Devuelve costo individual (sin escala) por grupo etario de TU metodología:
+    bienes + tiempo, para un (1) niño/a en ese grupo.
+    """
+    gasto_ref = cba_gba * icg * ae
+    valor_hora_24_mas = round(mensual_upacp / (6 * 30.5))
+
+    costos = {}
+    for g in escala_bienes.keys():
+        bienes = escala_bienes[g] * gasto_ref
+
+        if g == "menor1":
+            valor_hora = valor_hora_24_mas
+        else:
+            valor_hora = hora_upacp
+
+        tiempo = horas_cuidado[g] * valor_hora
+        total_ind = round(bienes + tiempo)
+
+        costos[g] = {
+            "Bienes": round(bienes),
+            "Tiempo": round(tiempo),
+            "Total": total_ind
+        }
+
+    return costos
+
+
+# --------------------------------
+# 2. COMPARACIÓN CON LA CANASTA INDEC
+# --------------------------------
+# (rótulo, grupo INDEC, grupo PBA, comparable): para 6 a 12 (INDEC) se
+# contrasta con 6 a 11 (PBA) y 12 a 17 no tiene equivalente INDEC
+TRAMOS_COMPARACION = [
+    ("INDEC - < 1", "menor1", "menor1", True),
+    ("INDEC - 1 a 3", "1-3", "1-3", True),
+    ("INDEC - 4 a 5", "4-5", "4-5", True),
+    ("INDEC - 6 a 12 (vs PBA 6 a 11)", "6-12", "6-11", True),
+    ("PBA - 12 a 17 (sin equivalente INDEC)", None, "12-17", False),
+]
+
+
+def fila_comparacion(label, g_indec, g_pba, comparable, indec, costos_pba):
+    if comparable:
+        indec_bys = float(indec[g_indec]["ByS"])
+        indec_tc  = float(indec[g_indec]["TC"])
+        indec_tot = float(indec[g_indec]["Total"])
+    else:
+        indec_bys = indec_tc = indec_tot = None
+
+    pba_bys = float(costos_pba[g_pba]["Bienes"])
+    pba_tc  = float(costos_pba[g_pba]["Tiempo"])
+    pba_tot = float(costos_pba[g_pba]["Total"])
+
+    return {
+        "Grupo": label,
+        "INDEC_ByS": indec_bys,   "PBA_ByS": pba_bys,
+        "INDEC_TC": indec_tc,     "PBA_TC": pba_tc,
+        "INDEC_Total": indec_tot, "PBA_Total": pba_tot,
+    }
+
+
+def comparacion_indec(edades, indec, costos_pba):
+    """
+    Filas de la comparación INDEC vs PBA, sólo para los tramos presentes
+    en `edades`. `indec` es la canasta de crianza (obtener_canasta_crianza_indec)
+    y `costos_pba` el resultado de costos_individuales_por_grupo.
+    """
+    presentes = {grupo_edad(e) for e in edades}
+    return [
+        fila_comparacion(*tramo, indec, costos_pba)
+        for tramo in TRAMOS_COMPARACION if tramo[2] in presentes
+    ]
@@ -0,0 +1,244 @@
+"""
+Métricas internas: duración de cada etapa, bytes descargados, filas
+parseadas y aciertos / fallos de cada caché, en formato de texto de
+Prometheus.
+
+    from crianza.metricas import registro
+
+    with registro.tramo("parseo", fuente="cba_gba"):
+        ...
+    registro.sumar("crianza_filas_parseadas_total", 120, fuente="cba_gba")
+
+Se exportan con registro.servir(puerto) (GET /metrics), registro.escribir(ruta)
+o registro.prometheus(). Con la variable de entorno CRIANZA_PERFIL_DIR,
+registro.perfil(nombre) guarda un perfil de cProfile por ejecución.
+
+Sólo usa la biblioteca estándar.
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PERFIL_DIR = os.environ.get("CRIANZA_PERFIL_DIR")
+METRICAS_PUERTO = os.environ.get("CRIANZA_METRICAS_PUERTO")    # servir GET /metrics
+METRICAS_ARCHIVO = os.environ.get("CRIANZA_METRICAS_ARCHIVO")  # o volcar a un archivo
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+DESCRIPCIONES = {
+    "crianza_etapa_segundos": ("histogram", "Duración de cada etapa (loaders, parseo, cálculo, render)."),
+    "crianza_etapa_errores_total": ("counter", "Etapas que terminaron con excepción."),
+    "crianza_http_bytes_total": ("counter", "Bytes descargados por URL."),
+    "crianza_http_respuestas_total": ("counter", "Respuestas HTTP por URL y código de estado."),
+    "crianza_filas_parseadas_total": ("counter", "Filas de datos leídas por fuente."),
+    "crianza_periodos_recalculados_total": ("counter", "Períodos de la serie histórica recalculados tras una versión nueva."),
+    "crianza_cache_total": ("counter", "Consultas a cada caché, por resultado (acierto / fallo)."),
+    "crianza_vuelo_total": ("counter", "Llamadas a cada loader por rol en el vuelo único (líder o en espera)."),
+    "crianza_consulta_total": ("counter", "Fuentes consultadas en cada refresco o salteadas por estar al día según su calendario."),
+    "crianza_circuito_total": ("counter", "Eventos del cortacircuitos de cada fuente (apertura, rechazo, último valor válido)."),
+}
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas:
+        valor = str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+class Metricas:
+    """
+    Contadores e histogramas con etiquetas, seguros entre hilos.
+
+    Las cachés en memoria hechas con functools.lru_cache se registran con
+    registrar_cache y sus aciertos / fallos se leen de cache_info() al
+    exportar, sin costo en cada llamada.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self._caches = {}
+        self._ejecuciones = 0
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        self._observar((nombre, tuple(sorted(etiquetas.items()))), valor)
+
+    def _observar(self, clave, valor):
+        # un contador por bucket (el último es +Inf); se acumulan al exportar
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            h = self._histogramas.get(clave)
+            if h is None:
+                h = self._histogramas[clave] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+            h[0] += 1
+            h[1] += valor
+            h[2][i] += 1
+
+    @contextmanager
+    def tramo(self, etapa, **etiquetas):
+        """
+        Mide la duración del bloque como crianza_etapa_segundos{etapa=...}.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.sumar("crianza_etapa_errores_total", etapa=etapa, **etiquetas)
+            raise
+        finally:
+            self.observar("crianza_etapa_segundos", time.perf_counter() - t0, etapa=etapa, **etiquetas)
+
+    def cronometrar(self, etapa=None):
+        """
+        Decorador: cada llamada es un tramo (por defecto, con el nombre de
+        la función como etapa).
+        """
+        def decorar(fn):
+            nombre = etapa or fn.__name__
+            clave = ("crianza_etapa_segundos", (("etapa", nombre),))
+
+            # sin contextmanager: envuelve funciones llamadas muy seguido
+            @functools.wraps(fn)
+            def envoltura(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    self.sumar("crianza_etapa_errores_total", etapa=nombre)
+                    raise
+                finally:
+                    self._observar(clave, time.perf_counter() - t0)
+            return envoltura
+        return decorar
+
+    def cache(self, nombre, acierto):
+        self.sumar("crianza_cache_total", cache=nombre, resultado="acierto" if acierto else "fallo")
+
+    def registrar_cache(self, nombre, fn):
+        """
+        Exporta los aciertos / fallos de una función con lru_cache.
+        """
+        self._caches[nombre] = fn
+        return fn
+
+    def prometheus(self):
+        """
+        Todas las métricas en formato de texto de Prometheus (0.0.4).
+        """
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {k: (n, s, list(b)) for k, (n, s, b) in self._histogramas.items()}
+
+        for nombre, fn in self._caches.items():
+            info = fn.cache_info()
+            for resultado, n in (("acierto", info.hits), ("fallo", info.misses)):
+                clave = ("crianza_cache_total", (("cache", nombre), ("resultado", resultado)))
+                contadores[clave] = contadores.get(clave, 0) + n
+
+        lineas = []
+        nombres = sorted({n for n, _ in contadores} | {n for n, _ in histogramas})
+        for nombre in nombres:
+            tipo, ayuda = DESCRIPCIONES.get(nombre, ("untyped", nombre))
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for (n, etiquetas), valor in sorted(contadores.items()):
+                if n == nombre:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+            for (n, etiquetas), (cuenta, suma, buckets) in sorted(histogramas.items()):
+                if n != nombre:
+                    continue
+                acumulado = 0
+                for limite, parcial in zip(self.buckets, buckets):
+                    acumulado += parcial
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', limite),))} {acumulado}")
+                lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', '+Inf'),))} {cuenta}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {suma}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {cuenta}")
+        return "\n".join(lineas) + "\n"
+
+    def escribir(self, ruta):
+        """
+        Vuelca las métricas a un archivo (rename atómico, apto para el
+        textfile collector de node_exporter).
+        """
+        directorio, nombre = os.path.split(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        tmp = os.path.join(directorio, f".{nombre}.{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, ruta)
+
+    def servir(self, puerto, host="127.0.0.1"):
+        """
+        Expone GET /metrics en un hilo de fondo. Devuelve el servidor.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metricas = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                cuerpo = metricas.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+        servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+        return servidor
+
+    @contextmanager
+    def perfil(self, nombre):
+        """
+        Si CRIANZA_PERFIL_DIR está definida, perfila el bloque con cProfile y
+        guarda <dir>/<nombre>-<fecha>-<n>.prof (se lee con pstats o snakeviz).
+        """
+        if not PERFIL_DIR:
+            yield
+            return
+
+        import cProfile
+
+        with self._lock:
+            self._ejecuciones += 1
+            n = self._ejecuciones
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # ya hay otro perfil activo (otra ejecución en paralelo)
+            yield
+            return
+        try:
+            yield
+        finally:
+            perfil.disable()
+            os.makedirs(PERFIL_DIR, exist_ok=True)
+            perfil.dump_stats(os.path.join(
+                PERFIL_DIR, f"{nombre}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{n}.prof"
+            ))
+
+
+registro = Metricas()
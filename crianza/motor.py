@@ -0,0 +1,260 @@
+"""
+Motor vectorizado (NumPy) de la metodología PBA: muchos hogares en una
+sola pasada y tabla precalculada de composiciones de hogar.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+from .metodologia import (
+    FACTORES_ESCALA,
+    GRUPOS_PBA,
+    escala_bienes,
+    horas_cuidado,
+)
+from .metricas import registro
+
+# ------------------------------------------------------------
+# 1. MOTOR VECTORIZADO (MUCHOS HOGARES A LA VEZ)
+# ------------------------------------------------------------
+# Bordes de grupo_edad para searchsorted: los extremos cerrados por derecha
+# (3, 5, 11, 17) se corren un ulp para que la edad exacta quede adentro.
+_BORDES_GRUPO = np.array([1, np.nextafter(3, np.inf), 4, np.nextafter(5, np.inf),
+                          6, np.nextafter(11, np.inf), 12, np.nextafter(17, np.inf)])
+_CODIGO_TRAMO = np.array([0, 1, -1, 2, -1, 3, -1, 4, -1], dtype="int8")
+
+
+def codigos_grupo(edades):
+    """
+    Versión vectorizada de grupo_edad: posición en GRUPOS_PBA, o -1 si la
+    edad no cae en ningún grupo (incluye NaN de relleno).
+    """
+    e = np.asarray(edades, dtype="float64")
+    return _CODIGO_TRAMO[np.searchsorted(_BORDES_GRUPO, e, side="right")]
+
+
+def matriz_edades(edades):
+    """
+    Lista de hogares (cada uno, una lista de edades) -> matriz hogares x
+    niños rellenada con NaN. Un arreglo 2D se devuelve sin copiar.
+    """
+    if isinstance(edades, np.ndarray) and edades.ndim == 2:
+        return edades.astype("float64", copy=False)
+
+    largos = np.fromiter((len(h) for h in edades), dtype="int64", count=len(edades))
+    m = np.full((len(largos), int(largos.max(initial=0))), np.nan)
+    m[np.arange(m.shape[1]) < largos[:, None]] = np.fromiter(
+        (e for h in edades for e in h), dtype="float64", count=int(largos.sum())
+    )
+    return m
+
+
+def costos_por_grupo_arr(cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+    """
+    (bienes, tiempo, total) sin redondear por grupo, en el orden de
+    GRUPOS_PBA. Mismas cuentas que costo_crianza, en arreglos.
+    """
+    gasto_ref = cba_gba * icg * ae
+    valor_hora_24_mas = round(mensual_upacp / (6 * 30.5))
+
+    valor_hora = np.array(
+        [valor_hora_24_mas if g == "menor1" else hora_upacp for g in GRUPOS_PBA], dtype="float64"
+    )
+    bienes = np.array([escala_bienes[g] for g in GRUPOS_PBA]) * gasto_ref
+    tiempo = np.array([horas_cuidado[g] for g in GRUPOS_PBA], dtype="float64") * valor_hora
+    return bienes, tiempo, bienes + tiempo
+
+
+@registro.cronometrar()
+def costo_crianza_lote(edades, cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7):
+    """
+    costo_crianza para muchos hogares en una sola pasada vectorizada.
+
+    `edades` es una lista de hogares (listas de edades) o una matriz
+    hogares x niños rellenada con NaN. Devuelve (totales, detalle): el total
+    de cada hogar y un dict de matrices hogares x niños con las mismas
+    columnas que el detalle de costo_crianza, ya ordenadas por costo
+    individual. "Grupo" es la posición en GRUPOS_PBA (-1 en celdas vacías).
+    """
+    e = matriz_edades(edades)
+    codigos = codigos_grupo(e)
+
+    if (codigos >= 0).sum(axis=1).max(initial=0) > len(FACTORES_ESCALA):
+        raise ValueError(f"Un hogar no puede tener más de {len(FACTORES_ESCALA)} niños/as.")
+
+    bienes_g, tiempo_g, total_g = costos_por_grupo_arr(
+        cba_gba, hora_upacp, mensual_upacp, icg=icg, ae=ae
+    )
+
+    # Cada arreglo por grupo lleva un elemento extra al final: el código -1
+    # (celda vacía) lo indexa directamente.
+    def por_grupo(valores, vacio):
+        return np.append(valores, vacio)
+
+    # Orden descendente estable por costo individual (igual que list.sort)
+    orden = np.argsort(por_grupo(-total_g, np.inf)[codigos], axis=1, kind="stable")
+    e = np.take_along_axis(e, orden, axis=1)
+    codigos = np.take_along_axis(codigos, orden, axis=1)
+
+    factores = np.zeros(e.shape[1])
+    k = min(e.shape[1], len(FACTORES_ESCALA))
+    factores[:k] = FACTORES_ESCALA[:k]
+    factor = (codigos >= 0) * factores
+
+    ajustado = np.rint(por_grupo(total_g, 0.0)[codigos] * factor).astype("int64")
+    detalle = {
+        "Edad": e,
+        "Grupo": codigos,
+        "Bienes": por_grupo(np.rint(bienes_g), 0.0).astype("int64")[codigos],
+        "Tiempo": por_grupo(np.rint(tiempo_g), 0.0).astype("int64")[codigos],
+        "Total individual": por_grupo(np.rint(total_g), 0.0).astype("int64")[codigos],
+        "Factor escala": factor,
+        "Costo ajustado": ajustado,
+    }
+    return ajustado.sum(axis=1), detalle
+
+
+# ------------------------------------------------------------
+# 2. TABLA PRECALCULADA DE COMPOSICIONES DE HOGAR
+# ------------------------------------------------------------
+MAX_HIJOS = 10  # mismo tope que el formulario
+_EDAD_REPRESENTATIVA = np.array([0, 1, 4, 6, 12], dtype="float64")  # una por grupo
+
+
+class TablaComposiciones:
+    """
+    Costo del hogar precalculado para cada combinación posible de grupos
+    etarios (cuántos niños/as hay en cada grupo, hasta MAX_HIJOS en total).
+
+    El costo de un hogar sólo depende de esa combinación, así que con cinco
+    grupos alcanza con unas pocas miles de filas por versión de datos. Cada
+    consulta es un índice en arreglos: la combinación se codifica en base
+    (max_hijos + 1) y `fila_por_codigo` da la fila. La tabla queda atada a
+    los valores de CBA / UPACP con los que se armó (`version`).
+    """
+
+    @registro.cronometrar("tabla_composiciones")
+    def __init__(self, cba_gba, hora_upacp, mensual_upacp, icg=3.14, ae=1.7, max_hijos=MAX_HIJOS):
+        self.parametros = {
+            "cba_gba": cba_gba, "hora_upacp": hora_upacp, "mensual_upacp": mensual_upacp,
+            "icg": icg, "ae": ae, "max_hijos": max_hijos,
+        }
+        metodologia = [escala_bienes, horas_cuidado, FACTORES_ESCALA]
+        self.version = hashlib.sha256(
+            json.dumps([self.parametros, metodologia], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+        n_grupos = len(GRUPOS_PBA)
+        self.base = max_hijos + 1
+        self.pesos = self.base ** np.arange(n_grupos)
+
+        # Todas las combinaciones de conteos por grupo con total <= max_hijos
+        digitos = (np.arange(self.base ** n_grupos)[:, None] // self.pesos) % self.base
+        validas = digitos.sum(axis=1) <= max_hijos
+        self.conteos = digitos[validas].astype("int8")
+        self.fila_por_codigo = np.full(self.base ** n_grupos, -1, dtype="int16")
+        self.fila_por_codigo[validas] = np.arange(int(validas.sum()))
+
+        # Un hogar representativo por combinación, calculado con el motor
+        # vectorizado (mismo orden, factores y redondeo que costo_crianza)
+        largos = self.conteos.sum(axis=1)
+        edades = np.full((len(self.conteos), max_hijos), np.nan)
+        edades[np.arange(max_hijos) < largos[:, None]] = np.repeat(
+            np.tile(_EDAD_REPRESENTATIVA, len(self.conteos)), self.conteos.ravel()
+        )
+        self.total, detalle = costo_crianza_lote(edades, cba_gba, hora_upacp, mensual_upacp, icg, ae)
+
+        hay = detalle["Grupo"] >= 0
+        self.ajustado_por_grupo = np.zeros(self.conteos.shape, dtype="int64")
+        np.add.at(
+            self.ajustado_por_grupo,
+            (np.nonzero(hay)[0], detalle["Grupo"][hay]),
+            detalle["Costo ajustado"][hay],
+        )
+
+        # Costos individuales por grupo y su rango (para ordenar el detalle)
+        self.bienes, self.tiempo, self.total_ind = costos_por_grupo_arr(
+            cba_gba, hora_upacp, mensual_upacp, icg=icg, ae=ae
+        )
+        self.rango = np.unique(-self.total_ind, return_inverse=True)[1]
+
+    def filas(self, edades):
+        """
+        Fila de la tabla para cada hogar de `edades` (lista de hogares o
+        matriz hogares x niños rellenada con NaN).
+        """
+        codigos = codigos_grupo(matriz_edades(edades))
+        conteos = (codigos[:, :, None] == np.arange(len(GRUPOS_PBA))).sum(axis=1)
+        if conteos.sum(axis=1).max(initial=0) > self.parametros["max_hijos"]:
+            raise ValueError(f"Un hogar no puede tener más de {self.parametros['max_hijos']} niños/as.")
+        return self.fila_por_codigo[conteos @ self.pesos]
+
+    def totales(self, edades):
+        """
+        Costo total de muchos hogares a la vez.
+        """
+        return self.total[self.filas(edades)]
+
+    def resultado(self, edades):
+        """
+        Resultado compacto de un hogar (ResultadoHogar): el total de la
+        tabla y los niños/as en el orden del detalle.
+        """
+        edades = list(edades)
+        fila = self.filas([edades])[0]
+
+        codigos = codigos_grupo(edades) if edades else []
+        hijos = [(e, int(c)) for e, c in zip(edades, codigos) if c >= 0]
+        hijos.sort(key=lambda h: self.rango[h[1]])  # estable, como list.sort
+
+        return ResultadoHogar(
+            int(self.total[fila]), tuple(e for e, _ in hijos), bytes(c for _, c in hijos)
+        )
+
+    @registro.cronometrar("consulta_tabla")
+    def consultar(self, edades):
+        """
+        Mismo resultado que costo_crianza(edades, ...) para un hogar:
+        (total, detalle). El total sale de la tabla; el detalle se arma con
+        los costos por grupo ya calculados.
+        """
+        r = self.resultado(edades)
+        return r.total, detalle_hogar(r, self.bienes, self.tiempo, self.total_ind)
+
+
+class ResultadoHogar:
+    """
+    Resultado de un hogar en pocos bytes, para guardarlo por sesión: el
+    total, las edades en el orden del detalle y el código de grupo de cada
+    una (un byte por niño/a). El detalle se rearma con detalle_hogar y los
+    costos por grupo de la versión de datos.
+    """
+
+    __slots__ = ("total", "edades", "grupos")
+
+    def __init__(self, total, edades, grupos):
+        self.total = total
+        self.edades = edades
+        self.grupos = grupos
+
+
+def detalle_hogar(resultado, bienes, tiempo, total_ind):
+    """
+    Detalle por niño/a (como el de costo_crianza) de un ResultadoHogar, con
+    los costos individuales por grupo (arreglos de TablaComposiciones).
+    """
+    detalles = []
+    for i, (edad, c) in enumerate(zip(resultado.edades, resultado.grupos)):
+        factor = FACTORES_ESCALA[i]
+        total = float(total_ind[c])
+        detalles.append({
+            "Edad": edad,
+            "Grupo": GRUPOS_PBA[c],
+            "Bienes": round(float(bienes[c])),
+            "Tiempo": round(float(tiempo[c])),
+            "Total individual": round(total),
+            "Factor escala": factor,
+            "Costo ajustado": round(total * factor),
+        })
+    return detalles
@@ -0,0 +1,193 @@
+"""
+Origen de los archivos de INDEC y UPACP: los sitios reales, un espejo en
+disco o un doble HTTP local.
+
+Se elige con la variable de entorno CRIANZA_ORIGEN (o configurar_origen):
+
+    vivo                      los sitios reales (por defecto)
+    /ruta/al/espejo           un directorio creado con `sincronizar`
+    http://127.0.0.1:8760     un servidor que sirve las mismas rutas
+
+Los loaders siguen usando las URLs reales (URL_INDEC_CBA, ...): la caché
+HTTP las traduce al pedir, y el índice de la caché queda siempre con la URL
+real, así que la trazabilidad de versiones no depende del origen.
+
+Para crear o actualizar un espejo con los archivos vigentes:
+
+    python -m crianza.origen sincronizar /ruta/al/espejo
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+MANIFIESTO = "espejo.json"
+
+
+# ------------------------------------------------------------
+# 1. MODO DE ORIGEN
+# ------------------------------------------------------------
+def archivo_espejo(url):
+    """
+    Ruta relativa, dentro del espejo, del archivo de `url`
+    (<host>/<ruta con _>[_<query>]).
+    """
+    partes = urlsplit(url)
+    nombre = partes.path.strip("/").replace("/", "_") or "index"
+    if partes.query:
+        nombre += "_" + re.sub(r"[^\w.-]", "_", partes.query)
+    return os.path.join(partes.hostname, nombre)
+
+
+class Origen:
+    """
+    Modo "vivo", "espejo" (destino = directorio) o "doble" (destino = URL base).
+    """
+
+    def __init__(self, modo="vivo", destino=None):
+        if modo not in ("vivo", "espejo", "doble"):
+            raise ValueError(f"Modo de origen desconocido: {modo!r}")
+        if modo != "vivo" and not destino:
+            raise ValueError(f"El modo {modo!r} necesita un destino.")
+        self.modo = modo
+        self.destino = destino.rstrip("/") if modo == "doble" else destino
+
+    @classmethod
+    def desde_texto(cls, valor):
+        valor = (valor or "").strip()
+        if not valor or valor == "vivo":
+            return cls()
+        if valor.startswith(("http://", "https://")):
+            return cls("doble", valor)
+        return cls("espejo", os.path.abspath(os.path.expanduser(valor)))
+
+    def __repr__(self):
+        return f"Origen({self.modo!r}, {self.destino!r})"
+
+    def descripcion(self):
+        return {
+            "vivo": "sitios oficiales",
+            "espejo": f"espejo local ({self.destino})",
+            "doble": f"doble local ({self.destino})",
+        }[self.modo]
+
+    def url(self, url):
+        """
+        URL a pedir para `url` (la misma en vivo, la del doble si no).
+        """
+        if self.modo != "doble":
+            return url
+        partes = urlsplit(url)
+        return self.destino + partes.path + (f"?{partes.query}" if partes.query else "")
+
+    def manifiesto(self):
+        """
+        {url: metadatos} del espejo ({} si todavía no se sincronizó).
+        """
+        try:
+            with open(os.path.join(self.destino, MANIFIESTO), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def ruta(self, url):
+        return os.path.join(self.destino, archivo_espejo(url))
+
+
+_origen = Origen.desde_texto(os.environ.get("CRIANZA_ORIGEN"))
+
+
+def origen_datos():
+    return _origen
+
+
+def configurar_origen(valor):
+    """
+    Cambia el origen del proceso ("vivo", un directorio o una URL base, o
+    un Origen). Devuelve el origen anterior.
+    """
+    global _origen
+    anterior = _origen
+    _origen = valor if isinstance(valor, Origen) else Origen.desde_texto(valor)
+    return anterior
+
+
+# ------------------------------------------------------------
+# 2. SINCRONIZACIÓN DEL ESPEJO
+# ------------------------------------------------------------
+def urls_fuentes():
+    from .indec import URL_INDEC_CBA, URL_INDEC_CRIANZA
+    from .upacp import URL_UPACP
+
+    return [URL_INDEC_CRIANZA, URL_INDEC_CBA, URL_UPACP]
+
+
+def sincronizar(directorio, urls=None, descargar=True):
+    """
+    Copia los archivos vigentes de cada fuente a `directorio` y actualiza su
+    manifiesto. Con descargar=True revalida antes contra el origen actual
+    (GET condicional); si no, copia lo que ya está en la caché HTTP.
+
+    Devuelve {url: metadatos} de los archivos copiados.
+    """
+    from .red import cache_http
+
+    if os.path.abspath(directorio) == getattr(_origen, "destino", None):
+        raise ValueError("No se puede sincronizar un espejo desde sí mismo.")
+
+    espejo = Origen("espejo", os.path.abspath(directorio))
+    manifiesto = espejo.manifiesto()
+    copiados = {}
+    for url in urls or urls_fuentes():
+        entrada = cache_http.obtener(url) if descargar else cache_http.entrada(url)
+        if entrada is None:
+            raise FileNotFoundError(f"{url} no está en la caché HTTP.")
+
+        ruta = espejo.ruta(url)
+        previa = manifiesto.get(url)
+        if not (previa and previa["sha256"] == entrada["sha256"] and os.path.exists(ruta)):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            tmp = f"{ruta}.{os.getpid()}"
+            with open(tmp, "wb") as f:
+                f.write(cache_http.leer(entrada["sha256"]))
+            os.replace(tmp, ruta)
+
+        copiados[url] = manifiesto[url] = {
+            "archivo": archivo_espejo(url),
+            "sha256": entrada["sha256"],
+            "etag": entrada.get("etag"),
+            "last_modified": entrada.get("last_modified"),
+            "content_length": entrada.get("content_length"),
+            "descargado": entrada.get("descargado"),
+            "sincronizado": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+
+    tmp = os.path.join(espejo.destino, f".{MANIFIESTO}.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(espejo.destino, MANIFIESTO))
+    return copiados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Espejo local de las fuentes de INDEC y UPACP.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sinc = sub.add_parser("sincronizar", help="copiar los archivos vigentes al espejo")
+    sinc.add_argument("directorio")
+    sinc.add_argument("--origen", default=None,
+                      help="de dónde descargar (vivo, otro espejo o URL de un doble)")
+    sinc.add_argument("--sin-descargar", action="store_true",
+                      help="copiar lo que ya está en la caché HTTP, sin pedidos")
+    args = parser.parse_args(argv)
+
+    if args.origen is not None:
+        configurar_origen(args.origen)
+    for url, meta in sincronizar(args.directorio, descargar=not args.sin_descargar).items():
+        print(f"{url} -> {meta['archivo']} ({meta['sha256'][:12]})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+Acceso a la red de los loaders: cliente HTTP compartido, caché HTTP en
+disco con revalidación condicional y vuelo único por fuente (una sola
+descarga a la vez en todo el host).
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metricas import registro
+from .origen import origen_datos
+
+try:
+    import fcntl
+except ImportError:  # Windows: sólo se coordina dentro del proceso
+    fcntl = None
+
+# ------------------------------------------------------------
+# 1. CLIENTE HTTP COMPARTIDO (pool, reintentos y timeouts)
+# ------------------------------------------------------------
+TIMEOUT_CONEXION = 5       # segundos para establecer la conexión
+TIMEOUT_LECTURA = 30       # segundos entre bytes recibidos
+REINTENTOS_HTTP = 3        # reintentos ante errores de red o 429/5xx
+MAX_PEDIDOS_POR_HOST = 4   # pedidos simultáneos por host
+
+
+class ClienteHTTP:
+    """
+    Sesión requests compartida por todos los loaders.
+
+    Mantiene conexiones keep-alive por host (www.indec.gob.ar sirve dos de
+    los archivos), reintenta errores transitorios con backoff exponencial y
+    jitter, exige siempre timeouts de conexión y lectura, limita los pedidos
+    simultáneos por host y registra la latencia de cada pedido en
+    crianza_etapa_segundos{etapa="http_get", host=...}.
+    """
+
+    def __init__(self, reintentos=REINTENTOS_HTTP, max_por_host=MAX_PEDIDOS_POR_HOST,
+                 timeout=(TIMEOUT_CONEXION, TIMEOUT_LECTURA)):
+        self.timeout = timeout
+        self.max_por_host = max_por_host
+
+        reintento = Retry(
+            total=reintentos,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(pool_connections=8, pool_maxsize=max_por_host, max_retries=reintento)
+        self.sesion = requests.Session()
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+
+        self._lock = threading.Lock()
+        self._semaforos = {}
+
+    def _semaforo(self, host):
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        GET con timeout obligatorio: None usa el del cliente, un número
+        reemplaza sólo el de lectura y una tupla (conexión, lectura) ambos.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (self.timeout[0], timeout)
+
+        host = urlsplit(url).hostname
+        with self._semaforo(host), registro.tramo("http_get", host=host):
+            return self.sesion.get(url, timeout=timeout, **kwargs)
+
+
+cliente_http = ClienteHTTP()
+
+
+# ------------------------------------------------------------
+# 2. CACHÉ HTTP EN DISCO (revalidación condicional)
+# ------------------------------------------------------------
+CACHE_DIR = Path(
+    os.environ.get("CRIANZA_CACHE_DIR", Path.home() / ".cache" / "calculadora_crianza")
+)
+
+
+class CacheHTTP:
+    """
+    Caché HTTP persistente compartida por todos los loaders.
+
+    Los cuerpos se guardan una sola vez por contenido (objetos/<sha256>) y el
+    índice guarda, por URL, el hash vigente junto con ETag y Last-Modified
+    para revalidar con If-None-Match / If-Modified-Since.
+    """
+
+    def __init__(self, directorio, cliente=None):
+        self.directorio = Path(directorio)
+        self.cliente = cliente or cliente_http
+
+    def _ruta_indice(self, url):
+        clave = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directorio / "indice" / f"{clave}.json"
+
+    def _ruta_objeto(self, sha256):
+        return self.directorio / "objetos" / sha256[:2] / sha256
+
+    @staticmethod
+    def _escribir_atomico(ruta, datos):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_bytes(datos)
+        os.replace(tmp, ruta)
+
+    def entrada(self, url):
+        """
+        Metadatos guardados para `url` (o None si nunca se descargó).
+        """
+        try:
+            return json.loads(self._ruta_indice(url).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def leer(self, sha256):
+        return self._ruta_objeto(sha256).read_bytes()
+
+    def obtener(self, url, timeout=None):
+        """
+        GET condicional. Devuelve la entrada del índice para `url`, con
+        "sha256" apuntando al cuerpo vigente y "cambiado" indicando si el
+        contenido difiere del que ya teníamos.
+
+        El pedido va al origen configurado (crianza.origen): el sitio real,
+        un doble local o, sin red, un espejo en disco.
+        """
+        origen = origen_datos()
+        if origen.modo == "espejo":
+            return self._obtener_espejo(url, origen)
+
+        previa = self.entrada(url)
+        desde = _esperando_desde.get()
+        if previa and desde and datetime.fromisoformat(previa["validado"]) >= desde:
+            # otro proceso la revalidó mientras esperábamos su vuelo
+            registro.cache("http_vuelo", acierto=True)
+            return dict(previa, cambiado=False)
+
+        headers = {}
+        if previa and self._ruta_objeto(previa["sha256"]).exists():
+            if previa.get("etag"):
+                headers["If-None-Match"] = previa["etag"]
+            if previa.get("last_modified"):
+                headers["If-Modified-Since"] = previa["last_modified"]
+
+        resp = self.cliente.get(origen.url(url), headers=headers, timeout=timeout)
+        ahora = datetime.now(ZoneInfo("UTC")).isoformat()
+        registro.sumar("crianza_http_respuestas_total", url=url, status=resp.status_code)
+        registro.cache("http", acierto=resp.status_code == 304 and bool(headers))
+
+        if resp.status_code == 304 and headers:
+            entrada = dict(previa, status=304, validado=ahora)
+            entrada["etag"] = resp.headers.get("ETag") or previa.get("etag")
+            self._escribir_atomico(self._ruta_indice(url), json.dumps(entrada).encode("utf-8"))
+            return dict(entrada, cambiado=False)
+
+        resp.raise_for_status()
+        if resp.status_code == 304:
+            # 304 sin haber revalidado: no hay cuerpo que guardar
+            raise requests.HTTPError(f"{url}: 304 sin pedido condicional.", response=resp)
+        contenido = resp.content
+        if not contenido:
+            raise requests.HTTPError(f"{url}: respuesta {resp.status_code} sin cuerpo.", response=resp)
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        registro.sumar("crianza_http_bytes_total", len(contenido), url=url)
+
+        ruta_obj = self._ruta_objeto(sha256)
+        if not ruta_obj.exists():
+            self._escribir_atomico(ruta_obj, contenido)
+
+        entrada = {
+            "url": url,
+            "sha256": sha256,
+            "status": resp.status_code,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "content_length": resp.headers.get("Content-Length") or str(len(contenido)),
+            "descargado": ahora,
+            "validado": ahora,
+        }
+        self._escribir_atomico(self._ruta_indice(url), json.dumps(entrada).encode("utf-8"))
+        return dict(entrada, cambiado=previa is None or previa.get("sha256") != sha256)
+
+    def _obtener_espejo(self, url, origen):
+        """
+        Como obtener(), pero desde el espejo: el manifiesto dice el hash
+        vigente y el archivo sólo se lee si cambió.
+        """
+        meta = origen.manifiesto().get(url)
+        if meta is None:
+            raise FileNotFoundError(f"{url} no está en el espejo {origen.destino}.")
+
+        previa = self.entrada(url)
+        vigente = (previa and previa["sha256"] == meta["sha256"]
+                   and self._ruta_objeto(meta["sha256"]).exists())
+        registro.cache("espejo", acierto=bool(vigente))
+        if vigente:
+            return dict(previa, cambiado=False)
+
+        contenido = Path(origen.ruta(url)).read_bytes()
+        if hashlib.sha256(contenido).hexdigest() != meta["sha256"]:
+            raise ValueError(f"El archivo de {url} en el espejo no coincide con su manifiesto.")
+        self._escribir_atomico(self._ruta_objeto(meta["sha256"]), contenido)
+
+        entrada = {
+            "url": url,
+            "sha256": meta["sha256"],
+            "status": 200,
+            "etag": meta.get("etag"),
+            "last_modified": meta.get("last_modified"),
+            "content_length": meta.get("content_length") or str(len(contenido)),
+            "descargado": meta.get("descargado"),
+            "validado": datetime.now(ZoneInfo("UTC")).isoformat(),
+            "espejo": origen.destino,
+        }
+        self._escribir_atomico(self._ruta_indice(url), json.dumps(entrada).encode("utf-8"))
+        return dict(entrada, cambiado=previa is None or previa.get("sha256") != meta["sha256"])
+
+
+cache_http = CacheHTTP(CACHE_DIR)
+
+
+@registro.cronometrar()
+def get_remote_version(url: str) -> dict:
+    """
+    Señales de versión del archivo remoto, tomadas de la caché HTTP
+    (las registra la última descarga/revalidación, sin pedidos extra).
+    """
+    entrada = cache_http.entrada(url)
+    if entrada is None:
+        return {
+            "status": None,
+            "etag": None,
+            "last_modified": None,
+            "content_length": None,
+            "error": "Sin descargas registradas en la caché.",
+        }
+    return {
+        "status": entrada.get("status"),
+        "etag": entrada.get("etag"),
+        "last_modified": entrada.get("last_modified"),
+        "content_length": entrada.get("content_length"),
+        "sha256": entrada.get("sha256"),
+    }
+
+
+# ------------------------------------------------------------
+# 3. VUELO ÚNICO POR FUENTE (HILOS Y PROCESOS DEL HOST)
+# ------------------------------------------------------------
+ESPERA_VUELO = 30  # segundos máximos esperando el vuelo de otro
+
+_esperando_desde = ContextVar("esperando_desde", default=None)
+
+
+class _Vuelo:
+    def __init__(self):
+        self.listo = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class VueloUnico:
+    """
+    Coordina las llamadas simultáneas a un loader para que una sola
+    descargue y parsee la fuente.
+
+    Dentro del proceso, quien llega mientras hay un vuelo en curso espera y
+    recibe el mismo resultado (o la misma excepción). Entre procesos del
+    host, el vuelo toma un lock de archivo (<directorio>/<clave>.lock): el
+    proceso que tuvo que esperarlo no vuelve a pedir el archivo si el otro
+    lo revalidó mientras tanto, y encuentra la serie ya parseada en disco.
+
+    Si la espera supera `espera` segundos se lanza TimeoutError: el
+    Refrescador sigue sirviendo el último valor válido de la fuente.
+    """
+
+    def __init__(self, directorio, espera=ESPERA_VUELO):
+        self.directorio = Path(directorio)
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._vuelos = {}
+
+    def ejecutar(self, clave, fn):
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = _Vuelo()
+
+        if not lider:
+            registro.sumar("crianza_vuelo_total", fuente=clave, rol="espera_hilo")
+            if not vuelo.listo.wait(self.espera):
+                raise TimeoutError(f"Vuelo de {clave}: sin resultado tras {self.espera} s.")
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.valor
+
+        try:
+            vuelo.valor = self._en_el_host(clave, fn)
+            return vuelo.valor
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._vuelos[clave]
+            vuelo.listo.set()
+
+    def _en_el_host(self, clave, fn):
+        if fcntl is None:
+            registro.sumar("crianza_vuelo_total", fuente=clave, rol="lider")
+            return fn()
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        with open(self.directorio / f"{clave}.lock", "a") as archivo:
+            desde = None
+            limite = time.monotonic() + self.espera
+            while True:
+                try:
+                    fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if desde is None:
+                        desde = datetime.now(ZoneInfo("UTC"))
+                    if time.monotonic() >= limite:
+                        raise TimeoutError(
+                            f"Vuelo de {clave}: otro proceso lo retiene hace más de {self.espera} s."
+                        ) from None
+                    time.sleep(0.05)
+
+            registro.sumar("crianza_vuelo_total", fuente=clave,
+                           rol="lider" if desde is None else "espera_proceso")
+            token = _esperando_desde.set(desde)
+            try:
+                return fn()
+            finally:
+                _esperando_desde.reset(token)
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    def unico(self, clave):
+        """
+        Decorador: las llamadas simultáneas a la función comparten un vuelo.
+        """
+        def decorar(fn):
+            @functools.wraps(fn)
+            def envoltura():
+                return self.ejecutar(clave, fn)
+            return envoltura
+        return decorar
+
+
+vuelos = VueloUnico(CACHE_DIR / "vuelos")
+
+
+@contextmanager
+def bloqueo_host(ruta):
+    """
+    Lock exclusivo entre los procesos del host (flock sobre <ruta>.lock,
+    como el vuelo único), para leer, modificar y escribir `ruta` sin pisar
+    las escrituras de los demás. Sin fcntl no coordina nada.
+    """
+    if fcntl is None:
+        yield
+        return
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta.with_name(f"{ruta.name}.lock"), "a") as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
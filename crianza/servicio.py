@@ -0,0 +1,356 @@
+"""
+Servicio HTTP/JSON de la calculadora, sobre asyncio.
+
+    python -m crianza.servicio --puerto 8750
+
+Endpoints:
+    POST /costo   {"edades": [0, 5, 12]}
+                  -> {"total", "detalle", "comparacion", "datos"}
+    POST /lote    {"hogares": [[0, 5, 12], [3], ...]}
+                  -> {"resultados": [{"total", "detalle", "comparacion"}, ...], "datos"}
+    GET  /salud   -> estado y versión de los datos en memoria
+    GET  /metrics -> métricas en formato de texto de Prometheus
+
+"total" y "detalle" son los de costo_crianza y "comparacion" las filas de
+comparacion_indec. Los datos se sirven del último juego válido en memoria
+(Refrescador). Los hogares de pedidos concurrentes a /costo se juntan en
+micro-lotes que se calculan en una sola pasada del motor vectorizado; un
+pedido a /lote ya es un lote y se calcula solo. Los cálculos corren en
+hilos aparte, sin bloquear el loop que atiende las conexiones.
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+
+import numpy as np
+
+from .fuentes import Refrescador
+from .metodologia import GRUPOS_PBA, TRAMOS_COMPARACION, costos_individuales_por_grupo, fila_comparacion
+from .metricas import registro
+from .motor import MAX_HIJOS, costo_crianza_lote
+from .origen import configurar_origen
+
+PUERTO = 8750
+ESPERA_LOTE = 0.001           # segundos que se espera para juntar pedidos
+MAX_LOTE = 2048               # hogares por micro-lote
+MAX_HOGARES_PEDIDO = 10_000   # hogares por pedido a /lote
+MAX_CUERPO = 4 * 1024 * 1024  # bytes por pedido
+
+ESTADOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErrorPedido(ValueError):
+    """
+    Pedido inválido: se responde con `estado` y el mensaje como error.
+    """
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# ------------------------------------------------------------
+# 1. CÁLCULO DE UN LOTE DE HOGARES
+# ------------------------------------------------------------
+def resumen_datos(datos):
+    """
+    Valores de las fuentes con los que se calculó, para la respuesta.
+    """
+    fecha_cba, cba_gba = datos["valores"]["cba"]
+    valor_hora, salario_mensual = datos["valores"]["upacp"]
+    return {
+        "version": datos["tabla"].version,
+        "fecha_cba": fecha_cba.strftime("%Y-%m"),
+        "fecha_crianza": datos["valores"]["crianza"]["Fecha"].strftime("%Y-%m"),
+        "cba_gba": cba_gba,
+        "valor_hora": valor_hora,
+        "salario_mensual": salario_mensual,
+        "actualizado": datos["ts"].isoformat(),
+        # fuentes servidas con su último valor válido
+        "vencidas": {
+            fuente: {"error": v["error"], "desde": v["ts"].isoformat()}
+            for fuente, v in datos.get("vencidas", {}).items()
+        },
+    }
+
+
+@registro.cronometrar()
+def calcular_hogares(datos, hogares):
+    """
+    Resultado de cada hogar de `hogares` (listas de edades) con un juego de
+    datos del Refrescador: mismo total y detalle que costo_crianza y las
+    filas de comparacion_indec.
+    """
+    p = datos["tabla"].parametros
+    totales, det = costo_crianza_lote(
+        hogares, p["cba_gba"], p["hora_upacp"], p["mensual_upacp"], icg=p["icg"], ae=p["ae"]
+    )
+
+    # Filas de comparación por grupo PBA: se arman una vez por lote
+    costos_pba = costos_individuales_por_grupo(
+        p["cba_gba"], p["hora_upacp"], p["mensual_upacp"], icg=p["icg"], ae=p["ae"]
+    )
+    indec = datos["valores"]["crianza"]
+    filas = [fila_comparacion(*tramo, indec, costos_pba) for tramo in TRAMOS_COMPARACION]
+    tramo_de = np.array([GRUPOS_PBA.index(t[2]) for t in TRAMOS_COMPARACION])
+    presentes = (det["Grupo"][:, :, None] == tramo_de).any(axis=1)
+
+    columnas = {k: v.tolist() for k, v in det.items()}
+    resultados = []
+    for i, total in enumerate(totales.tolist()):
+        detalle = []
+        for j, codigo in enumerate(columnas["Grupo"][i]):
+            if codigo < 0:
+                continue
+            detalle.append({
+                "Edad": columnas["Edad"][i][j],
+                "Grupo": GRUPOS_PBA[codigo],
+                "Bienes": columnas["Bienes"][i][j],
+                "Tiempo": columnas["Tiempo"][i][j],
+                "Total individual": columnas["Total individual"][i][j],
+                "Factor escala": columnas["Factor escala"][i][j],
+                "Costo ajustado": columnas["Costo ajustado"][i][j],
+            })
+        resultados.append({
+            "total": total,
+            "detalle": detalle,
+            "comparacion": [f for f, hay in zip(filas, presentes[i]) if hay],
+        })
+    return resultados
+
+
+def validar_edades(edades):
+    if not isinstance(edades, list):
+        raise ErrorPedido("'edades' debe ser una lista de números.")
+    if len(edades) > MAX_HIJOS:
+        raise ErrorPedido(f"Un hogar no puede tener más de {MAX_HIJOS} niños/as.")
+    for e in edades:
+        if isinstance(e, bool) or not isinstance(e, (int, float)) or not math.isfinite(e):
+            raise ErrorPedido(f"Edad inválida: {e!r}")
+    return [float(e) for e in edades]
+
+
+# ------------------------------------------------------------
+# 2. MICRO-LOTES
+# ------------------------------------------------------------
+class MicroLotes:
+    """
+    Junta los hogares de los pedidos que llegan casi al mismo tiempo y los
+    calcula juntos con `calcular(hogares)`, que devuelve (contexto,
+    resultados) con un resultado por hogar. Cada pedido recibe el contexto
+    del lote y sus resultados. Un lote se cierra al llegar a `maximo`
+    hogares o cuando pasaron `espera` segundos desde el primer pedido.
+
+    `calcular` corre en el executor del loop; mientras tanto se siguen
+    encolando los pedidos del próximo lote.
+    """
+
+    def __init__(self, calcular, espera=ESPERA_LOTE, maximo=MAX_LOTE):
+        self.calcular = calcular
+        self.espera = espera
+        self.maximo = maximo
+        self.lotes = 0
+        self.hogares = 0
+        self._cola = None
+        self._tarea = None
+
+    def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+        return self
+
+    async def enviar(self, hogares):
+        futuro = asyncio.get_running_loop().create_future()
+        self._cola.put_nowait((hogares, futuro))
+        return await futuro
+
+    def _juntar(self, pedidos, n):
+        while n < self.maximo and not self._cola.empty():
+            pedido = self._cola.get_nowait()
+            pedidos.append(pedido)
+            n += len(pedido[0])
+        return n
+
+    async def _bucle(self):
+        while True:
+            pedidos = [await self._cola.get()]
+            n = len(pedidos[0][0])
+
+            # primero lo que ya está listo; después, una ventana corta
+            await asyncio.sleep(0)
+            n = self._juntar(pedidos, n)
+            if n < self.maximo and self.espera > 0:
+                await asyncio.sleep(self.espera)
+                n = self._juntar(pedidos, n)
+
+            hogares = [h for lista, _ in pedidos for h in lista]
+            try:
+                contexto, resultados = await asyncio.get_running_loop().run_in_executor(
+                    None, self.calcular, hogares
+                )
+            except Exception as e:
+                for _, futuro in pedidos:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            self.lotes += 1
+            self.hogares += len(hogares)
+            inicio = 0
+            for lista, futuro in pedidos:
+                if not futuro.done():
+                    futuro.set_result((contexto, resultados[inicio:inicio + len(lista)]))
+                inicio += len(lista)
+
+
+# ------------------------------------------------------------
+# 3. SERVIDOR HTTP
+# ------------------------------------------------------------
+class ServicioCrianza:
+    """
+    Servidor HTTP/1.1 mínimo (keep-alive, cuerpos JSON con Content-Length)
+    sobre asyncio streams.
+    """
+
+    def __init__(self, refrescador=None, espera=ESPERA_LOTE, maximo=MAX_LOTE):
+        self.refrescador = refrescador or Refrescador()
+        self.lotes = MicroLotes(self._calcular, espera=espera, maximo=maximo)
+
+    def _calcular(self, hogares):
+        # todos los hogares de un lote usan el mismo juego de datos
+        datos = self.refrescador.datos()
+        return resumen_datos(datos), calcular_hogares(datos, hogares)
+
+    async def iniciar(self, host="127.0.0.1", puerto=PUERTO):
+        # arranque en frío fuera del loop; después el refresco sigue en su hilo
+        await asyncio.get_running_loop().run_in_executor(None, self.refrescador.datos)
+        self.refrescador.iniciar()
+        self.lotes.iniciar()
+        return await asyncio.start_server(self._atender, host, puerto)
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        ruta = ruta.split("?", 1)[0]
+        if ruta == "/metrics" and metodo == "GET":
+            return registro.prometheus()
+        if ruta == "/salud":
+            if metodo != "GET":
+                raise ErrorPedido("Método no permitido.", 405)
+            datos = resumen_datos(self.refrescador.datos())
+            return {
+                "estado": "degradado" if datos["vencidas"] else "ok",
+                "datos": datos,
+                "ultimo_error": self.refrescador.ultimo_error,
+                "lotes": self.lotes.lotes,
+                "hogares": self.lotes.hogares,
+            }
+
+        if ruta not in ("/costo", "/lote"):
+            raise ErrorPedido(f"Ruta desconocida: {ruta}", 404)
+        if metodo != "POST":
+            raise ErrorPedido("Método no permitido.", 405)
+
+        try:
+            pedido = json.loads(cuerpo)
+        except ValueError:
+            raise ErrorPedido("El cuerpo no es JSON válido.")
+        if not isinstance(pedido, dict):
+            raise ErrorPedido("El cuerpo debe ser un objeto JSON.")
+
+        if ruta == "/costo":
+            datos, resultados = await self.lotes.enviar([validar_edades(pedido.get("edades"))])
+            return dict(resultados[0], datos=datos)
+
+        hogares = pedido.get("hogares")
+        if not isinstance(hogares, list):
+            raise ErrorPedido("'hogares' debe ser una lista de listas de edades.")
+        if len(hogares) > MAX_HOGARES_PEDIDO:
+            raise ErrorPedido(f"Como máximo {MAX_HOGARES_PEDIDO} hogares por pedido.", 413)
+        # ya viene vectorizado: se calcula directo, sin pasar por los micro-lotes
+        datos, resultados = await asyncio.get_running_loop().run_in_executor(
+            None, self._calcular, [validar_edades(h) for h in hogares]
+        )
+        return {"resultados": resultados, "datos": datos}
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea.strip():
+                    break
+                metodo, ruta, _ = linea.decode("latin-1").split(" ", 2)
+
+                encabezados = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    clave, _, valor = h.decode("latin-1").partition(":")
+                    encabezados[clave.strip().lower()] = valor.strip()
+
+                largo = int(encabezados.get("content-length") or 0)
+                cerrar = encabezados.get("connection", "").lower() == "close"
+                if largo > MAX_CUERPO:
+                    estado, respuesta, cerrar = 413, {"error": "Pedido demasiado grande."}, True
+                else:
+                    cuerpo = await reader.readexactly(largo) if largo else b""
+                    try:
+                        estado, respuesta = 200, await self._despachar(metodo, ruta, cuerpo)
+                    except ErrorPedido as e:
+                        estado, respuesta = e.estado, {"error": str(e)}
+                    except Exception as e:
+                        estado, respuesta = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                if isinstance(respuesta, str):
+                    tipo, datos = "text/plain; version=0.0.4; charset=utf-8", respuesta.encode("utf-8")
+                else:
+                    tipo = "application/json; charset=utf-8"
+                    datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {estado} {ESTADOS[estado]}\r\n"
+                    f"Content-Type: {tipo}\r\n"
+                    f"Content-Length: {len(datos)}\r\n"
+                    f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n".encode("latin-1")
+                    + datos
+                )
+                await writer.drain()
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def servir(host="127.0.0.1", puerto=PUERTO, espera=ESPERA_LOTE, maximo=MAX_LOTE):
+    servicio = ServicioCrianza(espera=espera, maximo=maximo)
+    servidor = await servicio.iniciar(host, puerto)
+    print(f"Escuchando en http://{host}:{puerto}", file=sys.stderr, flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON de la calculadora de crianza.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--espera-lote", type=float, default=ESPERA_LOTE * 1000,
+                        help="milisegundos que se espera para juntar pedidos en un lote")
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE, help="hogares por micro-lote de /costo")
+    parser.add_argument("--origen", default=None,
+                        help="origen de los datos: vivo, directorio espejo o URL de un doble")
+    args = parser.parse_args(argv)
+
+    if args.origen is not None:
+        configurar_origen(args.origen)
+
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.espera_lote / 1000, args.max_lote))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
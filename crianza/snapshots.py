@@ -0,0 +1,262 @@
+"""
+Snapshots de las series parseadas, compartidos entre procesos del host, y
+series incrementales: una versión nueva sólo convierte las filas nuevas o
+revisadas.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .metricas import registro
+from .red import CACHE_DIR, bloqueo_host
+
+# ------------------------------------------------------------
+# 1. SNAPSHOTS PARSEADOS COMPARTIDOS ENTRE PROCESOS
+# ------------------------------------------------------------
+VERSION_PARSER = 2  # subir si cambia el parseo: invalida los snapshots previos
+
+
+class SnapshotStore:
+    """
+    Series parseadas guardadas como columnas NumPy (.npy), una carpeta por
+    fuente y versión de datos (hash del archivo crudo).
+
+    Se parsea una sola vez por versión y por host; cada proceso abre las
+    columnas con mmap de sólo lectura, así que todas las réplicas comparten
+    las mismas páginas en memoria en lugar de tener cada una su DataFrame.
+    Es la base de SeriesIncrementales, que es la que usan los loaders.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+        self._abiertos = {}
+        self._lock = threading.Lock()
+
+    def _ruta(self, fuente, version):
+        return self.directorio / fuente / f"{version}-p{VERSION_PARSER}"
+
+    def abrir(self, fuente, version):
+        """
+        Columnas del snapshot mapeadas en memoria (o None si no existe, o si
+        otro proceso lo podó mientras se abría).
+        """
+        clave = (fuente, version)
+        with self._lock:
+            if clave in self._abiertos:
+                return self._abiertos[clave]
+
+        ruta = self._ruta(fuente, version)
+        try:
+            meta = json.loads((ruta / "meta.json").read_text(encoding="utf-8"))
+            columnas = {
+                c: np.load(ruta / f"{i}.npy", mmap_mode="r", allow_pickle=False)
+                for i, c in enumerate(meta["columnas"])
+            }
+        except FileNotFoundError:
+            return None
+
+        self._olvidar_podadas(fuente)
+        with self._lock:
+            return self._abiertos.setdefault(clave, columnas)
+
+    def _olvidar_podadas(self, fuente):
+        # las versiones que ya no están en disco no se vuelven a pedir: se
+        # sueltan sus mmap (quien todavía tenga las columnas las conserva)
+        with self._lock:
+            for clave in [k for k in self._abiertos if k[0] == fuente]:
+                if not self._ruta(*clave).is_dir():
+                    del self._abiertos[clave]
+
+    def guardar(self, fuente, version, df):
+        """
+        Escribe el DataFrame (o dict de arreglos) columna por columna y
+        publica la carpeta con un rename atómico; si otro proceso ganó la
+        carrera, se usa la suya.
+        """
+        ruta = self._ruta(fuente, version)
+        tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+
+        columnas = list(df.keys())
+        for i, c in enumerate(columnas):
+            col = np.asarray(df[c])
+            if col.dtype.kind == "M":
+                arr = col.astype("datetime64[ns]")
+            elif col.dtype.kind == "u":
+                arr = col
+            else:
+                arr = col.astype("float64")
+            np.save(tmp / f"{i}.npy", arr, allow_pickle=False)
+
+        meta = {
+            "fuente": fuente,
+            "version": version,
+            "version_parser": VERSION_PARSER,
+            "columnas": columnas,
+            "filas": len(arr) if columnas else 0,
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+        try:
+            os.rename(tmp, ruta)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not (ruta / "meta.json").exists():
+                raise
+
+    def obtener(self, fuente, version, parser):
+        """
+        Snapshot de (fuente, version); si no existe lo crea con `parser()`,
+        que debe devolver un DataFrame de columnas numéricas o de fechas.
+        """
+        columnas = self.abrir(fuente, version)
+        registro.cache(f"snapshot_{fuente}", acierto=columnas is not None)
+        if columnas is None:
+            self.guardar(fuente, version, parser())
+            columnas = self.abrir(fuente, version)
+        return columnas
+
+
+# ------------------------------------------------------------
+# 2. SERIES INCREMENTALES (SÓLO PERÍODOS NUEVOS O REVISADOS)
+# ------------------------------------------------------------
+def huella_fila(crudo):
+    """
+    Hash estable (entre procesos) de una fila cruda del libro.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(crudo).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SeriesIncrementales(SnapshotStore):
+    """
+    Snapshots de series mensuales que guardan, además, el hash de la fila
+    cruda de la que salió cada período (columna "_huella").
+
+    Una versión nueva del libro se arma a partir de la última ingerida: las
+    filas cuyo hash ya estaba reutilizan sus valores y sólo las nuevas o
+    revisadas se convierten. `cambios[fuente]` informa qué períodos se
+    agregaron, revisaron o desaparecieron en la última ingesta de este
+    proceso (de la versión "desde" a "version").
+
+    La ingesta y la poda se hacen con un lock de archivo por fuente: se
+    conservan las últimas `conservar` versiones y siempre la vigente.
+    """
+
+    def __init__(self, directorio, conservar=3):
+        super().__init__(directorio)
+        self.conservar = conservar
+        self.cambios = {}
+
+    def _ruta_vigente(self, fuente):
+        return self.directorio / fuente / f"vigente-p{VERSION_PARSER}.json"
+
+    def vigente(self, fuente):
+        """
+        Última versión ingerida de `fuente` (o None).
+        """
+        try:
+            return json.loads(self._ruta_vigente(fuente).read_text(encoding="utf-8"))["version"]
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def obtener(self, fuente, version, leer, convertir):
+        """
+        Columnas de (fuente, version). Si no existen se ingieren: `leer()`
+        devuelve (nombres de columna, filas crudas) y `convertir(crudo)`
+        (fecha datetime64, [valores]) o None para descartar la fila.
+        """
+        columnas = self.abrir(fuente, version)
+        registro.cache(f"serie_{fuente}", acierto=columnas is not None)
+        if columnas is not None:
+            return columnas
+
+        # ingesta y poda con el lock del host tomado: ningún proceso poda la
+        # versión base mientras otro la está abriendo
+        with bloqueo_host(self.directorio / fuente / "ingesta"):
+            columnas = self.abrir(fuente, version)  # otro proceso pudo ingerirla mientras esperábamos
+            if columnas is not None:
+                return columnas
+
+            previa = self.vigente(fuente)
+            base = self.abrir(fuente, previa) if previa and previa != version else None
+            nombres, crudos = leer()
+            nuevas, cambios = self._ingerir(fuente, base, nombres, crudos, convertir)
+            cambios.update(desde=previa if base is not None else None, version=version)
+
+            self.guardar(fuente, version, nuevas)
+            tmp = self._ruta_vigente(fuente).with_name(f".vigente.{os.getpid()}.{threading.get_ident()}")
+            tmp.write_text(json.dumps({"version": version}), encoding="utf-8")
+            os.replace(tmp, self._ruta_vigente(fuente))
+            self.cambios[fuente] = cambios
+            self._podar(fuente)
+            return self.abrir(fuente, version)
+
+    def _ingerir(self, fuente, base, nombres, crudos, convertir):
+        previas = {}
+        if base is not None and "_huella" in base:
+            previas = {int(h): i for i, h in enumerate(base["_huella"])}
+
+        fechas, huellas, origen, valores = [], [], [], []
+        for crudo in crudos:
+            h = huella_fila(crudo)
+            i = previas.get(h)
+            if i is not None:
+                fechas.append(base["Fecha"][i])
+                origen.append(i)
+            else:
+                fila = convertir(crudo)
+                if fila is None:
+                    continue
+                fechas.append(fila[0])
+                origen.append(-1 - len(valores))
+                valores.append(fila[1])
+            huellas.append(h)
+
+        convertidas = np.array(valores, dtype="float64").reshape(len(valores), len(nombres))
+        origen = np.array(origen, dtype="int64")
+        reusa = origen >= 0
+        columnas = {"Fecha": np.array(fechas, dtype="datetime64[ns]")}
+        for k, c in enumerate(nombres):
+            col = np.empty(len(origen))
+            if base is not None:
+                col[reusa] = base[c][origen[reusa]]
+            col[~reusa] = convertidas[-1 - origen[~reusa], k]
+            columnas[c] = col
+        columnas["_huella"] = np.array(huellas, dtype="uint64")
+
+        # mismo orden que el parseo completo (sort estable por fecha)
+        orden = np.argsort(columnas["Fecha"], kind="stable")
+        columnas = {c: v[orden] for c, v in columnas.items()}
+
+        antes = base["Fecha"] if base is not None else np.array([], dtype="datetime64[ns]")
+        tocadas = np.unique(columnas["Fecha"][~reusa[orden]])
+        cambios = {
+            "nuevos": np.setdiff1d(tocadas, antes),
+            "revisados": np.intersect1d(tocadas, antes),
+            "eliminados": np.setdiff1d(antes, columnas["Fecha"]),
+            "filas_convertidas": len(valores),
+            "filas": len(origen),
+        }
+        registro.sumar("crianza_filas_parseadas_total", len(valores), fuente=fuente)
+        return columnas, cambios
+
+    def _podar(self, fuente):
+        # con el lock de ingesta tomado: conserva las últimas versiones y
+        # siempre la vigente; los mmap abiertos siguen valiendo
+        vigente = self._ruta(fuente, self.vigente(fuente))
+        carpetas = sorted(
+            (p for p in (self.directorio / fuente).glob(f"*-p{VERSION_PARSER}") if p.is_dir()),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for p in carpetas[:-self.conservar]:
+            if p != vigente:
+                shutil.rmtree(p, ignore_errors=True)
+        self._olvidar_podadas(fuente)
+
+
+series = SeriesIncrementales(CACHE_DIR / "series")
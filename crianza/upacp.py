@@ -0,0 +1,424 @@
+"""
+Loader UPACP: escala salarial del personal de casas particulares, e
+historial de escalas con su mes de vigencia.
+
+Cada versión nueva de la página se guarda en el historial; las escalas
+anteriores se importan con:
+
+    python -m crianza.upacp importar escalas.csv
+    python -m crianza.upacp importar pagina_guardada.html --vigencia 2024-03
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from .indec import MESES
+from .metricas import registro
+from .red import CACHE_DIR, CacheHTTP, bloqueo_host, cache_http, vuelos
+from .snapshots import VERSION_PARSER
+
+URL_UPACP = "https://upacp.org.ar/?page_id=26745"
+
+# ------------------------------------------
+# DATOS UPACP – ESCALA SALARIAL (4° CATEGORÍA CON RETIRO)
+# ------------------------------------------
+
+def parse_monto(s):
+    return float(s.replace(".", "").replace(",", "."))
+
+
+CATEGORIAS_UPACP = ["PRIMERA", "SEGUNDA", "TERCERA", "CUARTA", "QUINTA"]
+DIR_ESCALAS_UPACP = CACHE_DIR / "escalas_upacp"
+
+# Un solo patrón con los tres tipos de marca, en el orden en que aparecen
+_MARCAS_UPACP = re.compile(
+    r"(?P<categoria>" + "|".join(CATEGORIAS_UPACP) + r")\s+CATEGOR[IÍ]A"
+    r"|(?P<modalidad>(?i:con|sin)\s+(?i:retiro))"
+    r"|Hora:\s*\$?\s*(?P<hora>[\d\.,]*\d)\s*Mensual:\s*\$?\s*(?P<mensual>[\d\.,]*\d)"
+)
+
+
+class LectorEscalaUPACP(HTMLParser):
+    """
+    Tokenizador HTML incremental para la escala salarial de UPACP.
+
+    Recorre los textos de la página en orden y arma, en una sola pasada,
+    una fila por categoría y modalidad (con / sin retiro) con el valor hora
+    y el mensual. Deja `completo` en True al terminar la última categoría,
+    así quien lo alimenta puede dejar de leer el resto de la página.
+    """
+
+    BLOQUES = {"p", "div", "tr", "td", "th", "li", "br", "table", "section",
+               "h1", "h2", "h3", "h4", "h5", "h6"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.filas = []
+        self.completo = False
+        self._texto = ""
+        self._categoria = None
+        self._modalidad = None
+        self._pares = 0
+
+    def handle_data(self, data):
+        self._texto += " " + data.strip()
+
+    def handle_endtag(self, tag):
+        if tag in self.BLOQUES:
+            self._procesar()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOQUES:
+            self._procesar()
+
+    def close(self):
+        super().close()
+        self._procesar()
+
+    def _procesar(self):
+        """
+        Consume las marcas completas del texto acumulado. Lo que queda
+        después de la última marca se conserva (acotado) por si un par
+        Hora / Mensual quedó repartido entre dos bloques.
+        """
+        fin = 0
+        for m in _MARCAS_UPACP.finditer(self._texto):
+            fin = m.end()
+            if m.group("categoria"):
+                self._categoria = m.group("categoria")
+                self._modalidad = None
+                self._pares = 0
+            elif m.group("modalidad"):
+                self._modalidad = " ".join(m.group("modalidad").lower().split())
+            elif self._categoria is not None and self._pares < 2:
+                # sin rótulo explícito: primero con retiro, después sin retiro
+                modalidad = self._modalidad or ("con retiro" if self._pares == 0 else "sin retiro")
+                self.filas.append({
+                    "Categoría": self._categoria,
+                    "Modalidad": modalidad,
+                    "Hora": parse_monto(m.group("hora")),
+                    "Mensual": parse_monto(m.group("mensual")),
+                })
+                self._pares += 1
+                self._modalidad = None
+                if self._categoria == CATEGORIAS_UPACP[-1] and self._pares == 2:
+                    self.completo = True
+                    break
+        self._texto = self._texto[fin:][-2000:]
+
+
+@registro.cronometrar("parseo_upacp")
+def leer_escala_upacp(contenido, tamanio=8192):
+    """
+    Escala salarial completa a partir del HTML crudo, leyendo de a bloques
+    y cortando apenas termina la tabla.
+    """
+    try:
+        html = contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        html = contenido.decode("latin-1")
+
+    lector = LectorEscalaUPACP()
+    for i in range(0, len(html), tamanio):
+        lector.feed(html[i:i + tamanio])
+        if lector.completo:
+            break
+    else:
+        lector.close()
+    registro.sumar("crianza_filas_parseadas_total", len(lector.filas), fuente="upacp")
+    return lector.filas
+
+
+@lru_cache(maxsize=4)  # por contenido: un 304 no vuelve a parsear
+def escala_upacp(sha256):
+    """
+    Escala UPACP de una versión de la página (hash), guardada en disco para
+    que los demás procesos del host no vuelvan a leer el HTML. La lista
+    se comparte entre llamadas: no modificarla.
+    """
+    ruta = DIR_ESCALAS_UPACP / f"{sha256}-p{VERSION_PARSER}.json"
+    try:
+        filas = json.loads(ruta.read_text(encoding="utf-8"))
+        registro.cache("escalas_upacp", acierto=True)
+        return filas
+    except (FileNotFoundError, ValueError):
+        registro.cache("escalas_upacp", acierto=False)
+
+    filas = leer_escala_upacp(cache_http.leer(sha256))
+    CacheHTTP._escribir_atomico(ruta, json.dumps(filas, ensure_ascii=False).encode("utf-8"))
+    return filas
+
+
+registro.registrar_cache("parseo_upacp", escala_upacp)
+
+
+def valores_upacp(escala, categoria="CUARTA", modalidad="con retiro"):
+    """
+    (valor hora, mensual) de una categoría y modalidad de la escala.
+    """
+    for fila in escala:
+        if fila["Categoría"] == categoria and fila["Modalidad"] == modalidad:
+            return fila["Hora"], fila["Mensual"]
+    raise ValueError(f"UPACP: no se encontró la {categoria} categoría ({modalidad}) en la escala.")
+
+
+@registro.cronometrar()
+@vuelos.unico("escala_upacp")
+def obtener_escala_upacp():
+    entrada = cache_http.obtener(URL_UPACP)
+    _al_historial(entrada["sha256"], entrada.get("last_modified"), entrada.get("descargado"))
+    return escala_upacp(entrada["sha256"])
+
+
+@registro.cronometrar()
+def obtener_upacp():
+    # mismo vuelo que obtener_escala_upacp: la página se pide una sola vez
+    # aunque se llamen las dos funciones a la vez
+    return valores_upacp(obtener_escala_upacp())
+
+
+# ------------------------------------------
+# HISTORIAL DE ESCALAS UPACP (VIGENCIA POR MES)
+# ------------------------------------------
+RUTA_HISTORIAL_UPACP = CACHE_DIR / "historial_upacp.json"
+
+_VIGENCIA_UPACP = re.compile(
+    r"(?:a\s+partir\s+del?|desde\s+el|vigentes?\s+desde)\s+(?:1\s*[°ºo]?\s+de\s+)?"
+    r"(?P<mes>" + "|".join(MESES) + r")\s+(?:de\s+|del\s+)?(?P<anio>\d{4})",
+    re.IGNORECASE,
+)
+
+
+def vigencia_upacp(contenido):
+    """
+    Mes de vigencia ("AAAA-MM") que anuncia la página ("a partir del 1° de
+    septiembre de 2025"), o None si no lo dice.
+    """
+    try:
+        html = contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        html = contenido.decode("latin-1")
+    texto = " ".join(unescape(re.sub(r"<[^>]+>", " ", html)).split())
+    m = _VIGENCIA_UPACP.search(texto)
+    if m is None:
+        return None
+    return f"{m.group('anio')}-{MESES[m.group('mes').lower()]:02d}"
+
+
+def _mes(valor):
+    # "AAAA-MM", "AAAA-MM-DD" o una fecha -> "AAAA-MM"
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%Y-%m")
+    texto = str(valor).strip()
+    if not re.match(r"^\d{4}-\d{2}(-\d{2})?$", texto):
+        raise ValueError(f"Mes de vigencia inválido: {valor!r} (se espera AAAA-MM).")
+    return texto[:7]
+
+
+class HistorialUPACP:
+    """
+    Escalas UPACP con su mes de vigencia, en un JSON local compacto: una
+    entrada por cambio de escala, con el hash de la página de la que salió
+    (u "importado"). Se comparte entre procesos del host: se relee sólo si
+    otro proceso lo modificó, y cada registro lee, modifica y escribe con un
+    lock de archivo tomado.
+
+    valores(meses) da la escala vigente en cada mes con una búsqueda
+    binaria sobre las vigencias (NaN antes de la primera escala).
+    """
+
+    def __init__(self, ruta=RUTA_HISTORIAL_UPACP):
+        self.ruta = Path(ruta)
+        self._lock = threading.Lock()
+        self._leido = (None, [], "")
+        self._indices = {}
+
+    def entradas(self):
+        """
+        Entradas ordenadas por vigencia.
+        """
+        try:
+            mtime = self.ruta.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._leido[0] != mtime:
+            texto = self.ruta.read_text(encoding="utf-8")
+            entradas = sorted(json.loads(texto), key=lambda e: e["vigencia"])
+            version = hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+            self._leido = (mtime, entradas, version)
+            self._indices = {}
+        return self._leido[1]
+
+    def version(self):
+        """
+        Hash del contenido del historial ("" si está vacío).
+        """
+        return self._leido[2] if self.entradas() else ""
+
+    def desde(self):
+        entradas = self.entradas()
+        return entradas[0]["vigencia"] if entradas else None
+
+    def registrar(self, escala, vigencia, sha256=None, nota=None):
+        """
+        Guarda `escala` (filas de leer_escala_upacp) como vigente desde el
+        mes `vigencia`. Reemplaza la que hubiera para ese mes, y una escala
+        igual a la del mes anterior no agrega nada. Devuelve True si el
+        historial cambió.
+        """
+        valores = {f"{f['Categoría']} {f['Modalidad']}": [f["Hora"], f["Mensual"]] for f in escala}
+        if not valores:
+            raise ValueError("UPACP: la escala está vacía.")
+        nueva = {"vigencia": _mes(vigencia), "escala": valores, "origen": sha256 or "importado"}
+        if nota:
+            nueva["nota"] = nota
+
+        with self._lock, bloqueo_host(self.ruta):
+            self._leido = (None, [], "")  # releer: otro proceso pudo escribir en el mismo mtime
+            antes = self.entradas()
+            entradas = [e for e in antes if e["vigencia"] != nueva["vigencia"]] + [nueva]
+            entradas.sort(key=lambda e: e["vigencia"])
+
+            # compacto: sólo las vigencias en que la escala cambia
+            compactas = []
+            for e in entradas:
+                if not compactas or compactas[-1]["escala"] != e["escala"]:
+                    compactas.append(e)
+            if compactas == antes:
+                return False
+
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.ruta.with_name(f".{self.ruta.name}.{os.getpid()}.{threading.get_ident()}")
+            tmp.write_text(json.dumps(compactas, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.ruta)
+            return True
+
+    def _indice(self, categoria, modalidad):
+        self.entradas()
+        clave = (categoria, modalidad)
+        if clave not in self._indices:
+            # una vigencia que no trae esta categoría la deja sin valor (NaN)
+            # hasta la siguiente: no se arrastra un valor de otra escala
+            filas = [
+                (e["vigencia"], *e["escala"].get(f"{categoria} {modalidad}", (np.nan, np.nan)))
+                for e in self._leido[1]
+            ]
+            self._indices[clave] = (
+                np.array([f[0] for f in filas], dtype="datetime64[M]"),
+                np.array([f[1] for f in filas] + [np.nan]),
+                np.array([f[2] for f in filas] + [np.nan]),
+            )
+        return self._indices[clave]
+
+    def valores(self, meses, categoria="CUARTA", modalidad="con retiro"):
+        """
+        (valor hora, mensual) vigentes en cada mes de `meses`, como arreglos
+        (NaN antes de la primera escala registrada, o si la escala vigente
+        no trae esa categoría y modalidad).
+        """
+        vigencias, hora, mensual = self._indice(categoria, modalidad)
+        i = np.searchsorted(vigencias, np.asarray(meses, dtype="datetime64[M]"), side="right") - 1
+        return hora[i], mensual[i]
+
+    def en(self, mes, categoria="CUARTA", modalidad="con retiro"):
+        """
+        (valor hora, mensual) vigentes en `mes` (KeyError si no hay escala).
+        """
+        hora, mensual = self.valores([np.datetime64(_mes(mes), "M")], categoria, modalidad)
+        if np.isnan(hora[0]):
+            raise KeyError(f"UPACP: no hay escala vigente en {_mes(mes)} (el historial empieza en {self.desde()}).")
+        return float(hora[0]), float(mensual[0])
+
+    def importar(self, ruta, vigencia=None, nota=None):
+        """
+        Importa escalas anteriores. `ruta` es un CSV con columnas vigencia,
+        categoria, modalidad, hora y mensual (y opcionalmente nota), o una
+        página de UPACP guardada (.html); para la página, la vigencia es
+        `vigencia` o la que anuncia el texto. Devuelve cuántas vigencias
+        cambiaron el historial.
+        """
+        ruta = Path(ruta)
+        if ruta.suffix.lower() in (".html", ".htm"):
+            contenido = ruta.read_bytes()
+            vigencia = vigencia or vigencia_upacp(contenido)
+            if vigencia is None:
+                raise ValueError(f"{ruta}: la página no indica su vigencia; usar --vigencia AAAA-MM.")
+            return int(self.registrar(leer_escala_upacp(contenido), vigencia, nota=nota or ruta.name))
+
+        escalas = {}
+        with open(ruta, encoding="utf-8", newline="") as f:
+            for fila in csv.DictReader(f):
+                mes = _mes(fila["vigencia"])
+                escalas.setdefault(mes, ([], fila.get("nota") or nota))[0].append({
+                    "Categoría": fila["categoria"].strip().upper(),
+                    "Modalidad": " ".join(fila["modalidad"].lower().split()),
+                    "Hora": _monto(fila["hora"]),
+                    "Mensual": _monto(fila["mensual"]),
+                })
+        return sum(self.registrar(filas, mes, nota=n) for mes, (filas, n) in sorted(escalas.items()))
+
+
+def _monto(texto):
+    # "3.100,50" (como en la página) o "3100.50"
+    texto = texto.strip().lstrip("$").strip()
+    return parse_monto(texto) if "," in texto else float(texto)
+
+
+historial_upacp = HistorialUPACP()
+
+
+@lru_cache(maxsize=4)  # una vez por versión de la página y proceso
+def _al_historial(sha256, last_modified, descargado):
+    """
+    Guarda en el historial la escala de una versión de la página. La
+    vigencia es la que anuncia la página o, si no la dice, el mes de
+    Last-Modified, el de la descarga (los manifiestos de espejo pueden no
+    traerlo) o el mes actual.
+    """
+    vigencia = vigencia_upacp(cache_http.leer(sha256))
+    if vigencia is None and last_modified:
+        try:
+            vigencia = parsedate_to_datetime(last_modified).strftime("%Y-%m")
+        except (TypeError, ValueError):
+            pass
+    if vigencia is None and descargado:
+        vigencia = descargado[:7]
+    if vigencia is None:
+        vigencia = datetime.now(ZoneInfo("America/Argentina/Buenos_Aires")).strftime("%Y-%m")
+    historial_upacp.registrar(escala_upacp(sha256), vigencia, sha256=sha256)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historial de escalas UPACP.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    imp = sub.add_parser("importar", help="importar escalas anteriores (CSV o página guardada)")
+    imp.add_argument("archivos", nargs="+")
+    imp.add_argument("--vigencia", default=None, help="mes de vigencia de una página (AAAA-MM)")
+    imp.add_argument("--nota", default=None, help="p. ej. la resolución que fijó la escala")
+    sub.add_parser("listar", help="vigencias registradas y valores de la 4° categoría con retiro")
+    args = parser.parse_args(argv)
+
+    if args.comando == "importar":
+        cambios = sum(historial_upacp.importar(a, args.vigencia, args.nota) for a in args.archivos)
+        print(f"{cambios} vigencias nuevas o corregidas -> {historial_upacp.ruta}", file=sys.stderr)
+    for e in historial_upacp.entradas():
+        hora, mensual = e["escala"].get("CUARTA con retiro", (None, None))
+        print(f"{e['vigencia']}  hora {hora}  mensual {mensual}  {e.get('nota') or e['origen'][:12]}")
+
+
+if __name__ == "__main__":
+    main()